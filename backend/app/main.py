@@ -1,6 +1,6 @@
 import os
 import logging
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
@@ -126,8 +126,8 @@ async def send_message(session_id: str, message_data: Dict[str, str]):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/conversation/{session_id}")
-async def get_conversation(session_id: str):
-    """Get conversation history"""
+async def get_conversation(session_id: str, since: int = Query(0, ge=0)):
+    """Get conversation history, optionally only the messages after index `since`"""
     try:
         if conversation_service is None:
             raise HTTPException(status_code=500, detail="Conversation service unavailable")
@@ -138,7 +138,8 @@ async def get_conversation(session_id: str):
         
         return {
             "session_id": session_id,
-            "messages": state.messages,
+            "messages": state.messages[since:],
+            "seq": len(state.messages),
             "stage": state.stage,
             "booking_data": state.current_booking_data
         }
@@ -44,8 +44,9 @@ from app.models.schemas import (
     SystemStatus,
     SessionInfo
 )
-from app.services.agent_service import BookingAgent, handle_chat
+from app.services.agent_service import BookingAgent, handle_chat, serialize_messages
 from app.services.calendar_service import CalendarService
+from app.services.llm_service import aclose_http_clients
 from app.services.conversation_service import ConversationService
 from app.middleware.auth_middleware import verify_api_key
 from app.middleware.logging_middleware import LoggingMiddleware
@@ -104,6 +105,7 @@ class ServiceContainer:
         """Cleanup resources"""
         if self.redis_client:
             await self.redis_client.close()
+        await aclose_http_clients()
 
 # Global service container
 services = ServiceContainer()
@@ -360,7 +362,7 @@ async def get_conversation(session_id: str):
         
         return {
             "session_id": session_id,
-            "messages": state.messages,
+            "messages": serialize_messages(state.messages),
             "stage": state.stage,
             "booking_data": state.current_booking_data
         }
@@ -371,14 +373,14 @@ async def get_conversation(session_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/chat", response_model=ChatResponse, tags=["Agent"])
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
     """
     Chat endpoint for agent interaction.
     - Modern: Validates input, robust error handling.
     - Fracture: Isolated from other logic.
     """
     try:
-        response = handle_chat(request)
+        response = await handle_chat(request)
         if not isinstance(response, ChatResponse):
             raise ValueError("Agent did not return a valid ChatResponse.")
         return response
@@ -398,10 +400,9 @@ def availability_endpoint(request: AvailabilityRequest):
             raise HTTPException(status_code=500, detail="Calendar service unavailable")
             
         # Defensive: Use default meeting duration if not provided
-        free_slots = calendar_service.get_free_slots(
+        available = calendar_service.has_free_slot(
             request.start_time, request.end_time
         )
-        available = len(free_slots) > 0
         return AvailabilityResponse(available=available)
     except Exception as e:
         logger.error(f"Availability endpoint error: {e}")
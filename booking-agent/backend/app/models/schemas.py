@@ -1,7 +1,14 @@
-from pydantic import BaseModel, Field, field_validator, model_validator
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer, field_validator, model_validator
+from typing import Optional, List, Dict, Any, Deque
+from collections import deque
 from datetime import datetime
 
+# Conversation history kept per session; older turns are dropped on append
+MAX_CONVERSATION_MESSAGES = 32
+
+def _bounded_history(messages=()) -> Deque[Dict[str, Any]]:
+    return deque(messages, maxlen=MAX_CONVERSATION_MESSAGES)
+
 def _validate_iso8601(value: str, field_name: str) -> str:
     """
     Validates that a string is a valid ISO 8601 datetime.
@@ -30,10 +37,29 @@ class ConversationMessage(BaseModel):
 class ConversationState(BaseModel):
     """State of a conversation session"""
     session_id: str = Field(..., description="Unique session identifier")
-    messages: List[Dict[str, Any]] = Field(default_factory=list, description="List of conversation messages")
+    messages: Deque[Dict[str, Any]] = Field(default_factory=_bounded_history, description="Most recent conversation messages")
     stage: str = Field(default="initial", description="Current conversation stage")
     current_booking_data: Optional[Dict[str, Any]] = Field(None, description="Current booking information")
 
+    # Per-process context caches used by the agent, never serialized
+    _cached_booking_hash: Optional[int] = PrivateAttr(default=None)
+    _cached_booking_json: str = PrivateAttr(default="")
+    _rolling_recent: Deque[str] = PrivateAttr(default_factory=lambda: deque(maxlen=4))
+    _rolling_last: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _present_mask: Optional[int] = PrivateAttr(default=None)
+
+    @field_validator("messages", mode="after")
+    @classmethod
+    def bound_messages(cls, v):
+        if isinstance(v, deque) and v.maxlen == MAX_CONVERSATION_MESSAGES:
+            return v
+        return _bounded_history(v)
+
+    @field_serializer("messages")
+    def dump_messages(self, v):
+        # Callers slice and persist the dump, so it stays a plain list
+        return list(v)
+
 class AgentResponse(BaseModel):
     """Response from the booking agent"""
     message: str = Field(..., description="Agent's response message")
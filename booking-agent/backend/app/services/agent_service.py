@@ -9,21 +9,51 @@ This module provides a modern, robust agent service that:
 - Supports multiple conversation stages
 """
 
+import asyncio
+import calendar
+import hashlib
 import logging
 import json
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from itertools import islice
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.models.schemas import ChatRequest, ChatResponse, ConversationState
-from app.services.llm_service import get_llm_service, Message, MessageRole, LLMProvider
+from app.services.llm_service import get_llm_service, Message, MessageRole, LLMProvider, LLMRequest, LLMResponse, LLMService
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Prefer orjson for the per-turn JSON work, fall back to the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+def _json_dumps(obj: Any) -> str:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+def _json_loads(data: Any) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Try to import redis, but degrade gracefully if not available
 try:
-    import redis
-    redis_client = redis.Redis(host='localhost', port=6379, db=0)
+    import redis.asyncio as aioredis
+    redis_client = aioredis.Redis(
+        connection_pool=aioredis.ConnectionPool.from_url("redis://localhost:6379/0", max_connections=32)
+    )
     _redis_available = True
 except ImportError as e:
     logger.warning(f"Redis import failed: {e}. Caching will be disabled.")
@@ -34,34 +64,355 @@ except Exception as e:
     redis_client = None
     _redis_available = False
 
+# Micro-batching limits for LLM calls coalesced across sessions
+BATCH_MAX = 16
+BATCH_WINDOW_MS = 20
+# Per-attempt timeout and retry count used when a call doesn't set its own
+_REQUEST_DEFAULTS = LLMRequest(messages=[])
+
+# Cap on agent turns and LLM calls in flight from the async entry points
+MAX_INFLIGHT_LLM = 8
+_llm_semaphore = asyncio.Semaphore(MAX_INFLIGHT_LLM)
+
+# Agent turns block on the LLM, so they get their own threads instead of the
+# loop's default executor that blocking provider calls run on
+_agent_executor = ThreadPoolExecutor(max_workers=MAX_INFLIGHT_LLM, thread_name_prefix="agent-turn")
+
+# get_llm_response cache lifetime; the per-prompt hit counter expires with it
+LLM_CACHE_TTL = 3600
+_hit_count_tasks: set = set()
+
+# Single-flight lock for get_llm_response cache misses
+LLM_LOCK_TTL = 10
+LLM_LOCK_POLL = 0.05
+
+# Deletes the lock only while it still holds the caller's token, so a caller
+# whose lock expired can't release one another worker has since taken
+_RELEASE_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# System prompts for the different conversation stages
+_SYSTEM_PROMPTS: Dict[str, str] = {
+    "greeting": """You are a helpful AI booking assistant. Your role is to help users schedule meetings and appointments. 
+    Be friendly, professional, and efficient. Ask for necessary information like date, time, duration, and purpose.""",
+    
+    "collecting_info": """You are collecting booking information. Ask for:
+    1. Date (preferred format: YYYY-MM-DD)
+    2. Time (preferred format: HH:MM)
+    3. Duration (in minutes)
+    4. Purpose/description of the meeting
+    
+    If any information is missing, ask for it politely.""",
+    
+    "confirming": """You are confirming a booking. Present the details clearly and ask for confirmation.
+    If the user confirms, proceed with booking. If they want changes, help them modify the details.""",
+    
+    "booking": """You are processing a booking. Once confirmed, create the booking and provide confirmation details.""",
+    
+    "error": """Something went wrong. Apologize and offer to help the user try again or contact support."""
+}
+
+# Confirmation detectors, negative words take precedence over positive ones
+_NEG_RE = re.compile(r'\b(?:no|not|wrong|incorrect|change|modify|different|cancel)\b', re.I)
+# Positive stems take any suffix ("Confirmed", "booked"), as the old substring check did
+_POS_RE = re.compile(r'\b(?:yes\b|correct|(?:al)?right|confirm|ok(?:ay)?\b|sure|proceed|book|perfect|great|sounds good)', re.I)
+
+# Booking intent keywords checked while greeting
+_INTENT_RE = re.compile(r'book|meeting|schedule|appointment', re.I)
+
+# Booking field presence bits, bits 0..3 = date, time, duration, purpose
+_FIELD_BITS = {"date": 0b0001, "time": 0b0010, "duration": 0b0100, "purpose": 0b1000}
+_REQUIRED_MASK = 0b0111
+_FIELD_PROMPTS = {
+    "date": "What date would you like to schedule the meeting for?",
+    "time": "What time would you prefer for the meeting?",
+    "duration": "How long should the meeting be?",
+}
+
+def _booking_mask(booking_data: Optional[Dict[str, Any]]) -> int:
+    """Encode which booking fields are present as a bitmask"""
+    if not booking_data:
+        return 0
+    return sum(bit for field, bit in _FIELD_BITS.items() if booking_data.get(field))
+
+def _build_missing_prompt(mask: int) -> str:
+    missing_fields = [field for field in _FIELD_PROMPTS if not mask & _FIELD_BITS[field]]
+    if not missing_fields:
+        return "Great! I have all the information I need."
+    if len(missing_fields) == 1:
+        return _FIELD_PROMPTS[missing_fields[0]]
+    field_list = ", ".join(missing_fields[:-1]) + f" and {missing_fields[-1]}"
+    return f"Could you please provide the {field_list} for the meeting?"
+
+# Missing-info prompt for every presence mask, built once at import
+_MISSING_PROMPTS = tuple(_build_missing_prompt(mask) for mask in range(16))
+
+# Fixed-shape date/time parsers, much cheaper than strptime
+_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_TIME_RE = re.compile(r'\s*(\d{1,2}):(\d{1,2})\s*')
+
+@lru_cache(maxsize=1024)
+def _clean_date(value: Any) -> Any:
+    """Ensure date is in YYYY-MM-DD format, None if invalid"""
+    if not isinstance(value, str):
+        return value
+    m = _DATE_RE.fullmatch(value)
+    if not m:
+        return None
+    y, mo, d = map(int, m.groups())
+    if not (1 <= y and 1 <= mo <= 12 and 1 <= d <= calendar.monthrange(y, mo)[1]):
+        return None
+    return f"{y:04d}-{mo:02d}-{d:02d}"
+
+@lru_cache(maxsize=1024)
+def _clean_time(value: Any) -> Any:
+    """Ensure time is in HH:MM format when it looks like one"""
+    if not isinstance(value, str):
+        return value
+    m = _TIME_RE.fullmatch(value)
+    if not m:
+        return value
+    hour, minute = m.groups()
+    return f"{int(hour):02d}:{int(minute):02d}"
+
+@lru_cache(maxsize=1024)
+def _clean_duration(value: Any) -> Optional[int]:
+    """Ensure duration is an integer number of minutes, None if invalid"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _identity(value: Any) -> Any:
+    return value
+
+_CLEANERS = {"date": _clean_date, "time": _clean_time, "duration": _clean_duration}
+
+# Free-text entity patterns for the rule-based path, tried before any LLM call
+_MSG_DATE_RE = re.compile(r'\b(\d{4}-\d{1,2}-\d{1,2})\b')
+_MSG_TIME_RE = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b', re.I)
+_MSG_DURATION_RE = re.compile(r'\b(\d+)\s*(minutes?|mins?|hours?|hrs?|h)\b', re.I)
+
+# Connectives that may surround the parsed values without carrying information
+_RULE_FILLER_WORDS = frozenset(("at", "on", "for", "from", "and", "the", "a", "an", "of", "please", "lasting", "starting"))
+_WORD_RE = re.compile(r"[^\W_]+")
+
+def _rule_matches(text: str) -> tuple:
+    return _MSG_DATE_RE.search(text), _MSG_TIME_RE.search(text), _MSG_DURATION_RE.search(text)
+
+def _extract_rule_entities(text: str) -> Dict[str, Any]:
+    """Pull explicitly formatted date, time and duration out of a user message"""
+    entities = {}
+    date_match, time_match, duration_match = _rule_matches(text)
+    if date_match:
+        entities["date"] = date_match.group(1)
+    if time_match:
+        if time_match.group(3):
+            hour = int(time_match.group(1)) % 12 + (12 if time_match.group(3).lower() == "pm" else 0)
+            minute = int(time_match.group(2) or 0)
+        else:
+            hour, minute = int(time_match.group(4)), int(time_match.group(5))
+        if hour < 24 and minute < 60:
+            entities["time"] = f"{hour:02d}:{minute:02d}"
+    if duration_match:
+        amount = int(duration_match.group(1))
+        entities["duration"] = amount * 60 if duration_match.group(2)[0] in "hH" else amount
+    return entities
+
+def _rule_leftover(text: str) -> List[str]:
+    """Words of a message the rule-based patterns did not consume, minus connectives"""
+    pieces = []
+    pos = 0
+    for start, end in sorted(m.span() for m in _rule_matches(text) if m):
+        pieces.append(text[pos:start])
+        pos = max(pos, end)
+    pieces.append(text[pos:])
+    return [word for word in _WORD_RE.findall(" ".join(pieces).lower()) if word not in _RULE_FILLER_WORDS]
+
+# Booking summary line prefixes
+_DATE_LBL = "📅 Date: "
+_TIME_LBL = "🕐 Time: "
+_DURATION_LBL = "⏱️ Duration: "
+_PURPOSE_LBL = "📝 Purpose: "
+
+def _fmt_date(booking_data: Dict[str, Any]) -> str:
+    date = booking_data.get("date")
+    return f"{_DATE_LBL}{date}" if date else ""
+
+def _fmt_time(booking_data: Dict[str, Any]) -> str:
+    time_value = booking_data.get("time")
+    return f"{_TIME_LBL}{time_value}" if time_value else ""
+
+def _fmt_duration(booking_data: Dict[str, Any]) -> str:
+    duration = booking_data.get("duration")
+    if not duration:
+        return ""
+    if duration < 60:
+        return f"{_DURATION_LBL}{duration} minutes"
+    hours, minutes = divmod(duration, 60)
+    return f"{_DURATION_LBL}{hours}h {minutes}m" if minutes else f"{_DURATION_LBL}{hours}h"
+
+def _fmt_purpose(booking_data: Dict[str, Any]) -> str:
+    purpose = booking_data.get("purpose")
+    return f"{_PURPOSE_LBL}{purpose}" if purpose else ""
+
+# Booking entity schema, serialized once and shared by every prompt that needs it
+BOOKING_SCHEMA_ID = "booking_v1"
+_BOOKING_SCHEMA = {
+    "date": "string (YYYY-MM-DD format)",
+    "time": "string (HH:MM format)",
+    "duration": "integer (minutes)",
+    "purpose": "string (meeting description)"
+}
+_BOOKING_SCHEMA_JSON = _json_dumps(_BOOKING_SCHEMA)
+
+# Appended to every stage prompt so one LLM call returns both the reply and the entities
+_STRUCTURED_REPLY_INSTRUCTIONS = f"""
+
+Respond with a single JSON object of the form:
+{{"message": "<your reply to the user>",
+ "entities": <object following the entity schema below>,
+ "next_stage": "<greeting|collecting_info|confirming>"}}
+Entity schema: {_BOOKING_SCHEMA_JSON}
+Only include entities the user has actually provided. Return only valid JSON."""
+
+class BatchingLLMClient:
+    """Coalesces concurrent generate calls into batched LLM service requests
+    
+    Batching runs as a task on the event loop, reading an asyncio.Queue and
+    sending each batch through LLMService.generate_batch. Agent turns call
+    the blocking generate() from worker threads; it hands the prompt to the
+    loop and waits there, so provider calls never need a thread from the
+    pool those turns are blocking.
+    """
+    
+    def __init__(self, llm_service: LLMService, max_batch: int = BATCH_MAX, window_ms: int = BATCH_WINDOW_MS):
+        self.llm_service = llm_service
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[tuple]"] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._sending: set = set()
+    
+    def start(self) -> None:
+        """Start the batching task on the running loop, if it isn't already"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+    
+    async def generate_async(self, messages: List[Message], **kwargs) -> LLMResponse:
+        """Queue a prompt and wait for its batch to be generated"""
+        self.start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((messages, kwargs, future))
+        return await future
+    
+    def generate(self, messages: List[Message], **kwargs) -> LLMResponse:
+        """Blocking generate for agent turns running in worker threads"""
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or not loop.is_running() or running is loop:
+            # No loop to batch on, or waiting would block the loop itself
+            return self.llm_service.generate(messages, **kwargs)
+        future = asyncio.run_coroutine_threadsafe(self.generate_async(messages, **kwargs), loop)
+        # Give up once every attempt could have timed out, so a stalled loop
+        # or a dead batching task can't hold this worker thread forever
+        timeout = kwargs.get("timeout", _REQUEST_DEFAULTS.timeout) * kwargs.get("retries", _REQUEST_DEFAULTS.retries)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches of up to max_batch or one window of latency"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[tuple]) -> None:
+        # Requests can only share a batch call when their options match
+        groups: Dict[str, List[tuple]] = {}
+        for item in batch:
+            key = json.dumps(item[1], sort_keys=True, default=str)
+            groups.setdefault(key, []).append(item)
+        
+        # Send without awaiting so the next window starts collecting right away
+        for items in groups.values():
+            task = asyncio.ensure_future(self._send(items))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+    
+    async def _send(self, items: List[tuple]) -> None:
+        try:
+            # Batches share the service-wide limit, not one window each
+            results = await self.llm_service.generate_batch(
+                [messages for messages, _, _ in items],
+                concurrency=None,
+                return_exceptions=True,
+                **items[0][1]
+            )
+        except Exception as e:
+            results = [e] * len(items)
+        
+        for (_, _, future), result in zip(items, results):
+            if future.done():
+                # The caller gave up waiting
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+_batching_client: Optional[BatchingLLMClient] = None
+_batching_lock = threading.Lock()
+
+def get_batching_client() -> BatchingLLMClient:
+    """Get the process-wide batching client"""
+    global _batching_client
+    if _batching_client is None:
+        with _batching_lock:
+            if _batching_client is None:
+                _batching_client = BatchingLLMClient(get_llm_service())
+    return _batching_client
+
 class BookingAgent:
     """Enhanced booking agent with LLM integration"""
     
     def __init__(self, calendar_service=None):
         self.calendar_service = calendar_service
         self.llm_service = get_llm_service()
+        self.llm_client = get_batching_client()
         self._initialize_prompts()
     
     def _initialize_prompts(self):
         """Initialize system prompts for different conversation stages"""
-        self.system_prompts = {
-            "greeting": """You are a helpful AI booking assistant. Your role is to help users schedule meetings and appointments. 
-            Be friendly, professional, and efficient. Ask for necessary information like date, time, duration, and purpose.""",
-            
-            "collecting_info": """You are collecting booking information. Ask for:
-            1. Date (preferred format: YYYY-MM-DD)
-            2. Time (preferred format: HH:MM)
-            3. Duration (in minutes)
-            4. Purpose/description of the meeting
-            
-            If any information is missing, ask for it politely.""",
-            
-            "confirming": """You are confirming a booking. Present the details clearly and ask for confirmation.
-            If the user confirms, proceed with booking. If they want changes, help them modify the details.""",
-            
-            "booking": """You are processing a booking. Once confirmed, create the booking and provide confirmation details.""",
-            
-            "error": """Something went wrong. Apologize and offer to help the user try again or contact support."""
+        self.system_prompts = _SYSTEM_PROMPTS
+        # Register each stage prompt once so every session shares the same prefix
+        self.system_prompt_ids = {
+            stage: self.llm_service.register_prefix(f"booking_{stage}", prompt + _STRUCTURED_REPLY_INSTRUCTIONS)
+            for stage, prompt in self.system_prompts.items()
         }
     
     def process_message(self, state: ConversationState, user_message: str) -> Dict[str, Any]:
@@ -70,21 +421,22 @@ class BookingAgent:
         """
         try:
             # Add user message to conversation history
-            state.messages.append({
-                "role": "user",
-                "content": user_message,
-                "timestamp": datetime.now().isoformat()
-            })
+            state.messages.append({"role": "user", "content": user_message, "ts": time.time_ns()})
+            
+            # Determine current stage if not set
+            if not state.stage or state.stage == "initial":
+                state.stage = "greeting"
             
-            # Determine conversation stage and generate response
-            response_data = self._generate_response(state, user_message)
+            # Answer deterministic transitions without an LLM round trip
+            rule_entities = {}
+            if state.stage == "collecting_info":
+                rule_entities = self._clean_booking_entities(_extract_rule_entities(user_message))
+            response_data = self._try_rule_based_response(state, user_message, rule_entities)
+            if response_data is None:
+                response_data = self._generate_response(state, user_message, rule_entities)
             
             # Add agent response to conversation history
-            state.messages.append({
-                "role": "assistant", 
-                "content": response_data.get("message", ""),
-                "timestamp": datetime.now().isoformat()
-            })
+            state.messages.append({"role": "assistant", "content": response_data.get("message", ""), "ts": time.time_ns()})
             
             # Update conversation state
             state.stage = response_data.get("stage", state.stage)
@@ -103,15 +455,35 @@ class BookingAgent:
                 "requires_confirmation": False
             }
     
-    def _generate_response(self, state: ConversationState, user_message: str) -> Dict[str, Any]:
-        """Generate appropriate response based on conversation stage"""
+    def _try_rule_based_response(self, state: ConversationState, user_message: str,
+                                 rule_entities: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer the message from rules alone, or None when the LLM is needed"""
+        if state.stage == "confirming":
+            reply = {"message": "", "entities": {}, "next_stage": None}
+        elif state.stage == "greeting" and _INTENT_RE.search(user_message) is not None:
+            reply = {"message": "", "entities": {}, "next_stage": None}
+        elif state.stage == "collecting_info":
+            # Only skip the LLM when the patterns complete the booking and the
+            # message holds nothing else, e.g. a relative date or a purpose
+            mask = self._get_present_mask(state) | _booking_mask(rule_entities)
+            if not (rule_entities and self._has_complete_booking_info(mask) and not _rule_leftover(user_message)):
+                return None
+            reply = {"message": "", "entities": rule_entities, "next_stage": None}
+        else:
+            return None
         
-        # Determine current stage if not set
-        if not state.stage or state.stage == "initial":
-            state.stage = "greeting"
+        return self._process_stage_response(state, user_message, reply)
+    
+    def _generate_response(self, state: ConversationState, user_message: str,
+                           rule_entities: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate appropriate response based on conversation stage
+        
+        rule_entities, parsed from the message by the rule-based patterns,
+        fill in whatever the LLM extraction leaves out.
+        """
         
-        # Get appropriate system prompt
-        system_prompt = self.system_prompts.get(state.stage, self.system_prompts["greeting"])
+        # Get the registered system prompt prefix
+        prefix_id = self.system_prompt_ids.get(state.stage, self.system_prompt_ids["greeting"])
         
         # Build conversation context
         conversation_context = self._build_conversation_context(state)
@@ -119,21 +491,29 @@ class BookingAgent:
         # Generate LLM response
         try:
             messages = [
-                Message(role=MessageRole.SYSTEM, content=system_prompt),
                 Message(role=MessageRole.USER, content=f"Conversation context: {conversation_context}\n\nUser message: {user_message}")
             ]
             
-            response = self.llm_service.generate(
+            response = self.llm_client.generate(
                 messages=messages,
+                prefix_id=prefix_id,
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                response_format={"type": "json_object"}
             )
             
             # Process the response based on stage
-            return self._process_stage_response(state, user_message, response.content)
+            reply = self._parse_structured_reply(response.content)
+            if rule_entities:
+                reply["entities"] = {**rule_entities, **reply["entities"]}
+            return self._process_stage_response(state, user_message, reply)
             
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
+            if rule_entities:
+                # Keep what the patterns parsed rather than failing the turn
+                reply = {"message": "", "entities": rule_entities, "next_stage": None}
+                return self._process_stage_response(state, user_message, reply)
             return {
                 "message": "I'm having trouble processing your request right now. Please try again in a moment.",
                 "stage": "error",
@@ -147,33 +527,81 @@ class BookingAgent:
         context_parts = []
         
         if state.current_booking_data:
-            context_parts.append(f"Current booking data: {json.dumps(state.current_booking_data)}")
+            context_parts.append(f"Current booking data: {self._cached_booking_json(state)}")
         
         if state.messages:
             # Include last few messages for context
-            recent_messages = state.messages[-4:]  # Last 4 messages
             context_parts.append("Recent conversation:")
-            for msg in recent_messages:
-                role = msg.get("role", "unknown")
-                content = msg.get("content", "")
-                context_parts.append(f"{role}: {content}")
+            context_parts.extend(self._recent_messages(state))
         
         return "\n".join(context_parts)
     
-    def _process_stage_response(self, state: ConversationState, user_message: str, llm_response: str) -> Dict[str, Any]:
+    def _cached_booking_json(self, state: ConversationState) -> str:
+        """Serialize booking data, reusing the cached JSON while it is unchanged"""
+        try:
+            booking_hash = hash(frozenset(state.current_booking_data.items()))
+        except TypeError:
+            # Unhashable values, serialize every time
+            return _json_dumps(state.current_booking_data)
+        
+        if booking_hash != state._cached_booking_hash:
+            state._cached_booking_json = _json_dumps(state.current_booking_data)
+            state._cached_booking_hash = booking_hash
+        return state._cached_booking_json
+    
+    def _recent_messages(self, state: ConversationState) -> List[str]:
+        """Return the last 4 messages as preformatted lines, appending only new turns"""
+        recent = state._rolling_recent
+        new_messages = []
+        for msg in islice(reversed(state.messages), recent.maxlen):
+            if msg is state._rolling_last:
+                break
+            new_messages.append(msg)
+        else:
+            # Last formatted message is gone (history replaced), rebuild from scratch
+            recent.clear()
+        
+        for msg in reversed(new_messages):
+            recent.append(f"{msg.get('role', 'unknown')}: {msg.get('content', '')}")
+        state._rolling_last = state.messages[-1] if state.messages else None
+        return list(recent)
+    
+    def _parse_structured_reply(self, content: str) -> Dict[str, Any]:
+        """Parse the fused JSON reply, falling back to treating it as plain text"""
+        data = None
+        start = content.find('{')
+        end = content.rfind('}') + 1
+        if start != -1 and end != 0:
+            try:
+                data = _json_loads(content[start:end])
+            except json.JSONDecodeError:
+                data = None
+        
+        if not isinstance(data, dict):
+            return {"message": content, "entities": {}, "next_stage": None}
+        
+        entities = data.get("entities")
+        return {
+            "message": data.get("message") or content,
+            "entities": self._clean_booking_entities(entities) if isinstance(entities, dict) else {},
+            "next_stage": data.get("next_stage")
+        }
+    
+    def _process_stage_response(self, state: ConversationState, user_message: str, reply: Dict[str, Any]) -> Dict[str, Any]:
         """Process LLM response based on current stage with enhanced logic"""
         
-        # Extract booking entities if in collecting_info stage
+        # Merge booking entities if in collecting_info stage
         if state.stage == "collecting_info":
-            entities = self._extract_booking_entities(user_message)
+            entities = reply["entities"]
             if entities:
                 # Update booking data
                 if not state.current_booking_data:
                     state.current_booking_data = {}
                 state.current_booking_data.update(entities)
+                state._present_mask = _booking_mask(state.current_booking_data)
                 
                 # Check if we have all required information
-                if self._has_complete_booking_info(state.current_booking_data):
+                if self._has_complete_booking_info(self._get_present_mask(state)):
                     state.stage = "confirming"
                     return {
                         "message": f"Perfect! I have all the information. Let me confirm your booking:\n\n{self._format_booking_summary(state.current_booking_data)}\n\nIs this correct?",
@@ -184,7 +612,7 @@ class BookingAgent:
                     }
                 else:
                     # Still missing some information
-                    missing_prompt = self._get_missing_info_prompt(state.current_booking_data)
+                    missing_prompt = self._get_missing_info_prompt(self._get_present_mask(state))
                     return {
                         "message": f"Thanks! {missing_prompt}",
                         "stage": "collecting_info",
@@ -194,7 +622,7 @@ class BookingAgent:
                     }
             else:
                 # No entities found, ask for missing info
-                missing_prompt = self._get_missing_info_prompt(state.current_booking_data or {})
+                missing_prompt = self._get_missing_info_prompt(self._get_present_mask(state))
                 return {
                     "message": missing_prompt,
                     "stage": "collecting_info",
@@ -239,7 +667,7 @@ class BookingAgent:
         
         # Handle greeting stage - transition to collecting info if user mentions booking
         if state.stage == "greeting":
-            if any(word in user_message.lower() for word in ["book", "meeting", "schedule", "appointment"]):
+            if _INTENT_RE.search(user_message) is not None or reply.get("next_stage") == "collecting_info":
                 state.stage = "collecting_info"
                 return {
                     "message": "Great! I'd be happy to help you book a meeting. Could you please provide the date, time, and duration?",
@@ -251,143 +679,61 @@ class BookingAgent:
         
         # Default response
         return {
-            "message": llm_response,
+            "message": reply["message"],
             "stage": state.stage,
             "booking_data": state.current_booking_data,
             "suggested_slots": [],
             "requires_confirmation": False
         }
     
-    def _extract_booking_entities(self, text: str) -> Dict[str, Any]:
-        """Extract booking entities from text using LLM or mock provider"""
-        schema = {
-            "date": "string (YYYY-MM-DD format)",
-            "time": "string (HH:MM format)", 
-            "duration": "integer (minutes)",
-            "purpose": "string (meeting description)"
-        }
+    def _clean_booking_entities(self, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and normalize booking entities returned by the LLM"""
+        cleaned_entities = {}
+        for key, value in entities.items():
+            if value is None or value == "":
+                continue
+            cleaner = _CLEANERS.get(key, _identity)
+            try:
+                cleaned = cleaner(value)
+            except TypeError:
+                # Unhashable value from the LLM, bypass the cache
+                cleaned = cleaner.__wrapped__(value)
+            if cleaned is not None:
+                cleaned_entities[key] = cleaned
         
-        try:
-            # Use the LLM service's extract_entities method
-            entities = self.llm_service.extract_entities(text, schema)
-            
-            # Clean up entities and validate
-            cleaned_entities = {}
-            for key, value in entities.items():
-                if value is not None and value != "":
-                    # Validate and clean up specific fields
-                    if key == "date":
-                        # Ensure date is in YYYY-MM-DD format
-                        try:
-                            if isinstance(value, str):
-                                # Try to parse and reformat
-                                parsed_date = datetime.strptime(value, '%Y-%m-%d')
-                                cleaned_entities[key] = parsed_date.strftime('%Y-%m-%d')
-                            else:
-                                cleaned_entities[key] = value
-                        except:
-                            # Skip invalid dates
-                            continue
-                    elif key == "time":
-                        # Ensure time is in HH:MM format
-                        if isinstance(value, str):
-                            # Try to parse and reformat time
-                            try:
-                                if ':' in value:
-                                    hour, minute = value.split(':')
-                                    cleaned_entities[key] = f"{int(hour):02d}:{int(minute):02d}"
-                                else:
-                                    cleaned_entities[key] = value
-                            except:
-                                cleaned_entities[key] = value
-                        else:
-                            cleaned_entities[key] = value
-                    elif key == "duration":
-                        # Ensure duration is an integer
-                        try:
-                            cleaned_entities[key] = int(value)
-                        except:
-                            continue
-                    else:
-                        cleaned_entities[key] = value
-            
-            return cleaned_entities
-        except Exception as e:
-            logger.error(f"Entity extraction failed: {e}")
-            return {}
+        return cleaned_entities
+    
+    def _get_present_mask(self, state: ConversationState) -> int:
+        """Get the booking presence mask, computing it if the state was just loaded"""
+        if state._present_mask is None:
+            state._present_mask = _booking_mask(state.current_booking_data)
+        return state._present_mask
     
-    def _has_complete_booking_info(self, booking_data: Dict[str, Any]) -> bool:
-        """Check if booking data has all required information"""
-        required_fields = ["date", "time", "duration"]
-        return all(field in booking_data and booking_data[field] for field in required_fields)
+    def _has_complete_booking_info(self, mask: int) -> bool:
+        """Check if the presence mask has all required information"""
+        return (mask & _REQUIRED_MASK) == _REQUIRED_MASK
     
     def _format_booking_summary(self, booking_data: Dict[str, Any]) -> str:
         """Format booking data for display"""
-        summary_parts = []
-        if booking_data.get("date"):
-            summary_parts.append(f"📅 Date: {booking_data['date']}")
-        if booking_data.get("time"):
-            summary_parts.append(f"🕐 Time: {booking_data['time']}")
-        if booking_data.get("duration"):
-            duration = booking_data['duration']
-            if duration >= 60:
-                hours = duration // 60
-                minutes = duration % 60
-                if minutes > 0:
-                    summary_parts.append(f"⏱️ Duration: {hours}h {minutes}m")
-                else:
-                    summary_parts.append(f"⏱️ Duration: {hours}h")
-            else:
-                summary_parts.append(f"⏱️ Duration: {duration} minutes")
-        if booking_data.get("purpose"):
-            summary_parts.append(f"📝 Purpose: {booking_data['purpose']}")
-        
-        return "\n".join(summary_parts)
+        return "\n".join(
+            part for part in (
+                _fmt_date(booking_data),
+                _fmt_time(booking_data),
+                _fmt_duration(booking_data),
+                _fmt_purpose(booking_data)
+            ) if part
+        )
     
     def _is_confirmation_positive(self, message: str) -> bool:
         """Check if user message indicates positive confirmation"""
-        positive_words = ["yes", "correct", "right", "confirm", "ok", "okay", "sure", "proceed", "book", "confirm", "perfect", "great", "sounds good"]
-        negative_words = ["no", "not", "wrong", "incorrect", "change", "modify", "different", "cancel"]
-        
-        message_lower = message.lower()
-        
         # Check for negative words first
-        for word in negative_words:
-            if word in message_lower:
-                return False
-        
-        # Check for positive words
-        for word in positive_words:
-            if word in message_lower:
-                return True
-        
-        return False
+        if _NEG_RE.search(message):
+            return False
+        return bool(_POS_RE.search(message))
     
-    def _get_missing_info_prompt(self, booking_data: Dict[str, Any]) -> str:
+    def _get_missing_info_prompt(self, mask: int) -> str:
         """Generate a prompt asking for missing information"""
-        missing_fields = []
-        
-        if not booking_data.get("date"):
-            missing_fields.append("date")
-        if not booking_data.get("time"):
-            missing_fields.append("time")
-        if not booking_data.get("duration"):
-            missing_fields.append("duration")
-        
-        if not missing_fields:
-            return "Great! I have all the information I need."
-        
-        prompts = {
-            "date": "What date would you like to schedule the meeting for?",
-            "time": "What time would you prefer for the meeting?",
-            "duration": "How long should the meeting be?",
-        }
-        
-        if len(missing_fields) == 1:
-            return prompts[missing_fields[0]]
-        else:
-            field_list = ", ".join(missing_fields[:-1]) + f" and {missing_fields[-1]}"
-            return f"Could you please provide the {field_list} for the meeting?"
+        return _MISSING_PROMPTS[mask]
     
     def _create_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create the actual booking"""
@@ -412,7 +758,34 @@ class BookingAgent:
                 "error": str(e)
             }
 
-def handle_chat(request: ChatRequest) -> ChatResponse:
+def _fmt_ts(ns: int) -> str:
+    """Format a stored nanosecond timestamp as an ISO 8601 UTC string"""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+def serialize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Render stored conversation messages for API responses"""
+    serialized = []
+    for msg in messages:
+        if "ts" in msg:
+            rendered = {key: value for key, value in msg.items() if key != "ts"}
+            rendered["timestamp"] = _fmt_ts(msg["ts"])
+            msg = rendered
+        serialized.append(msg)
+    return serialized
+
+_AGENT_SINGLETON: Optional[BookingAgent] = None
+_agent_lock = threading.Lock()
+
+def _get_agent() -> BookingAgent:
+    """Get the shared booking agent used by handle_chat"""
+    global _AGENT_SINGLETON
+    if _AGENT_SINGLETON is None:
+        with _agent_lock:
+            if _AGENT_SINGLETON is None:
+                _AGENT_SINGLETON = BookingAgent()
+    return _AGENT_SINGLETON
+
+async def handle_chat(request: ChatRequest) -> ChatResponse:
     """
     Handle a chat request and return a response.
     - Modern: Ready for enhanced agent integration.
@@ -427,15 +800,42 @@ def handle_chat(request: ChatRequest) -> ChatResponse:
         raise ValueError("Message cannot be empty.")
     
     # Use enhanced agent for processing
-    agent = BookingAgent()
+    agent = _get_agent()
     # Create a mock state for this request
-    state = ConversationState(session_id="temp", messages=[])
+    state = ConversationState(session_id="temp")
     
-    response_data = agent.process_message(state, user_message)
+    # The agent blocks on the LLM, keep it off the event loop
+    get_batching_client().start()
+    async with _llm_semaphore:
+        response_data = await asyncio.get_running_loop().run_in_executor(
+            _agent_executor, agent.process_message, state, user_message
+        )
     
     return ChatResponse(response=response_data.get("message", "I'm sorry, I couldn't process your request."))
 
-def get_llm_response(prompt: str) -> str:
+async def _wait_for_cached_response(cache_key: str, lock_key: str) -> Optional[str]:
+    """Poll for the response another worker is computing, None if it gives up"""
+    deadline = time.monotonic() + LLM_LOCK_TTL
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LLM_LOCK_POLL)
+        cached, locked = await redis_client.mget([cache_key, lock_key])
+        if cached is not None:
+            return cached.decode("utf-8")
+        if locked is None:
+            # Lock released without a result, the other call failed
+            return None
+    return None
+
+async def _count_hit(hits_key: str) -> None:
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incr(hits_key)
+            pipe.expire(hits_key, LLM_CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis hit count failed (non-blocking): {e}")
+
+async def get_llm_response(prompt: str) -> str:
     """
     Get LLM response for a given prompt, with Redis caching.
     - Modern: Uses new LLM service for better reliability.
@@ -445,24 +845,55 @@ def get_llm_response(prompt: str) -> str:
     if not isinstance(prompt, str) or not prompt.strip():
         raise ValueError("Prompt must be a non-empty string.")
 
-    cache_key = f"llm_response:{prompt.strip()}"
+    # Key on a fixed-size digest instead of the full prompt text
+    prompt_digest = hashlib.blake2b(prompt.strip().encode("utf-8"), digest_size=16).hexdigest()
+    cache_key = f"llm:{prompt_digest}"
+    fail_key = f"llm:fail:{prompt_digest}"
+    recently_failed = False
     # Try to get from cache first, if redis is available
     if _redis_available and redis_client is not None:
         try:
-            cached = redis_client.get(cache_key)
+            # Fetch the cached response and the failure marker in one round trip
+            cached, failed = await redis_client.mget([cache_key, fail_key])
             if cached is not None:
                 response = cached.decode("utf-8")
                 if isinstance(response, str) and response.strip():
                     logger.info("LLM response cache hit.")
+                    # Count the hit without holding up the response
+                    task = asyncio.ensure_future(_count_hit(f"{cache_key}:hits"))
+                    _hit_count_tasks.add(task)
+                    task.add_done_callback(_hit_count_tasks.discard)
                     return response
+            recently_failed = failed is not None
         except Exception as e:
             logger.warning(f"Redis cache read failed: {e}")
 
+    if recently_failed:
+        logger.info("LLM negative cache hit, skipping call.")
+        raise RuntimeError("LLM recently failed")
+
+    # Let only one caller compute a missing response, the rest wait for its cache write
+    lock_key = f"{cache_key}:lock"
+    lock_token = None
+    if _redis_available and redis_client is not None:
+        try:
+            token = uuid.uuid4().hex
+            if await redis_client.set(lock_key, token, ex=LLM_LOCK_TTL, nx=True):
+                lock_token = token
+            else:
+                response = await _wait_for_cached_response(cache_key, lock_key)
+                if response and response.strip():
+                    logger.info("LLM response filled by a concurrent request.")
+                    return response
+        except Exception as e:
+            logger.warning(f"Redis lock failed, calling LLM directly: {e}")
+
     # Use new LLM service
     try:
         llm_service = get_llm_service()
         messages = [Message(role=MessageRole.USER, content=prompt)]
-        response = llm_service.generate(messages=messages)
+        async with _llm_semaphore:
+            response = await llm_service.generate_async(messages=messages)
         
         if not isinstance(response.content, str) or not response.content.strip():
             logger.error("LLM returned an invalid response.")
@@ -472,6 +903,16 @@ def get_llm_response(prompt: str) -> str:
         
     except Exception as e:
         logger.error(f"LLM call failed: {e}")
+        # Remember the failure briefly so repeated prompts don't hammer the upstream
+        if _redis_available and redis_client is not None:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.setex(fail_key, 60, "1")
+                    if lock_token is not None:
+                        pipe.eval(_RELEASE_LOCK_LUA, 1, lock_key, lock_token)
+                    await pipe.execute()
+            except Exception as cache_error:
+                logger.warning(f"Redis negative cache write failed (non-blocking): {cache_error}")
         raise RuntimeError("Failed to get response from LLM.")
 
     # Modern, robust, and bug-free cache write (fracture pattern, non-blocking)
@@ -479,7 +920,12 @@ def get_llm_response(prompt: str) -> str:
     if _redis_available and redis_client is not None:
         try:
             if isinstance(result, str) and result.strip():
-                redis_client.setex(cache_key, 3600, result)  # Cache for 1 hour
+                # Batch the cache write and lock release into a single round trip
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.set(cache_key, result, ex=LLM_CACHE_TTL, nx=True)  # Cache for 1 hour, first writer wins
+                    if lock_token is not None:
+                        pipe.eval(_RELEASE_LOCK_LUA, 1, lock_key, lock_token)
+                    await pipe.execute()
         except Exception as e:
             logger.warning(f"Redis cache write failed (non-blocking): {e}")
 
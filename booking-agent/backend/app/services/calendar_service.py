@@ -1,13 +1,296 @@
 # backend/app/services/calendar_service.py
 
 import os
-import pickle
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
-from google.auth.transport.requests import Request
+import pickle
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import httplib2
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.model import JsonModel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: POSIX advisory locks to serialize token writes across workers
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Optional: faster JSON for API responses and cached busy intervals
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_dumps(obj):
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+def _json_loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _FastJsonModel(JsonModel):
+    """JsonModel that decodes API responses with orjson when it is installed"""
+
+    def deserialize(self, content):
+        try:
+            body = _json_loads(content)
+        except ValueError:
+            # Not JSON, hand back the text like JsonModel does
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+# Optional: C ISO 8601 parser, falls back to datetime.fromisoformat
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+    def _parse_iso(value):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+# Shape gate for ISO 8601 input, rejects malformed strings without a parser exception.
+# Accepts a date alone (midnight) or a date with a T- or space-separated time;
+# seconds, fractions and a Z, +HH:MM or +HHMM offset are optional.
+_ISO_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?')
+
+
+def _parse_checked(value):
+    """Parse a well-formed ISO 8601 datetime string, None for anything else"""
+    if _ISO_RE.fullmatch(value) is None:
+        return None
+    try:
+        return _parse_iso(value)
+    except ValueError:
+        # Right shape, impossible value (e.g. month 13)
+        return None
+
+
+def _format_event_time(dt):
+    """Canonical event time: UTC with a Z suffix, or as given when naive (read as UTC by the API)"""
+    if dt.tzinfo is None:
+        return dt.isoformat()
+    return dt.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+# Optional: Redis shares freebusy results and invalidations across workers
+try:
+    import redis
+    redis_client = redis.Redis.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379/0"), socket_connect_timeout=0.5
+    )
+    _redis_available = True
+except ImportError as e:
+    logging.getLogger(__name__).warning(f"Redis import failed: {e}. Shared freebusy cache disabled.")
+    redis_client = None
+    _redis_available = False
+except Exception as e:
+    logging.getLogger(__name__).warning(f"Redis client initialization failed: {e}. Shared freebusy cache disabled.")
+    redis_client = None
+    _redis_available = False
+
+# Optional: vectorized free-slot search for long windows
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Candidate slot granularity for get_free_slots
+SLOT_STEP_SECONDS = 15 * 60
+
+# Emitted slot format for UTC requests
+UTC_SLOT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Use the NumPy slot mask once a window has this many candidate slots
+NUMPY_MIN_SLOTS = 512
+
+# Refresh OAuth tokens this long before they expire, retry failed refreshes after a pause
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+TOKEN_REFRESH_RETRY = 30
+
+# Redis pub/sub channel announcing calendar changes, payload "sender|start_ts:end_ts" or "sender|*"
+FREEBUSY_CHANNEL = "calendar:changed"
+_INSTANCE_ID = uuid.uuid4().hex
+REDIS_RETRY = 30
+
+# After a Redis error it is skipped for REDIS_RETRY seconds, rather than
+# paying a connect timeout on every call while the server is down
+_redis_down_until = 0.0
+
+
+def _redis_up():
+    return _redis_available and time.monotonic() >= _redis_down_until
+
+
+def _redis_failed(logger, message, e):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY
+    logger.warning(f"{message}, skipping Redis for {REDIS_RETRY}s: {e}")
+
+# Calendars checked when none are given; freebusy accepts at most 50 per query
+DEFAULT_CALENDARS = ("primary",)
+FREEBUSY_MAX_ITEMS = 50
+FREEBUSY_MAX_WORKERS = 8
+
+# Shared pool for concurrent multi-calendar freebusy queries
+_freebusy_executor = ThreadPoolExecutor(max_workers=FREEBUSY_MAX_WORKERS, thread_name_prefix="freebusy")
+
+# Partial-response masks, only the parts callers read come back
+FREEBUSY_FIELDS = "calendars/primary/busy"
+EVENT_FIELDS = "id,htmlLink,summary,start,end"
+
+# Google caps HTTP batch requests at 50 calls
+EVENTS_BATCH_SIZE = 50
+
+# Keep-alive connection pool shared by all Calendar API calls
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 50
+HTTP_TIMEOUT = 30
+
+
+
+def _merge_busy(busy_periods):
+    """Convert freebusy periods to sorted, disjoint (start, end) epoch-second tuples"""
+    merged = []
+    for busy_start, busy_end in sorted(
+        (
+            int(_parse_iso(busy["start"]).timestamp()),
+            int(_parse_iso(busy["end"]).timestamp())
+        )
+        for busy in busy_periods
+    ):
+        if merged and busy_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], busy_end))
+        else:
+            merged.append((busy_start, busy_end))
+    return merged
+
+
+def _sweep_slot_starts(start_ts, end_ts, duration, merged):
+    """Walk the gaps between merged busy intervals and lazily yield grid-aligned slot starts"""
+    gap_start = start_ts
+    for busy_start, busy_end in [*merged, (end_ts, end_ts)]:
+        gap_end = min(busy_start, end_ts)
+        # First grid point at or after the gap start
+        first = start_ts + -(-max(gap_start - start_ts, 0) // SLOT_STEP_SECONDS) * SLOT_STEP_SECONDS
+        yield from range(first, gap_end - duration + 1, SLOT_STEP_SECONDS)
+        gap_start = max(gap_start, busy_end)
+
+
+def _mask_slot_starts(start_ts, end_ts, duration, merged):
+    """Vectorized slot search: mask every grid slot against the busy intervals at once"""
+    slot_starts = np.arange(start_ts, end_ts - duration + 1, SLOT_STEP_SECONDS, dtype=np.int64)
+    if not merged or not len(slot_starts):
+        return slot_starts.tolist()
+    busy_starts = np.fromiter((start for start, _ in merged), dtype=np.int64, count=len(merged))
+    busy_ends = np.fromiter((end for _, end in merged), dtype=np.int64, count=len(merged))
+    # First busy interval ending after each slot start is the only one that can overlap it
+    idx = np.searchsorted(busy_ends, slot_starts, side='right')
+    busy_mask = (idx < len(busy_starts)) & (busy_starts[np.minimum(idx, len(busy_starts) - 1)] < slot_starts + duration)
+    return slot_starts[~busy_mask].tolist()
+
+
+class _BusyIndex:
+    """
+    Disjoint sorted busy intervals stored as parallel int64 arrays of epoch
+    seconds, so overlap lookups are two bisects over flat memory.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals=()):
+        self.starts = array('q', (start for start, _ in intervals))
+        self.ends = array('q', (end for _, end in intervals))
+
+    def overlapping(self, start_ts, end_ts):
+        """Return the (start, end) intervals that overlap [start_ts, end_ts)"""
+        lo = bisect_right(self.ends, start_ts)
+        hi = bisect_left(self.starts, end_ts, lo)
+        return list(zip(self.starts[lo:hi], self.ends[lo:hi]))
+
+    def with_interval(self, start_ts, end_ts):
+        """
+        Return a copy with a busy interval inserted, merged with any it overlaps
+        or touches. Cached indexes are read without a lock, so they are never
+        changed in place.
+        """
+        lo = bisect_left(self.ends, start_ts)
+        hi = bisect_right(self.starts, end_ts, lo)
+        if lo < hi:
+            start_ts = min(start_ts, self.starts[lo])
+            end_ts = max(end_ts, self.ends[hi - 1])
+        index = _BusyIndex()
+        index.starts = self.starts[:lo] + array('q', (start_ts,)) + self.starts[hi:]
+        index.ends = self.ends[:lo] + array('q', (end_ts,)) + self.ends[hi:]
+        return index
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+
+def _month_bounds(month):
+    """Epoch-second [start, end) bounds of a (year, month) in UTC"""
+    year, mon = month
+    month_start = datetime(year, mon, 1, tzinfo=timezone.utc)
+    month_end = datetime(year + mon // 12, mon % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(month_start.timestamp()), int(month_end.timestamp())
+
+
+class _SessionHttp:
+    """
+    httplib2-compatible adapter over a pooled requests AuthorizedSession.
+    googleapiclient only calls request(), so the API client can ride on
+    urllib3 connection pooling and keep-alive, and it is safe across threads.
+    """
+
+    def __init__(self, session, timeout=HTTP_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        response = self.session.request(
+            method, uri, data=body, headers=headers, timeout=self.timeout,
+            allow_redirects=redirections > 0
+        )
+        info = dict(response.headers)
+        info["status"] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+
+def _pooled_session(creds):
+    """Build an AuthorizedSession with a shared, retrying connection pool"""
+    session = AuthorizedSession(creds)
+    session.mount("https://", HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+    ))
+    return session
+
 
 class CalendarService:
     """
@@ -17,16 +300,38 @@ class CalendarService:
     - Improvements: Environment-based config, safe token handling, and clear error reporting.
     """
 
-    TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "token.pickle")
+    TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "token.json")
+    # Where tokens were pickled before they moved to JSON, read once to migrate
+    LEGACY_TOKEN_PATH = "token.pickle"
     CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials/google_credentials.json")
     SCOPES = [
         'https://www.googleapis.com/auth/calendar.readonly',
         'https://www.googleapis.com/auth/calendar.events'
     ]
 
+    # Authenticated API client shared by every instance in the process
+    _service_singleton = None
+    _lock = threading.Lock()
+    _refresher = None
+    _listener = None
+
+    # Recent freebusy results, (calendars, start_ts, end_ts) -> (fetched_at, merged intervals)
+    FREEBUSY_CACHE_SIZE = 128
+    FREEBUSY_CACHE_TTL = 120
+    _freebusy_cache = OrderedDict()
+    # Prefetched whole months, (calendars, year, month) -> (fetched_at, _BusyIndex)
+    MONTH_CACHE_SIZE = 12
+    _month_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.service = self._authenticate()
+        if CalendarService._service_singleton is None:
+            with CalendarService._lock:
+                if CalendarService._service_singleton is None:
+                    CalendarService._service_singleton = self._authenticate()
+        self.service = CalendarService._service_singleton
+        self._start_invalidation_listener()
 
     def _authenticate(self):
         """
@@ -34,22 +339,8 @@ class CalendarService:
         Uses environment variables for credentials and token paths.
         Handles all edge cases and ensures credentials are valid.
         """
-        creds = None
-
         # Try to load existing token
-        if os.path.isfile(self.TOKEN_PATH):
-            try:
-                with open(self.TOKEN_PATH, 'rb') as token_file:
-                    loaded = pickle.load(token_file)
-                    if hasattr(loaded, 'valid') and hasattr(loaded, 'expired'):
-                        creds = loaded
-            except Exception as e:
-                self.logger.warning(f"Failed to load token.pickle: {e}")
-                creds = None
-                try:
-                    os.remove(self.TOKEN_PATH)
-                except Exception:
-                    pass
+        creds = self._load_token()
 
         # If no valid creds, refresh or create new
         if not creds or not getattr(creds, "valid", False):
@@ -68,104 +359,382 @@ class CalendarService:
                 raise RuntimeError("Google Calendar authentication failed. Check credentials and permissions.") from e
 
             # Save the credentials for the next run
-            try:
-                with open(self.TOKEN_PATH, 'wb') as token:
-                    pickle.dump(creds, token)
-            except Exception as e:
-                self.logger.warning(f"Failed to save token.pickle: {e}")
+            self._save_token(creds)
 
         if not creds or not getattr(creds, "valid", False):
             raise RuntimeError("Google Calendar credentials are invalid after authentication.")
 
+        self._start_token_refresher(creds)
+
         try:
-            service = build('calendar', 'v3', credentials=creds)
+            # Use the discovery document bundled with the client, no fetch or file cache
+            service = build(
+                'calendar', 'v3',
+                http=_SessionHttp(_pooled_session(creds)),
+                model=_FastJsonModel(),
+                static_discovery=True,
+                cache_discovery=False
+            )
         except Exception as e:
             self.logger.error(f"Failed to build Google Calendar service: {e}")
             raise RuntimeError("Failed to initialize Google Calendar service.") from e
 
         return service
 
-    def get_free_slots(self, start_date, end_date, duration_minutes=60):
+    def _load_token(self):
+        """
+        Load the stored token, or None. A pickled token, at TOKEN_PATH or the old
+        default path, is read once and rewritten as JSON. Files that fail to
+        parse are left in place, since they may hold the only refresh token.
+        """
+        if os.path.isfile(self.TOKEN_PATH):
+            try:
+                return Credentials.from_authorized_user_file(self.TOKEN_PATH, self.SCOPES)
+            except Exception as e:
+                creds = self._load_legacy_token(self.TOKEN_PATH)
+                if creds is None:
+                    self.logger.warning(f"Failed to load token from {self.TOKEN_PATH}: {e}")
+                return creds
+        if os.path.isfile(self.LEGACY_TOKEN_PATH):
+            return self._load_legacy_token(self.LEGACY_TOKEN_PATH)
+        return None
+
+    def _load_legacy_token(self, path):
+        """Read a pickled token and save it as JSON at TOKEN_PATH"""
+        try:
+            with open(path, 'rb') as token_file:
+                loaded = pickle.load(token_file)
+        except Exception:
+            return None
+        if not (hasattr(loaded, 'valid') and hasattr(loaded, 'expired') and hasattr(loaded, 'to_json')):
+            return None
+        self.logger.info(f"Migrating pickled token {path} to JSON at {self.TOKEN_PATH}")
+        self._save_token(loaded)
+        return loaded
+
+    def _save_token(self, creds):
+        """
+        Persist credentials as JSON. The write goes to a temp file that is moved
+        into place, under an exclusive lock so concurrent workers don't race.
+        """
+        tmp_path = f"{self.TOKEN_PATH}.{os.getpid()}.tmp"
+        try:
+            with open(f"{self.TOKEN_PATH}.lock", 'w') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                with open(tmp_path, 'w') as token:
+                    token.write(creds.to_json())
+                os.replace(tmp_path, self.TOKEN_PATH)
+        except Exception as e:
+            self.logger.warning(f"Failed to save token to {self.TOKEN_PATH}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _start_token_refresher(self, creds):
+        """Refresh the access token in the background shortly before it expires"""
+        if not getattr(creds, "refresh_token", None) or CalendarService._refresher is not None:
+            return
+        CalendarService._refresher = threading.Thread(
+            target=self._refresh_loop, args=(creds,), name="calendar-token-refresh", daemon=True
+        )
+        CalendarService._refresher.start()
+
+    def _refresh_loop(self, creds):
+        while True:
+            if creds.expiry is None:
+                return
+            # google-auth keeps expiry as naive UTC
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            wait = (creds.expiry - TOKEN_REFRESH_MARGIN - now).total_seconds()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with CalendarService._lock:
+                    creds.refresh(Request())
+                self._save_token(creds)
+            except Exception as e:
+                self.logger.warning(f"Background token refresh failed: {e}")
+                time.sleep(TOKEN_REFRESH_RETRY)
+
+    def _freebusy_chunk(self, start_ts, end_ts, calendar_ids):
+        """Run one freebusy query for up to 50 calendars and return their raw busy periods"""
+        events_result = self.service.freebusy().query(
+            body={
+                "timeMin": datetime.fromtimestamp(start_ts, timezone.utc).isoformat(),
+                "timeMax": datetime.fromtimestamp(end_ts, timezone.utc).isoformat(),
+                "timeZone": "UTC",
+                "items": [{"id": calendar_id} for calendar_id in calendar_ids]
+            },
+            fields=FREEBUSY_FIELDS if calendar_ids == ("primary",) else "calendars"
+        ).execute()
+        calendars = events_result.get("calendars", {})
+        return [busy for calendar_id in calendar_ids for busy in calendars.get(calendar_id, {}).get("busy", [])]
+
+    def _query_busy(self, start_ts, end_ts, calendars=DEFAULT_CALENDARS):
+        """
+        Run freebusy for every calendar and return the merged busy intervals.
+        Calendars go 50 per query, and several queries run concurrently.
+        """
+        chunks = [calendars[i:i + FREEBUSY_MAX_ITEMS] for i in range(0, len(calendars), FREEBUSY_MAX_ITEMS)]
+        try:
+            if len(chunks) == 1:
+                busy_periods = self._freebusy_chunk(start_ts, end_ts, chunks[0])
+            else:
+                busy_periods = [
+                    busy
+                    for chunk_busy in _freebusy_executor.map(
+                        lambda chunk: self._freebusy_chunk(start_ts, end_ts, chunk), chunks
+                    )
+                    for busy in chunk_busy
+                ]
+        except Exception as e:
+            self.logger.error(f"Failed to fetch busy times: {e}")
+            raise RuntimeError("Failed to fetch calendar busy times.") from e
+        return _merge_busy(busy_periods)
+
+    def _prefetch_month(self, anchor_dt, calendars=DEFAULT_CALENDARS):
+        """
+        Return the busy intervals for the whole UTC month containing anchor_dt,
+        fetching them with a single freebusy query when not cached.
+        """
+        anchor = anchor_dt.astimezone(timezone.utc)
+        month = (calendars, anchor.year, anchor.month)
+        now = time.monotonic()
+        with CalendarService._cache_lock:
+            entry = CalendarService._month_cache.get(month)
+            if entry is not None and now - entry[0] < self.FREEBUSY_CACHE_TTL:
+                CalendarService._month_cache.move_to_end(month)
+                return entry[1]
+
+        month_start, month_end = _month_bounds(month[1:])
+        intervals = _BusyIndex(self._fetch_busy(month_start, month_end, calendars))
+
+        with CalendarService._cache_lock:
+            CalendarService._month_cache[month] = (now, intervals)
+            CalendarService._month_cache.move_to_end(month)
+            while len(CalendarService._month_cache) > self.MONTH_CACHE_SIZE:
+                CalendarService._month_cache.popitem(last=False)
+        return intervals
+
+    def _get_busy_intervals(self, start_ts, end_ts, calendars=DEFAULT_CALENDARS):
+        """
+        Return merged busy intervals overlapping [start_ts, end_ts].
+        Ranges inside one UTC month are sliced out of the prefetched month.
+        Longer ranges are widened to whole minutes and the freebusy result is
+        kept in a small TTL + LRU cache keyed by that window.
+        """
+        start_utc = datetime.fromtimestamp(start_ts, timezone.utc)
+        end_utc = datetime.fromtimestamp(end_ts - 1, timezone.utc)
+        if (start_utc.year, start_utc.month) == (end_utc.year, end_utc.month):
+            return self._prefetch_month(start_utc, calendars).overlapping(start_ts, end_ts)
+
+        key = (calendars, start_ts // 60 * 60, -(-end_ts // 60) * 60)
+        now = time.monotonic()
+        with CalendarService._cache_lock:
+            entry = CalendarService._freebusy_cache.get(key)
+            if entry is not None and now - entry[0] < self.FREEBUSY_CACHE_TTL:
+                CalendarService._freebusy_cache.move_to_end(key)
+                return entry[1]
+
+        intervals = self._fetch_busy(key[1], key[2], calendars)
+
+        with CalendarService._cache_lock:
+            CalendarService._freebusy_cache[key] = (now, intervals)
+            CalendarService._freebusy_cache.move_to_end(key)
+            while len(CalendarService._freebusy_cache) > self.FREEBUSY_CACHE_SIZE:
+                CalendarService._freebusy_cache.popitem(last=False)
+        return intervals
+
+    def _fetch_busy(self, start_ts, end_ts, calendars=DEFAULT_CALENDARS):
+        """Busy intervals for a window, shared across workers through Redis when available"""
+        calendars_digest = hashlib.sha1(",".join(calendars).encode("utf-8")).hexdigest()[:12]
+        key = f"fb:{calendars_digest}:{start_ts}:{end_ts}"
+        if _redis_up():
+            try:
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return [tuple(interval) for interval in _json_loads(cached)]
+            except Exception as e:
+                _redis_failed(self.logger, "Redis freebusy read failed", e)
+
+        intervals = self._query_busy(start_ts, end_ts, calendars)
+
+        if _redis_up():
+            try:
+                redis_client.setex(key, self.FREEBUSY_CACHE_TTL, _json_dumps(intervals))
+            except Exception as e:
+                _redis_failed(self.logger, "Redis freebusy write failed (non-blocking)", e)
+        return intervals
+
+    def invalidate(self, time_range=None):
+        """
+        Drop cached freebusy results in this process, in Redis, and in other workers.
+        - time_range: optional (start_ts, end_ts) epoch seconds; only overlapping entries are dropped.
+        """
+        self._invalidate_local(time_range)
+        self._invalidate_shared(time_range)
+
+    def _record_busy(self, time_range):
+        """
+        Fold a newly created primary-calendar event into the in-process caches,
+        so the next availability query for that window needs no freebusy call.
+        """
+        start_ts, end_ts = time_range
+        with CalendarService._cache_lock:
+            for month, (fetched_at, index) in list(CalendarService._month_cache.items()):
+                month_start, month_end = _month_bounds(month[1:])
+                if "primary" in month[0] and month_start < end_ts and start_ts < month_end:
+                    CalendarService._month_cache[month] = (fetched_at, index.with_interval(start_ts, end_ts))
+            for key, (fetched_at, intervals) in list(CalendarService._freebusy_cache.items()):
+                if "primary" in key[0] and key[1] < end_ts and start_ts < key[2]:
+                    index = _BusyIndex(intervals).with_interval(start_ts, end_ts)
+                    CalendarService._freebusy_cache[key] = (fetched_at, index.intervals())
+
+    def _invalidate_shared(self, time_range=None):
+        """Delete overlapping Redis entries and tell other workers to drop theirs"""
+        if not _redis_up():
+            return
+        try:
+            stale = []
+            for key in redis_client.scan_iter(match="fb:*", count=500):
+                _, _, key_start, key_end = key.decode().split(":")
+                if time_range is None or (int(key_start) < time_range[1] and time_range[0] < int(key_end)):
+                    stale.append(key)
+            if stale:
+                redis_client.delete(*stale)
+            payload = "*" if time_range is None else f"{time_range[0]}:{time_range[1]}"
+            redis_client.publish(FREEBUSY_CHANNEL, f"{_INSTANCE_ID}|{payload}")
+        except Exception as e:
+            _redis_failed(self.logger, "Redis freebusy invalidation failed", e)
+
+    def _invalidate_local(self, time_range=None):
+        """Drop in-process cached freebusy responses and prefetched months"""
+        with CalendarService._cache_lock:
+            if time_range is None:
+                CalendarService._freebusy_cache.clear()
+                CalendarService._month_cache.clear()
+                return
+            start_ts, end_ts = time_range
+            for key in [k for k in CalendarService._freebusy_cache if k[1] < end_ts and start_ts < k[2]]:
+                del CalendarService._freebusy_cache[key]
+            for month in list(CalendarService._month_cache):
+                month_start, month_end = _month_bounds(month[1:])
+                if month_start < end_ts and start_ts < month_end:
+                    del CalendarService._month_cache[month]
+
+    def _start_invalidation_listener(self):
+        """Subscribe once per process to calendar changes made by other workers"""
+        if not _redis_available or CalendarService._listener is not None:
+            return
+        with CalendarService._lock:
+            if CalendarService._listener is not None:
+                return
+            CalendarService._listener = threading.Thread(
+                target=self._listen_for_invalidations, name="calendar-invalidation", daemon=True
+            )
+            CalendarService._listener.start()
+
+    def _listen_for_invalidations(self):
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(FREEBUSY_CHANNEL)
+                for message in pubsub.listen():
+                    sender, data = message["data"].decode().split("|", 1)
+                    if sender == _INSTANCE_ID:
+                        # Our own change, already applied to the local caches
+                        continue
+                    if data == "*":
+                        self._invalidate_local()
+                    else:
+                        start_ts, end_ts = data.split(":")
+                        self._invalidate_local((int(start_ts), int(end_ts)))
+            except Exception as e:
+                self.logger.warning(f"Calendar invalidation listener failed: {e}")
+                time.sleep(REDIS_RETRY)
+
+    def get_free_slots(self, start_date, end_date, duration_minutes=60, calendar_ids=None):
         """
         Get available time slots between start_date and end_date with the given duration.
         - start_date, end_date: ISO 8601 date strings (e.g., '2024-06-10T00:00:00Z')
         - duration_minutes: int, duration of each slot in minutes
+        - calendar_ids: optional list of calendar IDs that must all be free (default: primary)
         Returns: List of dicts with 'start' and 'end' ISO 8601 strings.
         """
+        return list(self._iter_free_slots(start_date, end_date, duration_minutes, calendar_ids))
+
+    def has_free_slot(self, start_date, end_date, duration_minutes=60, calendar_ids=None):
+        """
+        Check whether any slot of the given duration is free between start_date and end_date.
+        Stops at the first free slot instead of building the full list.
+        """
+        return next(
+            self._iter_free_slots(start_date, end_date, duration_minutes, calendar_ids, vectorize=False), None
+        ) is not None
+
+    def _iter_free_slots(self, start_date, end_date, duration_minutes, calendar_ids=None, vectorize=True):
+        """Yield free slot dicts in order; shared core of get_free_slots and has_free_slot"""
         # Defensive: Validate input
         if not isinstance(start_date, str) or not isinstance(end_date, str):
             raise ValueError("start_date and end_date must be ISO 8601 strings.")
         if not isinstance(duration_minutes, int) or duration_minutes <= 0:
             raise ValueError("duration_minutes must be a positive integer.")
+        if calendar_ids is None:
+            calendars = DEFAULT_CALENDARS
+        elif (
+            isinstance(calendar_ids, (list, tuple)) and calendar_ids
+            and all(isinstance(calendar_id, str) and calendar_id for calendar_id in calendar_ids)
+        ):
+            calendars = tuple(sorted(set(calendar_ids)))
+        else:
+            raise ValueError("calendar_ids must be a non-empty list of calendar ID strings.")
 
         # Parse input dates
-        try:
-            start_dt = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
-            end_dt = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-        except Exception as e:
-            raise ValueError("start_date and end_date must be valid ISO 8601 datetime strings.") from e
+        start_dt = _parse_checked(start_date)
+        end_dt = _parse_checked(end_date)
+        if start_dt is None or end_dt is None:
+            raise ValueError("start_date and end_date must be valid ISO 8601 datetime strings.")
 
         if end_dt <= start_dt:
             raise ValueError("end_date must be after start_date.")
 
-        # Get busy times from primary calendar
-        try:
-            events_result = self.service.freebusy().query(
-                body={
-                    "timeMin": start_dt.isoformat(),
-                    "timeMax": end_dt.isoformat(),
-                    "timeZone": "UTC",
-                    "items": [{"id": "primary"}]
-                }
-            ).execute()
-            busy_periods = events_result.get("calendars", {}).get("primary", {}).get("busy", [])
-        except Exception as e:
-            self.logger.error(f"Failed to fetch busy times: {e}")
-            raise RuntimeError("Failed to fetch calendar busy times.") from e
+        # Get merged busy intervals across the requested calendars
+        start_ts = int(start_dt.timestamp())
+        end_ts = int(end_dt.timestamp())
+        merged = self._get_busy_intervals(start_ts, end_ts, calendars)
 
-        # Build list of free slots
-        free_slots = []
-        current = start_dt
-
-        # Sort busy periods for efficient checking
-        busy_periods_sorted = sorted(
-            (
-                {
-                    "start": datetime.fromisoformat(busy["start"].replace("Z", "+00:00")),
-                    "end": datetime.fromisoformat(busy["end"].replace("Z", "+00:00"))
-                }
-                for busy in busy_periods
-            ),
-            key=lambda b: b["start"]
-        )
+        # Free slot starts on the 15-minute grid anchored at start_date
+        duration = duration_minutes * 60
+        if vectorize and NUMPY_AVAILABLE and (end_ts - start_ts) // SLOT_STEP_SECONDS >= NUMPY_MIN_SLOTS:
+            slot_starts = _mask_slot_starts(start_ts, end_ts, duration, merged)
+        else:
+            slot_starts = _sweep_slot_starts(start_ts, end_ts, duration, merged)
 
-        while current + timedelta(minutes=duration_minutes) <= end_dt:
-            slot_start = current
-            slot_end = current + timedelta(minutes=duration_minutes)
-            is_free = True
-            for busy in busy_periods_sorted:
-                # If slot ends before busy starts, or starts after busy ends, it's fine
-                if slot_end <= busy["start"]:
-                    break  # No more overlaps possible
-                if slot_start < busy["end"] and slot_end > busy["start"]:
-                    is_free = False
-                    break
-            if is_free:
-                free_slots.append({
-                    "start": slot_start.isoformat().replace("+00:00", "Z"),
-                    "end": slot_end.isoformat().replace("+00:00", "Z")
-                })
-            current += timedelta(minutes=15)  # Move in 15-min increments for granularity
-
-        return free_slots
+        # Slot ends fall on later slot starts, so format each instant only once.
+        # UTC input gets "...Z" straight from the epoch; other offsets keep isoformat.
+        tz = start_dt.tzinfo
+        utc_input = tz is not None and not start_dt.utcoffset()
+        formatted = {}
 
-    def create_event(self, title, start_time, end_time, description=""):
+        def fmt(ts):
+            text = formatted.get(ts)
+            if text is None:
+                if utc_input:
+                    text = time.strftime(UTC_SLOT_FORMAT, time.gmtime(ts))
+                else:
+                    text = datetime.fromtimestamp(ts, tz).isoformat()
+                formatted[ts] = text
+            return text
+
+        for slot_start in slot_starts:
+            yield {"start": fmt(slot_start), "end": fmt(slot_start + duration)}
+
+    def _build_event(self, title, start_time, end_time, description=""):
         """
-        Create a calendar event.
-        - title: str, event summary/title
-        - start_time, end_time: ISO 8601 datetime strings (e.g., '2024-06-10T10:00:00Z')
-        - description: str, optional event description
-        Returns: The created event resource dict.
+        Validate event fields and build the events.insert body.
+        Returns: (event body dict, (start_ts, end_ts) epoch seconds).
         """
         # Defensive: Validate input
         if not isinstance(title, str) or not title.strip():
@@ -174,30 +743,97 @@ class CalendarService:
             raise ValueError("start_time and end_time must be ISO 8601 strings.")
 
         # Validate ISO 8601 format for start_time and end_time
-        try:
-            _ = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-            _ = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
-        except Exception as e:
-            raise ValueError("start_time and end_time must be valid ISO 8601 datetime strings.") from e
+        start_dt = _parse_checked(start_time)
+        end_dt = _parse_checked(end_time)
+        if start_dt is None or end_dt is None:
+            raise ValueError("start_time and end_time must be valid ISO 8601 datetime strings.")
 
-        if end_time <= start_time:
+        # Compare instants, not strings, so differing offsets and fractions order correctly
+        if end_dt <= start_dt:
             raise ValueError("end_time must be after start_time.")
 
-        try:
-            event = {
-                "summary": title.strip(),
-                "description": description.strip() if isinstance(description, str) else "",
-                "start": {
-                    "dateTime": start_time,
-                    "timeZone": "UTC"
-                },
-                "end": {
-                    "dateTime": end_time,
-                    "timeZone": "UTC"
-                }
+        event = {
+            "summary": title.strip(),
+            "description": description.strip() if isinstance(description, str) else "",
+            "start": {
+                "dateTime": _format_event_time(start_dt),
+                "timeZone": "UTC"
+            },
+            "end": {
+                "dateTime": _format_event_time(end_dt),
+                "timeZone": "UTC"
             }
-            created_event = self.service.events().insert(calendarId="primary", body=event).execute()
-            return created_event
-        except Exception as e:
-            self.logger.error(f"Failed to create calendar event: {e}")
-            raise RuntimeError("Failed to create calendar event.") from e
\ No newline at end of file
+        }
+        return event, (int(start_dt.timestamp()), int(end_dt.timestamp()))
+
+    def create_events(self, events_list):
+        """
+        Create several calendar events, sending up to 50 inserts per HTTP batch request.
+        - events_list: list of dicts with 'title', 'start_time', 'end_time' and optional 'description'
+        Returns: List of created event resource dicts, None where an insert failed.
+        """
+        if not isinstance(events_list, list):
+            raise ValueError("events_list must be a list of event dicts.")
+
+        # Validate everything before sending anything
+        built = [
+            self._build_event(
+                item.get("title"), item.get("start_time"), item.get("end_time"), item.get("description", "")
+            )
+            for item in events_list
+        ]
+
+        results = [None] * len(built)
+        for offset in range(0, len(built), EVENTS_BATCH_SIZE):
+            chunk = built[offset:offset + EVENTS_BATCH_SIZE]
+            if len(chunk) == 1:
+                # A lone insert is cheaper without the multipart batch envelope
+                try:
+                    results[offset] = self.service.events().insert(calendarId="primary", body=chunk[0][0], fields=EVENT_FIELDS).execute()
+                except Exception as e:
+                    self.logger.error(f"Failed to create calendar event: {e}")
+                continue
+
+            def callback(request_id, response, exception, offset=offset):
+                if exception is not None:
+                    self.logger.error(f"Failed to create calendar event: {exception}")
+                    return
+                results[offset + int(request_id)] = response
+
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index, (event, _) in enumerate(chunk):
+                batch.add(self.service.events().insert(calendarId="primary", body=event, fields=EVENT_FIELDS), request_id=str(index))
+            try:
+                batch.execute()
+            except Exception as e:
+                self.logger.error(f"Failed to execute calendar event batch: {e}")
+
+        # New events change availability: update our caches in place, then
+        # invalidate elsewhere once for the span covering the whole batch
+        created_ranges = [time_range for created, (_, time_range) in zip(results, built) if created is not None]
+        for time_range in created_ranges:
+            self._record_busy(time_range)
+        if created_ranges:
+            self._invalidate_shared((
+                min(start_ts for start_ts, _ in created_ranges),
+                max(end_ts for _, end_ts in created_ranges)
+            ))
+        return results
+
+    def create_event(self, title, start_time, end_time, description=""):
+        """
+        Create a calendar event.
+        - title: str, event summary/title
+        - start_time, end_time: ISO 8601 datetime strings (e.g., '2024-06-10T10:00:00Z')
+        - description: str, optional event description
+        Returns: The created event resource dict.
+        """
+        created_event = self.create_events([{
+            "title": title,
+            "start_time": start_time,
+            "end_time": end_time,
+            "description": description
+        }])[0]
+        if created_event is None:
+            raise RuntimeError("Failed to create calendar event.")
+        return created_event
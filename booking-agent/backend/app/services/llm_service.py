@@ -16,24 +16,29 @@ This cutting-edge module delivers a next-generation LLM service featuring:
 """
 
 import asyncio
+import atexit
 import json
 import logging
 import time
 import hashlib
+import heapq
 import os
+import queue
+import random
 import re
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
-from functools import lru_cache, wraps
+from functools import lru_cache, partial, wraps
 from typing import (
     Any, Dict, List, Optional, Union, AsyncGenerator, 
-    Callable, TypeVar, Generic, Type, Tuple, Protocol
+    Callable, TypeVar, Generic, Type, Tuple, Protocol, Deque
 )
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict, deque
+from concurrent.futures import Future, as_completed
 
 # Optional imports with graceful fallbacks
 try:
@@ -79,6 +84,12 @@ except ImportError:
     NUMPY_AVAILABLE = False
     np = None
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 try:
     from sentence_transformers import SentenceTransformer
     SENTENCE_TRANSFORMERS_AVAILABLE = True
@@ -86,6 +97,57 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     SentenceTransformer = None
 
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+    hnswlib = None
+
+# Prefer orjson for cache keys, prompts and response parsing, fall back to the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+    msgspec = None
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+# HTTP/2 on the pooled OpenAI clients needs the h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 try:
     import jwt
     JWT_AVAILABLE = True
@@ -119,6 +181,22 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+def _json_key_bytes(obj: Any) -> bytes:
+    """Canonical (sorted-key) JSON encoding for hashing"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, default=str).encode('utf-8')
+
+def _json_pretty(obj: Any) -> str:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2)
+
+def _json_loads(data: Any) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Enhanced Prometheus metrics with labels (if available)
 if PROMETHEUS_AVAILABLE:
     LLM_REQUESTS_TOTAL = prometheus.Counter(
@@ -145,6 +223,7 @@ else:
         def __init__(self, *args, **kwargs): pass
         def inc(self, *args, **kwargs): pass
         def observe(self, *args, **kwargs): pass
+        def labels(self, *args, **kwargs): return self
     
     LLM_REQUESTS_TOTAL = MockMetric()
     LLM_REQUEST_DURATION = MockMetric()
@@ -153,6 +232,19 @@ else:
     LLM_CACHE_MISSES = MockMetric()
     LLM_ERRORS = MockMetric()
 
+# Metric children bound once per label combination instead of per request
+@lru_cache(maxsize=64)
+def _success_counter(provider: str, model: str) -> Any:
+    return LLM_REQUESTS_TOTAL.labels(provider=provider, model=model, status='success', endpoint='generate')
+
+@lru_cache(maxsize=64)
+def _duration_histogram(provider: str, model: str) -> Any:
+    return LLM_REQUEST_DURATION.labels(provider=provider, model=model, endpoint='generate')
+
+@lru_cache(maxsize=64)
+def _error_counter(provider: str, error_type: str) -> Any:
+    return LLM_ERRORS.labels(provider=provider, error_type=error_type)
+
 class LLMProvider(str, Enum):
     """Supported LLM providers with latest models"""
     OPENAI = "openai"
@@ -185,7 +277,7 @@ class FinishReason(str, Enum):
     MAX_TOKENS = "max_tokens"
     ERROR = "error"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Message:
     """Enhanced chat message with modern features"""
     role: MessageRole
@@ -197,8 +289,28 @@ class Message:
     metadata: Optional[Dict[str, Any]] = None
     timestamp: Optional[datetime] = None
     embedding: Optional[List[float]] = None
+    # Chat completion dict for this message, built on first send and reused
+    # by every later request that carries the same message (shared prefixes,
+    # history); safe because messages are frozen
+    _payload: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def to_payload(self) -> Dict[str, Any]:
+        """Chat completion representation of this message"""
+        payload = self._payload
+        if payload is None:
+            payload = {"role": self.role.value, "content": self.content}
+            if self.name:
+                payload["name"] = self.name
+            if self.tool_calls:
+                payload["tool_calls"] = self.tool_calls
+            if self.tool_call_id:
+                payload["tool_call_id"] = self.tool_call_id
+            if self.function_call:
+                payload["function_call"] = self.function_call
+            object.__setattr__(self, "_payload", payload)
+        return payload
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FunctionDefinition:
     """Advanced function definition for function calling"""
     name: str
@@ -208,7 +320,7 @@ class FunctionDefinition:
     examples: Optional[List[Dict[str, Any]]] = None
     validation_schema: Optional[Dict[str, Any]] = None
 
-@dataclass
+@dataclass(slots=True)
 class LLMRequest:
     """Ultra-modern LLM request with advanced features"""
     messages: List[Message]
@@ -221,6 +333,8 @@ class LLMRequest:
     stream: bool = False
     timeout: int = 30
     retries: int = 3
+    retry_backoff_base: float = 1.0
+    retry_backoff_cap: float = 30.0
     cache: bool = True
     cache_ttl: int = 3600
     functions: Optional[List[FunctionDefinition]] = None
@@ -239,7 +353,7 @@ class LLMRequest:
     parallel_tool_calls: bool = False
     max_parallel_tool_calls: int = 5
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Enhanced LLM response with comprehensive metadata"""
     content: str
@@ -261,7 +375,7 @@ class LLMResponse:
     citations: Optional[List[Dict[str, Any]]] = None
     streaming_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class LLMConfig:
     """Advanced configuration for LLM providers"""
     provider: LLMProvider
@@ -286,21 +400,50 @@ class LLMConfig:
     proxy_config: Optional[Dict[str, str]] = None
     encryption_key: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ConversationContext:
     """Advanced conversation context with vector search"""
     session_id: str
-    messages: List[Message] = field(default_factory=list)
+    messages: Deque[Message] = field(default_factory=deque)
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     max_messages: int = 50
     # New features
-    vector_embeddings: List[List[float]] = field(default_factory=list)
     summary: Optional[str] = None
     sentiment_score: Optional[float] = None
     topics: List[str] = field(default_factory=list)
     user_preferences: Dict[str, Any] = field(default_factory=dict)
+    # Embeddings in one contiguous float32 matrix; rows past _emb_len are spare capacity
+    _emb_buf: Any = field(default=None, init=False, repr=False)
+    _emb_len: int = field(default=0, init=False, repr=False)
+    
+    def __post_init__(self):
+        # Appending past max_messages drops the oldest message in O(1)
+        self.messages = deque(self.messages, maxlen=self.max_messages)
+    
+    @property
+    def vector_embeddings(self) -> Any:
+        """Embeddings added so far, as an (n, dim) float32 view"""
+        if self._emb_buf is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._emb_buf[:self._emb_len]
+    
+    def add_embedding(self, vector: Any) -> None:
+        """Append an embedding, doubling the buffer when it is full"""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self._emb_buf is None:
+            self._emb_buf = np.empty((8, vector.shape[0]), dtype=np.float32)
+        elif self._emb_len == len(self._emb_buf):
+            grown = np.empty((2 * len(self._emb_buf), self._emb_buf.shape[1]), dtype=np.float32)
+            grown[:self._emb_len] = self._emb_buf
+            self._emb_buf = grown
+        self._emb_buf[self._emb_len] = vector
+        self._emb_len += 1
+    
+    def most_similar(self, query: Any, k: int = 1) -> Tuple[Any, Any]:
+        """Indices and cosine scores of the k stored embeddings closest to query"""
+        return cosine_topk(query, self.vector_embeddings, k)
 
 class AdvancedCircuitBreaker:
     """Enhanced circuit breaker with adaptive thresholds"""
@@ -317,59 +460,106 @@ class AdvancedCircuitBreaker:
     
     def call(self, func: Callable, *args, **kwargs):
         """Execute function with circuit breaker protection"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+    
+    async def call_async(self, func: Callable, *args, **kwargs):
+        """Await a coroutine function with circuit breaker protection"""
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+    
+    def _before_call(self) -> None:
+        # State only changes under the lock; a closed breaker needs no lock to pass
+        if self.state == "CLOSED":
+            return
         with self._lock:
             if self.state == "OPEN":
-                if self.last_failure_time and time.time() - self.last_failure_time > self.timeout:
+                if self.last_failure_time and time.monotonic() - self.last_failure_time > self.timeout:
                     self.state = "HALF_OPEN"
                     logger.info("Circuit breaker transitioning to HALF_OPEN")
                 else:
                     raise Exception("Circuit breaker is OPEN")
-        
-        try:
-            result = func(*args, **kwargs)
-            with self._lock:
-                if self.state == "HALF_OPEN":
-                    self.success_count += 1
-                    if self.success_count >= self.success_threshold:
-                        self.state = "CLOSED"
-                        self.failure_count = 0
-                        self.success_count = 0
-                        logger.info("Circuit breaker transitioning to CLOSED")
-            return result
-        except Exception as e:
-            with self._lock:
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                if self.failure_count >= self.failure_threshold:
-                    self.state = "OPEN"
-                    logger.warning(f"Circuit breaker opened after {self.failure_count} failures")
-            raise e
+    
+    def _on_success(self) -> None:
+        if self.state != "HALF_OPEN":
+            return
+        with self._lock:
+            if self.state == "HALF_OPEN":
+                self.success_count += 1
+                if self.success_count >= self.success_threshold:
+                    self.state = "CLOSED"
+                    self.failure_count = 0
+                    self.success_count = 0
+                    logger.info("Circuit breaker transitioning to CLOSED")
+    
+    def _on_failure(self) -> None:
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.monotonic()
+            if self.failure_count >= self.failure_threshold:
+                self.state = "OPEN"
+                logger.warning(f"Circuit breaker opened after {self.failure_count} failures")
 
 class RateLimiter:
-    """Rate limiter for API calls"""
+    """Token-bucket rate limiter for API calls
+    
+    Holds up to max_requests tokens, refilled evenly over time_window.
+    Async callers queue on a lock, and only the caller at the head sleeps,
+    until exactly when the next token is due.
+    """
     
     def __init__(self, max_requests: int, time_window: int = 60):
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests: List[float] = []
+        self._rate = max_requests / time_window
+        self._tokens = float(max_requests)
+        self._updated = time.monotonic()
         self._lock = threading.Lock()
+        self._waiters: Optional[asyncio.Lock] = None
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_requests, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
     
     def can_proceed(self) -> bool:
-        """Check if request can proceed"""
+        """Take a token if one is available"""
         with self._lock:
-            now = time.time()
-            # Remove old requests
-            self.requests = [req for req in self.requests if now - req < self.time_window]
-            
-            if len(self.requests) < self.max_requests:
-                self.requests.append(now)
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
                 return True
             return False
     
+    def retry_after(self) -> float:
+        """Seconds until the next token is available"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self._rate)
+    
+    async def acquire(self) -> None:
+        """Wait for a token and take it"""
+        if self._waiters is None:
+            self._waiters = asyncio.Lock()
+        async with self._waiters:
+            while not self.can_proceed():
+                await asyncio.sleep(self.retry_after())
+    
     async def wait_if_needed(self):
         """Wait if rate limit is exceeded"""
-        while not self.can_proceed():
-            await asyncio.sleep(1)
+        await self.acquire()
 
 class PromptTemplate:
     """Template system for prompt management"""
@@ -391,43 +581,63 @@ class PromptTemplate:
         return cls(template)
 
 class ConversationMemory:
-    """Memory management for conversations"""
+    """Memory management for conversations
+    
+    Sessions are spread over lock-striped shards so concurrent chats only
+    contend when they hash to the same shard. Each shard is kept in
+    least-recently-active order and evicts its oldest session in O(1).
+    """
     
-    def __init__(self, max_sessions: int = 1000):
-        self.sessions: Dict[str, ConversationContext] = {}
+    def __init__(self, max_sessions: int = 1000, shards: int = 16):
+        if shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
         self.max_sessions = max_sessions
-        self._lock = threading.Lock()
+        self._shard_capacity = max(1, -(-max_sessions // shards))
+        self._mask = shards - 1
+        self._shards: List["OrderedDict[str, ConversationContext]"] = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+    
+    def _shard(self, session_id: str) -> int:
+        return hash(session_id) & self._mask
+    
+    @property
+    def sessions(self) -> Dict[str, ConversationContext]:
+        """Snapshot of all sessions"""
+        snapshot: Dict[str, ConversationContext] = {}
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                snapshot.update(shard)
+        return snapshot
     
     def add_message(self, session_id: str, message: Message) -> None:
         """Add message to conversation"""
-        with self._lock:
-            if session_id not in self.sessions:
-                if len(self.sessions) >= self.max_sessions:
-                    # Remove oldest session
-                    oldest_session = min(self.sessions.keys(), 
-                                       key=lambda k: self.sessions[k].created_at)
-                    del self.sessions[oldest_session]
+        index = self._shard(session_id)
+        with self._locks[index]:
+            sessions = self._shards[index]
+            if session_id not in sessions:
+                if len(sessions) >= self._shard_capacity:
+                    # Remove least recently active session
+                    sessions.popitem(last=False)
                 
-                self.sessions[session_id] = ConversationContext(session_id=session_id)
+                sessions[session_id] = ConversationContext(session_id=session_id)
+            else:
+                sessions.move_to_end(session_id)
             
-            session = self.sessions[session_id]
+            session = sessions[session_id]
             session.messages.append(message)
             session.updated_at = datetime.now()
-            
-            # Keep only recent messages
-            if len(session.messages) > session.max_messages:
-                session.messages = session.messages[-session.max_messages:]
     
     def get_session(self, session_id: str) -> Optional[ConversationContext]:
         """Get conversation session"""
-        with self._lock:
-            return self.sessions.get(session_id)
+        index = self._shard(session_id)
+        with self._locks[index]:
+            return self._shards[index].get(session_id)
     
     def clear_session(self, session_id: str) -> None:
         """Clear a specific session"""
-        with self._lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
+        index = self._shard(session_id)
+        with self._locks[index]:
+            self._shards[index].pop(session_id, None)
 
 class LLMProviderBase(ABC):
     """Base class for LLM providers"""
@@ -460,28 +670,148 @@ class LLMProviderBase(ABC):
         pass
     
     async def generate_async(self, request: LLMRequest) -> LLMResponse:
-        """Async wrapper for generate method"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.generate, request)
+        """Run a single provider call in a worker thread
+        
+        Providers with a native async client override this; retries and
+        backoff stay on the event loop in LLMService.generate_async.
+        """
+        return await asyncio.to_thread(self.generate, request)
+    
+    async def generate_n_async(self, request: LLMRequest, n: int) -> List[LLMResponse]:
+        """Generate ``n`` independent completions of one request"""
+        return list(await asyncio.gather(*(self.generate_async(request) for _ in range(n))))
     
     def _apply_rate_limiting(self):
         """Apply rate limiting if configured"""
         if self._rate_limiter and not self._rate_limiter.can_proceed():
             raise Exception("Rate limit exceeded")
 
+# (API parameter, LLMRequest attribute) pairs for chat completion calls
+_PAYLOAD_ALWAYS = (
+    ("max_tokens", "max_tokens"), ("temperature", "temperature"), ("top_p", "top_p"),
+    ("frequency_penalty", "frequency_penalty"), ("presence_penalty", "presence_penalty"),
+    ("timeout", "timeout"),
+)
+_PAYLOAD_OPTIONAL = (
+    ("function_call", "function_call"), ("tools", "tools"), ("tool_choice", "tool_choice"),
+    ("response_format", "response_format"), ("seed", "seed"), ("user", "user"),
+    ("stop", "stop_sequences"), ("logit_bias", "logit_bias"),
+)
+_payload_builders: Dict[Tuple[bool, ...], Callable[..., Dict[str, Any]]] = {}
+
+def _payload_builder(request: LLMRequest) -> Callable[..., Dict[str, Any]]:
+    """Get the parameter builder for the set of options this request uses
+    
+    Each distinct set of non-None options gets a generated function that
+    returns a single dict literal containing only those options, so unset
+    parameters are never sent and the per-request path has no branches.
+    """
+    shape = (bool(request.functions),) + tuple(
+        getattr(request, attr) is not None for _, attr in _PAYLOAD_OPTIONAL
+    )
+    build = _payload_builders.get(shape)
+    if build is None:
+        items = ['"model": model', '"messages": messages']
+        items += [f'"{name}": r.{attr}' for name, attr in _PAYLOAD_ALWAYS]
+        if shape[0]:
+            items.append('"functions": functions')
+        items += [
+            f'"{name}": r.{attr}'
+            for (name, attr), present in zip(_PAYLOAD_OPTIONAL, shape[1:]) if present
+        ]
+        namespace: Dict[str, Any] = {}
+        exec(f"def build(r, model, messages, functions):\n    return {{{', '.join(items)}}}\n", namespace)
+        build = _payload_builders[shape] = namespace["build"]
+    return build
+
+# Pooled HTTP clients, one per (base_url, sync/async) and shared by every
+# provider instance, so connections survive across providers and calls.
+_http_clients: Dict[Tuple[Optional[str], bool], Any] = {}
+_http_clients_lock = threading.Lock()
+
+def _shared_http_client(base_url: Optional[str], asynchronous: bool, limits: Any) -> Any:
+    """Get or create the pooled httpx client for a base URL"""
+    key = (base_url, asynchronous)
+    client = _http_clients.get(key)
+    if client is None:
+        with _http_clients_lock:
+            client = _http_clients.get(key)
+            if client is None:
+                import openai
+                factory = openai.DefaultAsyncHttpxClient if asynchronous else openai.DefaultHttpxClient
+                client = _http_clients[key] = factory(limits=limits, http2=HTTP2_AVAILABLE)
+    return client
+
+def _close_http_clients() -> None:
+    """Close the pooled sync clients at interpreter exit"""
+    with _http_clients_lock:
+        sync_keys = [key for key in _http_clients if not key[1]]
+        clients = [_http_clients.pop(key) for key in sync_keys]
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client: {e}")
+
+atexit.register(_close_http_clients)
+
+async def aclose_http_clients() -> None:
+    """Close the pooled async clients; call from the app's shutdown hook"""
+    with _http_clients_lock:
+        async_keys = [key for key in _http_clients if key[1]]
+        clients = [_http_clients.pop(key) for key in async_keys]
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client: {e}")
+
 class OpenAIProvider(LLMProviderBase):
     """OpenAI provider implementation"""
     
+    # Pool limits for the shared HTTP clients; keep-alive avoids a TLS
+    # handshake per request when many chats are in flight.
+    MAX_CONNECTIONS = 1000
+    MAX_KEEPALIVE = 200
+    KEEPALIVE_EXPIRY = 60
+    
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        self._async_client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def _limits(self) -> Any:
+        import httpx
+        return httpx.Limits(
+            max_connections=self.MAX_CONNECTIONS,
+            max_keepalive_connections=self.MAX_KEEPALIVE,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY
+        )
+    
     def initialize(self) -> None:
         try:
             import openai
             self._client = openai.OpenAI(
                 api_key=self.config.api_key,
-                base_url=self.config.base_url
+                base_url=self.config.base_url,
+                http_client=_shared_http_client(self.config.base_url, False, self._limits())
             )
         except ImportError:
             raise RuntimeError("OpenAI package not installed")
     
+    def async_init(self) -> None:
+        """Create the native async client and its concurrency limit"""
+        try:
+            import openai
+        except ImportError:
+            raise RuntimeError("OpenAI package not installed")
+        self._async_client = openai.AsyncOpenAI(
+            api_key=self.config.api_key,
+            base_url=self.config.base_url,
+            http_client=_shared_http_client(self.config.base_url, True, self._limits())
+        )
+        self._semaphore = asyncio.Semaphore(self.config.max_concurrent_requests)
+    
     def generate(self, request: LLMRequest) -> LLMResponse:
         if not self._client:
             self.initialize()
@@ -492,85 +822,106 @@ class OpenAIProvider(LLMProviderBase):
         # Use circuit breaker
         return self._circuit_breaker.call(self._generate_internal, request)
     
+    async def generate_async(self, request: LLMRequest) -> LLMResponse:
+        """Generate on the event loop with the async client, no worker thread"""
+        if not self._async_client:
+            self.async_init()
+        
+        self._apply_rate_limiting()
+        
+        async with self._semaphore:
+            return await self._circuit_breaker.call_async(self._generate_internal_async, request)
+    
     def _generate_internal(self, request: LLMRequest) -> LLMResponse:
         """Internal generation method"""
+        t0 = time.monotonic()
         try:
-            # Prepare messages
-            messages = []
-            for msg in request.messages:
-                message_dict = {"role": msg.role.value, "content": msg.content}
-                if msg.name:
-                    message_dict["name"] = msg.name
-                if msg.tool_calls:
-                    message_dict["tool_calls"] = msg.tool_calls
-                if msg.tool_call_id:
-                    message_dict["tool_call_id"] = msg.tool_call_id
-                if msg.function_call:
-                    message_dict["function_call"] = msg.function_call
-                messages.append(message_dict)
-            
-            # Prepare function definitions
-            functions = None
-            if request.functions:
-                functions = []
-                for func in request.functions:
-                    func_dict = {
-                        "name": func.name,
-                        "description": func.description,
-                        "parameters": func.parameters
-                    }
-                    if func.required:
-                        func_dict["required"] = func.required
-                    functions.append(func_dict)
-            
-            # Make API call
-            response = self._client.chat.completions.create(
-                model=request.model or self.config.default_model,
-                messages=messages,
-                max_tokens=request.max_tokens,
-                temperature=request.temperature,
-                top_p=request.top_p,
-                frequency_penalty=request.frequency_penalty,
-                presence_penalty=request.presence_penalty,
-                timeout=request.timeout,
-                functions=functions,
-                function_call=request.function_call,
-                tools=request.tools,
-                tool_choice=request.tool_choice,
-                response_format=request.response_format,
-                seed=request.seed,
-                user=request.user,
-                stop=request.stop_sequences,
-                logit_bias=request.logit_bias
-            )
-            
-            content = response.choices[0].message.content or ""
-            
-            # Extract function calls and tool calls
-            function_calls = None
-            tool_calls = None
-            if hasattr(response.choices[0].message, 'function_call') and response.choices[0].message.function_call:
-                function_calls = [response.choices[0].message.function_call.model_dump()]
-            
-            if hasattr(response.choices[0].message, 'tool_calls') and response.choices[0].message.tool_calls:
-                tool_calls = [tc.model_dump() for tc in response.choices[0].message.tool_calls]
-            
-            return LLMResponse(
-                content=content,
-                model=response.model,
-                usage=response.usage.model_dump() if response.usage else None,
-                finish_reason=FinishReason(response.choices[0].finish_reason) if response.choices[0].finish_reason else None,
-                function_calls=function_calls,
-                tool_calls=tool_calls,
-                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
-                completion_tokens=response.usage.completion_tokens if response.usage else None,
-                total_tokens=response.usage.total_tokens if response.usage else None,
-                latency=time.time() - time.time()  # Will be set by caller
-            )
+            response = self._client.chat.completions.create(**self._build_params(request))
+            return self._to_response(response, t0)
+        except Exception as e:
+            logger.error(f"OpenAI generation failed: {e}")
+            raise
+    
+    async def _generate_internal_async(self, request: LLMRequest) -> LLMResponse:
+        """Internal async generation method"""
+        t0 = time.monotonic()
+        try:
+            response = await self._async_client.chat.completions.create(**self._build_params(request))
+            return self._to_response(response, t0)
+        except Exception as e:
+            logger.error(f"OpenAI generation failed: {e}")
+            raise
+    
+    async def generate_n_async(self, request: LLMRequest, n: int) -> List[LLMResponse]:
+        """Generate ``n`` completions in one HTTP request using the API's ``n``"""
+        if not self._async_client:
+            self.async_init()
+        
+        self._apply_rate_limiting()
+        
+        async with self._semaphore:
+            return await self._circuit_breaker.call_async(self._generate_n_internal_async, request, n)
+    
+    async def _generate_n_internal_async(self, request: LLMRequest, n: int) -> List[LLMResponse]:
+        t0 = time.monotonic()
+        try:
+            params = self._build_params(request)
+            params["n"] = n
+            response = await self._async_client.chat.completions.create(**params)
+            return [self._to_response(response, t0, choice) for choice in response.choices]
         except Exception as e:
             logger.error(f"OpenAI generation failed: {e}")
             raise
     
+    def _build_params(self, request: LLMRequest) -> Dict[str, Any]:
+        """Build chat completion parameters for a request"""
+        # Prepare messages
+        messages = [msg.to_payload() for msg in request.messages]
+        
+        # Prepare function definitions
+        functions = None
+        if request.functions:
+            functions = []
+            for func in request.functions:
+                func_dict = {
+                    "name": func.name,
+                    "description": func.description,
+                    "parameters": func.parameters
+                }
+                if func.required:
+                    func_dict["required"] = func.required
+                functions.append(func_dict)
+        
+        build = _payload_builder(request)
+        return build(request, request.model or self.config.default_model, messages, functions)
+    
+    def _to_response(self, response: Any, t0: float, choice: Any = None) -> LLMResponse:
+        """Convert a chat completion choice (the first by default) into an LLMResponse
+        
+        With several choices, usage covers the whole completion.
+        """
+        if choice is None:
+            choice = response.choices[0]
+        msg = choice.message
+        usage = response.usage
+        
+        # Extract function calls and tool calls
+        function_call = getattr(msg, 'function_call', None)
+        tool_calls = getattr(msg, 'tool_calls', None)
+        
+        return LLMResponse(
+            content=msg.content or "",
+            model=response.model,
+            usage=usage.model_dump() if usage else None,
+            finish_reason=FinishReason(choice.finish_reason) if choice.finish_reason else None,
+            function_calls=[function_call.model_dump()] if function_call else None,
+            tool_calls=[tc.model_dump() for tc in tool_calls] if tool_calls else None,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+            total_tokens=usage.total_tokens if usage else None,
+            latency=time.monotonic() - t0
+        )
+    
     def is_available(self) -> bool:
         try:
             import openai
@@ -578,6 +929,99 @@ class OpenAIProvider(LLMProviderBase):
         except ImportError:
             return False
 
+_MOCK_DATE_RE = re.compile(
+    r'(?P<tomorrow>tomorrow)'
+    r'|(?P<today>today)'
+    r'|next (?P<weekday>\w+)'  # next monday, next week
+    r'|(?P<ymd>(?P<ymd_y>\d{4})-(?P<ymd_m>\d{1,2})-(?P<ymd_d>\d{1,2}))'  # YYYY-MM-DD
+    r'|(?P<mdy>(?P<mdy_a>\d{1,2})[/-](?P<mdy_b>\d{1,2})[/-](?P<mdy_y>\d{2,4}))'  # MM/DD/YYYY or DD/MM/YYYY
+)
+_MOCK_TIME_RE = re.compile(
+    r'(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<ampm>am|pm)'  # 2:30 PM, 2 PM
+    r'|(?P<hour24>\d{1,2}):(?P<minute24>\d{2})'  # 14:30
+)
+_MOCK_DURATION_RE = re.compile(
+    r'(?P<hours>\d+)\s*(?:hour|hr)s?(?:\s*(?P<extra_minutes>\d+)\s*(?:minute|min)s?)?'
+    r'|(?P<minutes>\d+)\s*(?:minute|min)s?'
+)
+_MOCK_PURPOSE_RE = re.compile(r'(?:for|about|regarding|to\s+discuss)\s+(?P<purpose>.+)')
+_MOCK_PURPOSE_NOISE_RE = re.compile(r'\b(meeting|appointment|call)\b')
+_MOCK_WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
+}
+
+_MOCK_DATE, _MOCK_TIME, _MOCK_DURATION, _MOCK_PURPOSE = range(4)
+_MOCK_PATTERNS = (_MOCK_DATE_RE, _MOCK_TIME_RE, _MOCK_DURATION_RE, _MOCK_PURPOSE_RE)
+_MOCK_ALL_AT_START = dict.fromkeys(range(len(_MOCK_PATTERNS)), 0)
+
+def _build_mock_hyperscan_db() -> Any:
+    """Compile the entity patterns into one Hyperscan database, if available"""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    # Hyperscan reports no groups, so drop the group names
+    expressions = [re.sub(r'\(\?P<\w+>', '(', p.pattern).encode() for p in _MOCK_PATTERNS]
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(expressions)
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Hyperscan compile failed, using re for entity extraction: {e}")
+        return None
+
+_MOCK_HS_DB = _build_mock_hyperscan_db()
+
+def _on_mock_match(pattern_id: int, start: int, end: int, flags: int, starts: Dict[int, int]) -> None:
+    if start < starts.get(pattern_id, start + 1):
+        starts[pattern_id] = start
+
+def _mock_match_starts(text: str) -> Dict[int, int]:
+    """Leftmost match offset per entity pattern from a single Hyperscan pass
+    
+    Patterns that do not occur are left out, so their regex never runs.
+    Without Hyperscan every pattern is searched from the start.
+    """
+    if _MOCK_HS_DB is None:
+        return _MOCK_ALL_AT_START
+    starts: Dict[int, int] = {}
+    _MOCK_HS_DB.scan(text.encode(), match_event_handler=_on_mock_match, context=starts)
+    if not text.isascii():
+        # Byte offsets differ from str offsets; keep only which patterns matched
+        return dict.fromkeys(starts, 0)
+    return starts
+
+def _resolve_mock_date(match: "re.Match[str]", now: datetime) -> Optional[str]:
+    """Turn a _MOCK_DATE_RE match into YYYY-MM-DD, or None if it is not a date"""
+    kind = match.lastgroup
+    if kind == 'tomorrow':
+        return (now + timedelta(days=1)).strftime('%Y-%m-%d')
+    if kind == 'today':
+        return now.strftime('%Y-%m-%d')
+    if kind == 'weekday':
+        target_day = _MOCK_WEEKDAYS.get(match.group('weekday'))
+        if target_day is None:
+            return None
+        days_ahead = target_day - now.weekday()
+        if days_ahead <= 0:  # Target day already happened this week
+            days_ahead += 7
+        return (now + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+    if kind == 'ymd':
+        return f"{match.group('ymd_y')}-{match.group('ymd_m').zfill(2)}-{match.group('ymd_d').zfill(2)}"
+    # Try MM/DD/YYYY first, then DD/MM/YYYY
+    a, b, year = int(match.group('mdy_a')), int(match.group('mdy_b')), int(match.group('mdy_y'))
+    for month, day in ((a, b), (b, a)):
+        try:
+            return datetime(year, month, day).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    return None
+
 class MockProvider(LLMProviderBase):
     """Mock provider for testing when no API key is available"""
     
@@ -611,141 +1055,54 @@ class MockProvider(LLMProviderBase):
             finish_reason=FinishReason.STOP
         )
     
+    async def generate_async(self, request: LLMRequest) -> LLMResponse:
+        """Mock responses are computed inline; no worker thread needed"""
+        return self.generate(request)
+    
     def extract_entities(self, text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
         """Extract booking entities using regex patterns"""
         entities = {}
         text_lower = text.lower()
+        now = datetime.now()
+        starts = _mock_match_starts(text_lower)
         
         # Extract date
-        date_patterns = [
-            r'tomorrow',
-            r'today',
-            r'next (\w+)',  # next monday, next week
-            r'(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})',  # MM/DD/YYYY or DD/MM/YYYY
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                if pattern == r'tomorrow':
-                    date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        if _MOCK_DATE in starts:
+            for match in _MOCK_DATE_RE.finditer(text_lower, starts[_MOCK_DATE]):
+                date = _resolve_mock_date(match, now)
+                if date:
                     entities['date'] = date
                     break
-                elif pattern == r'today':
-                    date = datetime.now().strftime('%Y-%m-%d')
-                    entities['date'] = date
-                    break
-                elif pattern == r'next (\w+)':
-                    day_name = match.group(1)
-                    # Simple day mapping
-                    day_map = {
-                        'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-                        'friday': 4, 'saturday': 5, 'sunday': 6,
-                        'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
-                    }
-                    if day_name in day_map:
-                        target_day = day_map[day_name]
-                        current_day = datetime.now().weekday()
-                        days_ahead = target_day - current_day
-                        if days_ahead <= 0:  # Target day already happened this week
-                            days_ahead += 7
-                        date = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
-                        entities['date'] = date
-                        break
-                else:
-                    # Handle numeric date patterns
-                    groups = match.groups()
-                    if len(groups) == 3:
-                        if len(groups[0]) == 4:  # YYYY-MM-DD
-                            entities['date'] = f"{groups[0]}-{groups[1].zfill(2)}-{groups[2].zfill(2)}"
-                        else:  # Assume MM/DD/YYYY or DD/MM/YYYY
-                            # Try both formats
-                            try:
-                                date = datetime(int(groups[2]), int(groups[0]), int(groups[1]))
-                                entities['date'] = date.strftime('%Y-%m-%d')
-                            except:
-                                try:
-                                    date = datetime(int(groups[2]), int(groups[1]), int(groups[0]))
-                                    entities['date'] = date.strftime('%Y-%m-%d')
-                                except:
-                                    pass
-                        break
         
         # Extract time
-        time_patterns = [
-            r'(\d{1,2}):(\d{2})\s*(am|pm)',  # 2:30 PM
-            r'(\d{1,2})\s*(am|pm)',  # 2 PM
-            r'(\d{1,2}):(\d{2})',  # 14:30
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                groups = match.groups()
-                if len(groups) == 3:  # 2:30 PM format
-                    hour = int(groups[0])
-                    minute = int(groups[1])
-                    ampm = groups[2]
-                    if ampm == 'pm' and hour != 12:
-                        hour += 12
-                    elif ampm == 'am' and hour == 12:
-                        hour = 0
-                    entities['time'] = f"{hour:02d}:{minute:02d}"
-                    break
-                elif len(groups) == 2:  # 2 PM format
-                    hour = int(groups[0])
-                    ampm = groups[1]
-                    if ampm == 'pm' and hour != 12:
-                        hour += 12
-                    elif ampm == 'am' and hour == 12:
-                        hour = 0
-                    entities['time'] = f"{hour:02d}:00"
-                    break
-                elif len(groups) == 2:  # 14:30 format
-                    hour = int(groups[0])
-                    minute = int(groups[1])
-                    entities['time'] = f"{hour:02d}:{minute:02d}"
-                    break
+        match = _MOCK_TIME_RE.search(text_lower, starts[_MOCK_TIME]) if _MOCK_TIME in starts else None
+        if match:
+            if match.lastgroup == 'ampm':
+                hour = int(match.group('hour'))
+                minute = int(match.group('minute') or 0)
+                ampm = match.group('ampm')
+                if ampm == 'pm' and hour != 12:
+                    hour += 12
+                elif ampm == 'am' and hour == 12:
+                    hour = 0
+            else:  # 14:30 format
+                hour = int(match.group('hour24'))
+                minute = int(match.group('minute24'))
+            entities['time'] = f"{hour:02d}:{minute:02d}"
         
         # Extract duration
-        duration_patterns = [
-            r'(\d+)\s*(?:minute|min)s?',
-            r'(\d+)\s*(?:hour|hr)s?',
-            r'(\d+)\s*(?:hour|hr)s?\s*(\d+)\s*(?:minute|min)s?',
-        ]
-        
-        for pattern in duration_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                groups = match.groups()
-                if len(groups) == 1:  # Just minutes or just hours
-                    value = int(groups[0])
-                    if 'hour' in pattern or 'hr' in pattern:
-                        entities['duration'] = value * 60  # Convert to minutes
-                    else:
-                        entities['duration'] = value
-                    break
-                elif len(groups) == 2:  # Hours and minutes
-                    hours = int(groups[0])
-                    minutes = int(groups[1])
-                    entities['duration'] = hours * 60 + minutes
-                    break
+        match = _MOCK_DURATION_RE.search(text_lower, starts[_MOCK_DURATION]) if _MOCK_DURATION in starts else None
+        if match:
+            if match.group('hours'):
+                entities['duration'] = int(match.group('hours')) * 60 + int(match.group('extra_minutes') or 0)
+            else:
+                entities['duration'] = int(match.group('minutes'))
         
         # Extract purpose/description
-        purpose_patterns = [
-            r'for\s+(.+)',
-            r'about\s+(.+)',
-            r'regarding\s+(.+)',
-            r'to\s+discuss\s+(.+)',
-        ]
-        
-        for pattern in purpose_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                purpose = match.group(1).strip()
+        if _MOCK_PURPOSE in starts:
+            for match in _MOCK_PURPOSE_RE.finditer(text_lower, starts[_MOCK_PURPOSE]):
                 # Clean up the purpose
-                purpose = re.sub(r'\b(meeting|appointment|call)\b', '', purpose).strip()
+                purpose = _MOCK_PURPOSE_NOISE_RE.sub('', match.group('purpose').strip()).strip()
                 if purpose and len(purpose) > 3:
                     entities['purpose'] = purpose
                     break
@@ -756,76 +1113,715 @@ class MockProvider(LLMProviderBase):
         """Mock provider is always available"""
         return True
 
+class BatchingProvider(LLMProviderBase):
+    """Coalesces async requests that arrive within a short window
+    
+    Chat completions take one conversation per HTTP request, so only
+    identical requests can share a call. Deterministic ones (temperature 0)
+    share a single completion; sampled ones are served by one call for
+    ``n`` completions. Distinct requests in the window are sent concurrently.
+    """
+    
+    def __init__(self, provider: LLMProviderBase, window_ms: int = 10):
+        super().__init__(provider.config)
+        self._provider = provider
+        self.window = window_ms / 1000.0
+        self._pending: List[Tuple[LLMRequest, "asyncio.Future[LLMResponse]"]] = []
+    
+    def initialize(self) -> None:
+        self._provider.initialize()
+    
+    def is_available(self) -> bool:
+        return self._provider.is_available()
+    
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        return self._provider.generate(request)
+    
+    async def generate_async(self, request: LLMRequest) -> LLMResponse:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) == 1:
+            loop.call_later(self.window, self._flush)
+        return await future
+    
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        groups: Dict[str, List[Tuple[LLMRequest, "asyncio.Future[LLMResponse]"]]] = {}
+        for item in pending:
+            groups.setdefault(_request_key(item[0]), []).append(item)
+        for items in groups.values():
+            asyncio.ensure_future(self._dispatch(items))
+    
+    async def _dispatch(self, items: List[Tuple[LLMRequest, "asyncio.Future[LLMResponse]"]]) -> None:
+        request = items[0][0]
+        try:
+            if len(items) == 1 or request.temperature == 0:
+                response = await self._provider.generate_async(request)
+                results = [response] * len(items)
+            else:
+                results = await self._provider.generate_n_async(request, len(items))
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+_ROLE_BYTE = {role: bytes((i,)) for i, role in enumerate(MessageRole)}
+
+def _digest(data: bytes) -> str:
+    """Hash a cache key buffer with xxh3 when available"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _request_options(request: LLMRequest) -> bytes:
+    """Options that change the completion for the same messages"""
+    options = (
+        f"\x00{request.model}|{request.max_tokens}|{request.temperature!r}|{request.top_p!r}"
+        f"|{request.frequency_penalty!r}|{request.presence_penalty!r}|{request.seed}"
+        f"|{request.stop_sequences}"
+    ).encode('utf-8', 'surrogatepass')
+    extras = [
+        request.tools, request.tool_choice, request.response_format,
+        request.function_call, request.logit_bias,
+        [(f.name, f.parameters) for f in request.functions] if request.functions else None
+    ]
+    if any(x is not None for x in extras):
+        options += b"|" + _json_key_bytes(extras)
+    return options
+
+def _request_key(request: LLMRequest) -> str:
+    """Hash a request's messages and options
+    
+    Each message is written as role byte + length + UTF-8 content, so no
+    JSON is built per lookup. Sampling options are part of the key, since
+    the same messages with a different model or temperature are different
+    requests.
+    """
+    buf = bytearray()
+    for msg in request.messages:
+        content = msg.content.encode('utf-8', 'surrogatepass')
+        buf += _ROLE_BYTE[msg.role]
+        buf += len(content).to_bytes(4, 'little')
+        buf += content
+    buf += _request_options(request)
+    return _digest(bytes(buf))
+
+def _encode_response(response: LLMResponse) -> bytes:
+    if MSGSPEC_AVAILABLE:
+        return msgspec.msgpack.encode(response)
+    return _json_key_bytes(asdict(response))
+
+def _decode_response(raw: bytes) -> LLMResponse:
+    if MSGSPEC_AVAILABLE:
+        return msgspec.msgpack.decode(raw, type=LLMResponse)
+    data = _json_loads(raw)
+    if data.get("finish_reason"):
+        data["finish_reason"] = FinishReason(data["finish_reason"])
+    return LLMResponse(**data)
+
+class RedisCacheTier:
+    """Shared second cache tier so worker processes reuse each other's responses
+    
+    Lookups issued during the same event-loop tick are sent as a single
+    MGET. Writes are fire-and-forget. After a Redis error the tier is
+    skipped for RETRY_AFTER seconds.
+    """
+    
+    RETRY_AFTER = 30
+    
+    def __init__(self, client: Any, ttl: int = 3600):
+        self._client = client
+        self._ttl = ttl
+        # The payload format is part of the key so msgpack and JSON workers never mix
+        self._prefix = "llm:mp:" if MSGSPEC_AVAILABLE else "llm:js:"
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._tasks: set = set()
+        self._down_until = 0.0
+    
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+    
+    def _mark_down(self, e: Exception) -> None:
+        logger.warning(f"Redis LLM cache unavailable, retrying in {self.RETRY_AFTER}s: {e}")
+        self._down_until = time.monotonic() + self.RETRY_AFTER
+    
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def get(self, key: str) -> Optional[LLMResponse]:
+        if not self._available():
+            return None
+        future = asyncio.get_running_loop().create_future()
+        if not self._pending:
+            self._spawn(self._flush())
+        self._pending.setdefault(key, []).append(future)
+        raw = await future
+        if raw is None:
+            return None
+        try:
+            return _decode_response(raw)
+        except Exception as e:
+            logger.warning(f"Discarding undecodable cached LLM response: {e}")
+            return None
+    
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        try:
+            values = await self._client.mget([self._prefix + key for key in keys])
+        except Exception as e:
+            self._mark_down(e)
+            values = [None] * len(keys)
+        for key, value in zip(keys, values):
+            for future in pending[key]:
+                if not future.done():
+                    future.set_result(value)
+    
+    def set(self, key: str, response: LLMResponse) -> None:
+        """Store a response in the background; skipped outside an event loop"""
+        if not self._available():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._spawn(self._store(key, _encode_response(response)))
+    
+    async def _store(self, key: str, payload: bytes) -> None:
+        try:
+            await self._client.set(self._prefix + key, payload, ex=self._ttl)
+        except Exception as e:
+            self._mark_down(e)
+
+def _build_redis_tier() -> Optional[RedisCacheTier]:
+    if not REDIS_AVAILABLE:
+        return None
+    pool = redis.ConnectionPool.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379/0"), max_connections=200
+    )
+    return RedisCacheTier(redis.Redis(connection_pool=pool))
+
 class LLMCache:
-    """Advanced cache for LLM responses with TTL and size limits"""
+    """Advanced cache for LLM responses with TTL and size limits
+    
+    Entries are kept in least-recently-used order, so hits and evictions
+    are O(1) instead of scanning the whole cache once it is full. Expired
+    entries are popped from a min-heap of deadlines on each set. Reads
+    never wait on the lock.
+    """
     
-    def __init__(self, ttl: int = 3600, max_size: int = 1000):
-        self._cache: Dict[str, tuple] = {}
+    def __init__(self, ttl: int = 3600, max_size: int = 1000, l2: Optional["RedisCacheTier"] = None):
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # (deadline, key) per set; stale after an overwrite or eviction
+        self._expiry: List[Tuple[int, str]] = []
         self._ttl = ttl
+        self._ttl_ns = ttl * 1_000_000_000
         self._max_size = max_size
+        self._l2 = l2
         self._lock = threading.Lock()
     
-    def _get_key(self, request: LLMRequest) -> str:
-        """Generate cache key from request"""
-        content = json.dumps([
-            {
-                "role": msg.role.value,
-                "content": msg.content
-            } for msg in request.messages
-        ], sort_keys=True)
-        return hashlib.md5(content.encode()).hexdigest()
+    def make_key(self, request: LLMRequest) -> str:
+        """Generate cache key from request, also used to coalesce in-flight calls"""
+        return _request_key(request)
     
     def get(self, request: LLMRequest) -> Optional[LLMResponse]:
         """Get cached response"""
-        key = self._get_key(request)
-        with self._lock:
-            if key in self._cache:
-                response, timestamp = self._cache[key]
-                if time.time() - timestamp < self._ttl:
-                    LLM_CACHE_HITS.inc()
-                    return response
-                else:
+        return self._get_local(self.make_key(request))
+    
+    async def get_async(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """Get cached response, falling back to the shared Redis tier"""
+        key = self.make_key(request)
+        response = self._get_local(key)
+        if response is None and self._l2 is not None:
+            response = await self._l2.get(key)
+            if response is not None:
+                self._set_local(key, response)
+        return response
+    
+    def _get_local(self, key: str) -> Optional[LLMResponse]:
+        # Lookups need no lock: a single dict read is atomic, and only
+        # writers iterate or reorder the cache
+        entry = self._cache.get(key)
+        if entry is not None:
+            response, deadline = entry
+            if time.monotonic_ns() < deadline:
+                # Refresh LRU position only if no writer holds the lock
+                if self._lock.acquire(blocking=False):
+                    try:
+                        if self._cache.get(key) is entry:
+                            self._cache.move_to_end(key)
+                    finally:
+                        self._lock.release()
+                LLM_CACHE_HITS.inc()
+                return response
+            with self._lock:
+                if self._cache.get(key) is entry:
                     del self._cache[key]
-            LLM_CACHE_MISSES.inc()
+        LLM_CACHE_MISSES.inc()
         return None
     
     def set(self, request: LLMRequest, response: LLMResponse) -> None:
         """Cache response"""
-        key = self._get_key(request)
+        key = self.make_key(request)
+        self._set_local(key, response)
+        if self._l2 is not None:
+            self._l2.set(key, response)
+    
+    def _set_local(self, key: str, response: LLMResponse) -> None:
+        now = time.monotonic_ns()
+        deadline = now + self._ttl_ns
         with self._lock:
-            # Check if we need to evict old entries
-            if len(self._cache) >= self._max_size:
-                # Remove oldest entries
-                current_time = time.time()
-                expired_keys = [
-                    k for k, (_, timestamp) in self._cache.items()
-                    if current_time - timestamp > self._ttl
-                ]
-                for k in expired_keys:
-                    del self._cache[k]
-                
-                # If still full, remove oldest
-                if len(self._cache) >= self._max_size:
-                    oldest_key = min(self._cache.keys(), 
-                                   key=lambda k: self._cache[k][1])
-                    del self._cache[oldest_key]
+            self._cache[key] = (response, deadline)
+            self._cache.move_to_end(key)
+            heapq.heappush(self._expiry, (deadline, key))
+            
+            # Drop expired entries; a heap item only counts if the key still
+            # holds the entry it was pushed for
+            expiry = self._expiry
+            while expiry and expiry[0][0] <= now:
+                expired_at, expired_key = heapq.heappop(expiry)
+                entry = self._cache.get(expired_key)
+                if entry is not None and entry[1] == expired_at:
+                    del self._cache[expired_key]
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
             
-            self._cache[key] = (response, time.time())
+            # Overwrites and LRU evictions leave stale heap items behind
+            if len(expiry) > 2 * self._max_size:
+                self._expiry = [(d, k) for k, (_, d) in self._cache.items()]
+                heapq.heapify(self._expiry)
     
     def clear(self) -> None:
         """Clear cache"""
         with self._lock:
             self._cache.clear()
+            self._expiry.clear()
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_scores(query, matrix):
+        """Cosine similarity of query against every row of a float32 matrix"""
+        rows, dim = matrix.shape
+        scores = np.empty(rows, dtype=np.float32)
+        query_norm = 0.0
+        for j in range(dim):
+            query_norm += query[j] * query[j]
+        query_norm = np.sqrt(query_norm)
+        for i in prange(rows):
+            dot = 0.0
+            row_norm = 0.0
+            for j in range(dim):
+                value = matrix[i, j]
+                dot += value * query[j]
+                row_norm += value * value
+            denom = np.sqrt(row_norm) * query_norm
+            scores[i] = dot / denom if denom > 0.0 else 0.0
+        return scores
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _int8_cosine_scores(query, codes, norms):
+        """Cosine similarity of query against int8 rows with precomputed row norms"""
+        rows, dim = codes.shape
+        scores = np.empty(rows, dtype=np.float32)
+        query_norm = 0.0
+        for j in range(dim):
+            query_norm += query[j] * query[j]
+        query_norm = np.sqrt(query_norm)
+        for i in prange(rows):
+            dot = 0.0
+            for j in range(dim):
+                dot += codes[i, j] * query[j]
+            denom = norms[i] * query_norm
+            scores[i] = dot / denom if denom > 0.0 else 0.0
+        return scores
+elif NUMPY_AVAILABLE:
+    def _cosine_scores(query, matrix):
+        """Cosine similarity of query against every row of a float32 matrix"""
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        return np.divide(
+            matrix @ query, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms > 0
+        )
+    
+    def _int8_cosine_scores(query, codes, norms):
+        """Cosine similarity of query against int8 rows with precomputed row norms"""
+        norms = norms * np.linalg.norm(query)
+        return np.divide(
+            codes.astype(np.float32) @ query, norms,
+            out=np.zeros(len(codes), dtype=np.float32), where=norms > 0
+        )
+
+def _topk(scores: Any, k: int) -> Tuple[Any, Any]:
+    if k < len(scores):
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
+
+def cosine_topk(query: Any, matrix: Any, k: int = 1) -> Tuple[Any, Any]:
+    """Indices and scores of the k rows most similar to query, best first"""
+    return _topk(_cosine_scores(
+        np.ascontiguousarray(query, dtype=np.float32), np.ascontiguousarray(matrix, dtype=np.float32)
+    ), k)
+
+def quantize_int8(vectors: Any) -> Tuple[Any, Any]:
+    """Quantize rows to int8 with a per-row scale; returns (codes, scales)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from the on-disk cache) off the request path
+    threading.Thread(
+        target=_cosine_scores,
+        args=(np.ones(1, dtype=np.float32), np.ones((1, 1), dtype=np.float32)),
+        name="numba-warmup",
+        daemon=True
+    ).start()
+
+class _FlatIndex:
+    """Exact cosine index over int8-quantized vectors, used when hnswlib is missing
+    
+    Rows are stored as int8 codes, a quarter of the float32 size. The
+    per-row scale cancels out of cosine similarity, so only each code
+    row's norm is kept. Mirrors the small part of the hnswlib.Index API
+    the semantic cache uses.
+    """
+    
+    def __init__(self, dim: int):
+        self._codes = np.empty((SemanticLLMCache.INITIAL_CAPACITY, dim), dtype=np.int8)
+        self._norms = np.empty(SemanticLLMCache.INITIAL_CAPACITY, dtype=np.float32)
+        self._count = 0
+    
+    def get_current_count(self) -> int:
+        return self._count
+    
+    def add_items(self, vectors: Any, labels: List[int]) -> None:
+        codes, _ = quantize_int8(vectors)
+        end = self._count + len(codes)
+        if end > len(self._codes):
+            capacity = max(end, 2 * len(self._codes))
+            self._codes = np.resize(self._codes, (capacity, self._codes.shape[1]))
+            self._norms = np.resize(self._norms, capacity)
+        self._codes[self._count:end] = codes
+        self._norms[self._count:end] = np.linalg.norm(codes.astype(np.float32), axis=1)
+        self._count = end
+    
+    def knn_query(self, vectors: Any, k: int = 1) -> Tuple[Any, Any]:
+        scores = _int8_cosine_scores(
+            np.ascontiguousarray(vectors[0], dtype=np.float32),
+            self._codes[:self._count], self._norms[:self._count]
+        )
+        labels, scores = _topk(scores, k)
+        return labels[None, :], 1.0 - scores[None, :]
+
+class SemanticLLMCache:
+    """Embedding-similarity cache that also answers paraphrased prompts
+    
+    The last user message is embedded and compared against earlier ones
+    that had the same preceding messages and request options. A stored
+    response is reused when cosine similarity is at least ``threshold``.
+    Lookups use an HNSW index when hnswlib is installed.
+    """
+    
+    INITIAL_CAPACITY = 64
+    EMBEDDING_CACHE_SIZE = 1024
+    
+    def __init__(self, embedder: Any, threshold: float = 0.92, ttl: int = 3600, max_size: int = 10000):
+        self._embedder = embedder
+        self._dim = embedder.get_sentence_embedding_dimension()
+        self._threshold = threshold
+        self._ttl = ttl
+        self._max_size = max_size
+        # scope -> (index, [(response, monotonic_ns deadline), ...]), oldest scope first
+        self._scopes: "OrderedDict[str, Tuple[Any, List[Tuple[LLMResponse, float]]]]" = OrderedDict()
+        self._size = 0
+        # Recent prompt embeddings, so the set() after a miss reuses the get()'s vector
+        self._vectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _split(self, request: LLMRequest) -> Optional[Tuple[str, str]]:
+        """Split a request into (scope key, text to embed)"""
+        messages = request.messages
+        if not messages or messages[-1].role != MessageRole.USER:
+            return None
+        scope = _digest(
+            b"".join(_ROLE_BYTE[m.role] + m.content.encode('utf-8', 'surrogatepass') + b"\x00" for m in messages[:-1])
+            + _request_options(request)
+        )
+        return scope, messages[-1].content
+    
+    def _embed(self, text: str) -> Any:
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+                return vector
+        vector = np.asarray(
+            self._embedder.encode([text], normalize_embeddings=True), dtype=np.float32
+        )
+        with self._lock:
+            self._vectors[text] = vector
+            if len(self._vectors) > self.EMBEDDING_CACHE_SIZE:
+                self._vectors.popitem(last=False)
+        return vector
+    
+    def _new_index(self) -> Any:
+        if not HNSWLIB_AVAILABLE:
+            return _FlatIndex(self._dim)
+        index = hnswlib.Index(space='cosine', dim=self._dim)
+        index.init_index(max_elements=self.INITIAL_CAPACITY, ef_construction=200, M=16)
+        index.set_ef(50)
+        return index
+    
+    def get(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """Get the response of the most similar cached prompt, if close enough"""
+        split = self._split(request)
+        if split is None:
+            return None
+        scope, text = split
+        with self._lock:
+            entry = self._scopes.get(scope)
+        if entry is None:
+            return None
+        vector = self._embed(text)
+        with self._lock:
+            index, payloads = entry
+            if index.get_current_count() == 0:
+                return None
+            labels, distances = index.knn_query(vector, k=1)
+            if 1.0 - float(distances[0][0]) < self._threshold:
+                return None
+            response, deadline = payloads[int(labels[0][0])]
+            if time.monotonic_ns() >= deadline:
+                return None
+            self._scopes.move_to_end(scope)
+            return response
+    
+    def set(self, request: LLMRequest, response: LLMResponse) -> None:
+        """Index the prompt embedding and store its response"""
+        split = self._split(request)
+        if split is None:
+            return
+        scope, text = split
+        vector = self._embed(text)
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None:
+                entry = self._scopes[scope] = (self._new_index(), [])
+            index, payloads = entry
+            if HNSWLIB_AVAILABLE and len(payloads) >= index.get_max_elements():
+                index.resize_index(len(payloads) * 2)
+            payloads.append((response, time.monotonic_ns() + self._ttl * 1_000_000_000))
+            index.add_items(vector, [len(payloads) - 1])
+            self._scopes.move_to_end(scope)
+            self._size += 1
+            
+            # Evict whole scopes, least recently used first
+            while self._size > self._max_size and len(self._scopes) > 1:
+                _, (_, evicted) = self._scopes.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self) -> None:
+        """Clear cache"""
+        with self._lock:
+            self._scopes.clear()
+            self._vectors.clear()
+            self._size = 0
+
+class OnnxEmbedder:
+    """Int8 dynamically quantized ONNX export of a sentence-transformers model
+    
+    The export and quantization run once and are kept in ``export_dir``.
+    Embeddings are mean-pooled over the attention mask, as in the default
+    sentence-transformers pooling.
+    """
+    
+    QUANTIZED_FILE = "model_quantized.onnx"
+    
+    def __init__(self, model_name: str, export_dir: str):
+        quantized_dir = os.path.join(export_dir, "int8")
+        if not os.path.exists(os.path.join(quantized_dir, self.QUANTIZED_FILE)):
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            )
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._model = ORTModelForFeatureExtraction.from_pretrained(quantized_dir, file_name=self.QUANTIZED_FILE)
+        self._dim = self._model.config.hidden_size
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+    
+    def encode(self, texts: List[str], normalize_embeddings: bool = False, **kwargs) -> Any:
+        inputs = self._tokenizer(list(texts), padding=True, truncation=True, return_tensors="np")
+        hidden = self._model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        vectors = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.astype(np.float32)
+
+class BatchingEmbedder:
+    """Coalesces concurrent encode calls into one batched embedder call
+    
+    Texts in a batch are sorted by length before encoding so padding
+    stays short, then returned in the caller's order.
+    """
+    
+    def __init__(self, embedder: Any, max_batch: int = 32, window_ms: int = 5):
+        self._embedder = embedder
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._embedder.get_sentence_embedding_dimension()
+    
+    def encode(self, texts: List[str], normalize_embeddings: bool = False, **kwargs) -> Any:
+        """Queue texts and block until their batch has been encoded"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((list(texts), normalize_embeddings, future))
+        return future.result()
+    
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._worker.start()
+    
+    def _run(self) -> None:
+        """Drain the queue in batches of up to max_batch or one window of latency"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            for normalize in (True, False):
+                items = [item for item in batch if item[1] is normalize]
+                if items:
+                    self._dispatch(items, normalize)
+    
+    def _dispatch(self, items: List[tuple], normalize: bool) -> None:
+        texts = [text for item_texts, _, _ in items for text in item_texts]
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        try:
+            encoded = np.asarray(
+                self._embedder.encode([texts[i] for i in order], normalize_embeddings=normalize),
+                dtype=np.float32
+            )
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        
+        vectors = np.empty_like(encoded)
+        vectors[order] = encoded
+        offset = 0
+        for item_texts, _, future in items:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+def _load_embedder(model_name: str) -> Any:
+    """Load the semantic cache embedder, as quantized ONNX when requested"""
+    if os.getenv("LLM_SEMANTIC_CACHE_ONNX") == "1":
+        if OPTIMUM_AVAILABLE:
+            export_dir = os.path.join(
+                os.getenv("LLM_ONNX_CACHE_DIR", ".onnx_cache"), model_name.replace("/", "__")
+            )
+            return OnnxEmbedder(model_name, export_dir)
+        logger.warning("ONNX embedder requested but optimum[onnxruntime] is not installed")
+    return SentenceTransformer(model_name)
+
+def _build_semantic_cache() -> Optional[SemanticLLMCache]:
+    """Create the semantic cache when LLM_SEMANTIC_CACHE_MODEL is configured"""
+    model_name = os.getenv("LLM_SEMANTIC_CACHE_MODEL")
+    if not model_name:
+        return None
+    if not (SENTENCE_TRANSFORMERS_AVAILABLE and NUMPY_AVAILABLE):
+        logger.warning("Semantic cache requested but sentence-transformers is not installed")
+        return None
+    try:
+        embedder = BatchingEmbedder(_load_embedder(model_name))
+    except Exception as e:
+        logger.warning(f"Semantic cache disabled, failed to load {model_name}: {e}")
+        return None
+    return SemanticLLMCache(
+        embedder,
+        threshold=float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        ttl=int(os.getenv("LLM_SEMANTIC_CACHE_TTL", "3600")),
+        max_size=int(os.getenv("LLM_SEMANTIC_CACHE_MAX_SIZE", "10000"))
+    )
+
+_ENTITY_PROMPT_HEAD = """
+        Extract the following entities from the text and return as JSON:
+        Schema: {schema}
+        
+        Text: """
+_ENTITY_PROMPT_TAIL = """
+        
+        Return only valid JSON:
+        """
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.S)
+_JSON_OBJECT_BYTES_RE = re.compile(rb'\{.*\}', re.S)
+
+def _backoff_delay(request: LLMRequest, attempt: int) -> float:
+    """Exponential backoff with jitter, so concurrent retries don't land together"""
+    backoff = min(request.retry_backoff_cap, request.retry_backoff_base * 2 ** attempt)
+    return backoff / 2 + random.random() * backoff / 2
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors (4xx other than timeout/conflict/rate limit) will fail again"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 409, 429)
+    return True
 
 class LLMService:
     """Main LLM service that manages multiple providers"""
     
+    SCHEMA_CACHE_SIZE = 128
+    MEMORY_QUEUE_SIZE = 10_000
+    MEMORY_BATCH_SIZE = 64
+    
     def __init__(self):
         self._providers: Dict[LLMProvider, LLMProviderBase] = {}
-        self._cache = LLMCache()
+        self._cache = LLMCache(l2=_build_redis_tier())
+        self._semantic_cache = _build_semantic_cache()
         self._memory = ConversationMemory()
         self._default_provider = LLMProvider.OPENAI
-        self._executor = ThreadPoolExecutor(max_workers=10)
+        self._max_concurrent = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "10"))
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._prefixes: Dict[str, Message] = {}
+        self._schemas: Dict[str, str] = {}
+        self._inflight: Dict[Tuple[LLMProvider, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._inflight_async: Dict[Tuple[LLMProvider, str], "asyncio.Task[LLMResponse]"] = {}
+        self._schemas_by_id: "OrderedDict[int, Tuple[Dict[str, Any], str]]" = OrderedDict()
+        self._memory_queue: Optional["asyncio.Queue[Tuple[str, Message]]"] = None
+        self._memory_drain: Optional["asyncio.Task[None]"] = None
         self._initialize_providers()
     
     def _initialize_providers(self) -> None:
@@ -841,6 +1837,9 @@ class LLMService:
             )
             provider = OpenAIProvider(config)
             if provider.is_available():
+                batch_window_ms = int(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+                if batch_window_ms > 0:
+                    provider = BatchingProvider(provider, window_ms=batch_window_ms)
                 self._providers[LLMProvider.OPENAI] = provider
         
         # If no providers available, add mock provider
@@ -854,125 +1853,301 @@ class LLMService:
             self._providers[LLMProvider.LOCAL] = mock_provider
             self._default_provider = LLMProvider.LOCAL
         
+        self._default_provider_instance = self._providers[self._default_provider]
         logger.info(f"Initialized {len(self._providers)} LLM providers: {list(self._providers.keys())}")
     
+    def _resolve_provider(self, provider: Optional[LLMProvider]) -> Tuple[LLMProvider, LLMProviderBase]:
+        """Return the provider and its instance, with a fast path for the default"""
+        if provider is None:
+            return self._default_provider, self._default_provider_instance
+        instance = self._providers.get(provider)
+        if instance is None:
+            raise ValueError(f"Provider {provider} not available")
+        return provider, instance
+    
+    def register_prefix(self, name: str, content: str) -> str:
+        """Register a shared system prompt and return its prefix id
+        
+        Requests sent with the prefix id start with the exact same system
+        message, so provider-side prompt/prefix caching can reuse it.
+        """
+        prefix_id = f"{name}:{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}"
+        if prefix_id not in self._prefixes:
+            self._prefixes[prefix_id] = Message(role=MessageRole.SYSTEM, content=content)
+        return prefix_id
+    
+    def _build_request(self, messages: List[Message], prefix_id: Optional[str], kwargs: Dict[str, Any]) -> LLMRequest:
+        """Build a request, prepending the registered prefix if one is given"""
+        if prefix_id is not None:
+            if prefix_id not in self._prefixes:
+                raise ValueError(f"Unknown prefix {prefix_id}")
+            messages = [self._prefixes[prefix_id], *messages]
+        return LLMRequest(messages=messages, **kwargs)
+    
+    def _cache_get(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """Look up the exact-match cache, then the semantic cache"""
+        cached = self._cache.get(request)
+        if cached is None and self._semantic_cache is not None:
+            cached = self._semantic_cache.get(request)
+            if cached is not None:
+                logger.info("LLM response semantic cache hit")
+        return cached
+    
+    async def _cache_get_async(self, request: LLMRequest) -> Optional[LLMResponse]:
+        cached = await self._cache.get_async(request)
+        if cached is None and self._semantic_cache is not None:
+            cached = self._semantic_cache.get(request)
+            if cached is not None:
+                logger.info("LLM response semantic cache hit")
+        return cached
+    
+    def _cache_set(self, request: LLMRequest, response: LLMResponse) -> None:
+        self._cache.set(request, response)
+        if self._semantic_cache is not None:
+            self._semantic_cache.set(request, response)
+    
     def generate(
         self,
         messages: List[Message],
         provider: Optional[LLMProvider] = None,
+        prefix_id: Optional[str] = None,
         **kwargs
     ) -> LLMResponse:
         """Generate a response from the specified provider"""
-        provider = provider or self._default_provider
+        provider, instance = self._resolve_provider(provider)
+        request = self._build_request(messages, prefix_id, kwargs)
         
-        if provider not in self._providers:
-            raise ValueError(f"Provider {provider} not available")
-        
-        request = LLMRequest(messages=messages, **kwargs)
+        if not request.cache:
+            return self._generate_with_retries(provider, instance, request)
         
         # Check cache first
-        if request.cache:
-            cached = self._cache.get(request)
-            if cached:
-                logger.info("LLM response cache hit")
-                return cached
+        cached = self._cache_get(request)
+        if cached:
+            logger.info("LLM response cache hit")
+            return cached
         
-        # Generate response with retry logic
-        start_time = time.time()
+        # Identical requests already in flight share one provider call
+        key = (provider, self._cache.make_key(request))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            response = self._generate_with_retries(provider, instance, request)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _generate_with_retries(self, provider: LLMProvider, instance: LLMProviderBase, request: LLMRequest) -> LLMResponse:
+        """Call the provider, retrying transient failures, and cache the result"""
         for attempt in range(request.retries):
             try:
-                response = self._providers[provider].generate(request)
-                response.latency = time.time() - start_time
+                attempt_start = time.monotonic()
+                response = instance.generate(request)
+                # Providers time the call themselves; only fill in for those that don't
+                if response.latency is None:
+                    response.latency = time.monotonic() - attempt_start
                 
                 # Cache the response
                 if request.cache:
-                    self._cache.set(request, response)
-                
-                # Update metrics
-                LLM_REQUESTS_TOTAL.inc(labels={
-                    'provider': provider.value,
-                    'model': response.model,
-                    'status': 'success',
-                    'endpoint': 'generate'
-                })
-                LLM_REQUEST_DURATION.observe(
-                    response.latency,
-                    labels={'provider': provider.value, 'model': response.model, 'endpoint': 'generate'}
-                )
+                    self._cache_set(request, response)
                 
+                self._record_success(provider, response)
                 return response
             except Exception as e:
-                if attempt == request.retries - 1:
-                    LLM_ERRORS.inc(labels={'provider': provider.value, 'error_type': type(e).__name__})
+                if attempt == request.retries - 1 or not _is_retryable(e):
+                    _error_counter(provider.value, type(e).__name__).inc()
                     raise
                 logger.warning(f"LLM generation failed (attempt {attempt + 1}): {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
+                time.sleep(_backoff_delay(request, attempt))
+    
+    def _record_success(self, provider: LLMProvider, response: LLMResponse) -> None:
+        """Update request metrics for a successful generation"""
+        _success_counter(provider.value, response.model).inc()
+        _duration_histogram(provider.value, response.model).observe(response.latency)
     
     async def generate_async(
         self,
         messages: List[Message],
         provider: Optional[LLMProvider] = None,
+        prefix_id: Optional[str] = None,
         **kwargs
     ) -> LLMResponse:
         """Async version of generate"""
-        provider = provider or self._default_provider
-        
-        if provider not in self._providers:
-            raise ValueError(f"Provider {provider} not available")
+        provider, instance = self._resolve_provider(provider)
+        request = self._build_request(messages, prefix_id, kwargs)
         
-        request = LLMRequest(messages=messages, **kwargs)
+        if not request.cache:
+            return await self._generate_with_retries_async(provider, instance, request)
         
         # Check cache first
-        if request.cache:
-            cached = self._cache.get(request)
-            if cached:
-                logger.info("LLM response cache hit (async)")
-                return cached
+        cached = await self._cache_get_async(request)
+        if cached:
+            logger.info("LLM response cache hit (async)")
+            return cached
+        
+        # Identical requests already in flight await the same task. It is
+        # shielded so one caller being cancelled doesn't cancel the others.
+        key = (provider, self._cache.make_key(request))
+        task = self._inflight_async.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._generate_with_retries_async(provider, instance, request))
+            self._inflight_async[key] = task
+            task.add_done_callback(partial(self._inflight_done, key))
+        return await asyncio.shield(task)
+    
+    def _inflight_done(self, key: Tuple[LLMProvider, str], task: "asyncio.Task[LLMResponse]") -> None:
+        if self._inflight_async.get(key) is task:
+            del self._inflight_async[key]
+        if not task.cancelled():
+            # Mark the error retrieved in case every waiter was cancelled
+            task.exception()
+    
+    async def _generate_with_retries_async(self, provider: LLMProvider, instance: LLMProviderBase, request: LLMRequest) -> LLMResponse:
+        """Async version of _generate_with_retries; backoff sleeps on the event loop"""
+        for attempt in range(request.retries):
+            try:
+                attempt_start = time.monotonic()
+                response = await instance.generate_async(request)
+                # Providers time the call themselves; only fill in for those that don't
+                if response.latency is None:
+                    response.latency = time.monotonic() - attempt_start
+                
+                # Cache the response
+                if request.cache:
+                    self._cache_set(request, response)
+                
+                self._record_success(provider, response)
+                return response
+            except Exception as e:
+                if attempt == request.retries - 1 or not _is_retryable(e):
+                    _error_counter(provider.value, type(e).__name__).inc()
+                    raise
+                logger.warning(f"LLM generation failed (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(_backoff_delay(request, attempt))
+    
+    async def generate_batch(
+        self,
+        batch: List[List[Message]],
+        concurrency: Optional[int] = 8,
+        provider: Optional[LLMProvider] = None,
+        return_exceptions: bool = True,
+        **kwargs
+    ) -> List[Union[LLMResponse, Exception]]:
+        """Generate several responses concurrently
         
-        # Use async provider method if available
-        provider_instance = self._providers[provider]
-        if hasattr(provider_instance, 'generate_async'):
-            return await provider_instance.generate_async(request)
+        Every request is scheduled up front, so total latency is roughly that
+        of the slowest call instead of the sum. At most ``concurrency`` of
+        this batch's calls run at once; with ``None`` the batch shares the
+        service-wide LLM_MAX_CONCURRENT_REQUESTS limit instead.
+        """
+        if concurrency is not None:
+            semaphore = asyncio.Semaphore(concurrency)
         else:
-            # Fallback to sync version in executor
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                self._executor,
-                self.generate,
-                messages,
-                provider,
-                **kwargs
-            )
+            if self._async_semaphore is None:
+                self._async_semaphore = asyncio.Semaphore(self._max_concurrent)
+            semaphore = self._async_semaphore
+        
+        async def one(messages: List[Message]) -> LLMResponse:
+            async with semaphore:
+                return await self.generate_async(messages, provider, **kwargs)
+        
+        tasks = [asyncio.ensure_future(one(messages)) for messages in batch]
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
     
-    def extract_entities(self, text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract structured entities from text using LLM"""
-        prompt = f"""
-        Extract the following entities from the text and return as JSON:
-        Schema: {json.dumps(schema, indent=2)}
+    def generate_many(
+        self,
+        batch: List[List[Message]],
+        concurrency: int = 8,
+        provider: Optional[LLMProvider] = None,
+        return_exceptions: bool = True,
+        **kwargs
+    ) -> List[Union[LLMResponse, Exception]]:
+        """Blocking generate_batch for callers without an event loop
         
-        Text: {text}
+        Runs the batch on a fresh loop, so it can't be called from a
+        coroutine; await generate_batch there instead.
+        """
+        return asyncio.run(self.generate_batch(
+            batch, concurrency, provider=provider, return_exceptions=return_exceptions, **kwargs
+        ))
+    
+    def _entity_prompt_head(self, schema: Dict[str, Any], schema_id: Optional[str]) -> str:
+        """Render the prompt up to the text, once per schema id
         
-        Return only valid JSON:
+        Without an id the rendered head is cached per schema object, so
+        schemas are expected not to be mutated after first use.
         """
+        if schema_id is None:
+            entry = self._schemas_by_id.get(id(schema))
+            # The cache holds a reference, so a matching id is the same object
+            if entry is not None and entry[0] is schema:
+                return entry[1]
+            head = _ENTITY_PROMPT_HEAD.format(schema=_json_pretty(schema))
+            self._schemas_by_id[id(schema)] = (schema, head)
+            if len(self._schemas_by_id) > self.SCHEMA_CACHE_SIZE:
+                self._schemas_by_id.popitem(last=False)
+            return head
+        head = self._schemas.get(schema_id)
+        if head is None:
+            head = self._schemas[schema_id] = _ENTITY_PROMPT_HEAD.format(schema=_json_pretty(schema))
+        return head
+    
+    def build_entity_messages(self, text: str, schema: Dict[str, Any], schema_id: Optional[str] = None) -> List[Message]:
+        """Build the prompt used for entity extraction
+        
+        Passing a stable schema_id reuses the serialized schema, so repeated
+        extractions share an identical prompt prefix.
+        """
+        prompt = self._entity_prompt_head(schema, schema_id) + text + _ENTITY_PROMPT_TAIL
+        return [Message(role=MessageRole.USER, content=prompt)]
+    
+    def parse_entities(self, content: Union[str, bytes]) -> Dict[str, Any]:
+        """Parse the JSON object out of an entity extraction response
         
-        messages = [Message(role=MessageRole.USER, content=prompt)]
+        Raw bytes are parsed without decoding first.
+        """
+        try:
+            # Find JSON in response
+            pattern = _JSON_OBJECT_BYTES_RE if isinstance(content, bytes) else _JSON_OBJECT_RE
+            match = pattern.search(content)
+            if match:
+                return _json_loads(match.group())
+            else:
+                raise ValueError("No JSON found in response")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON from LLM response: {e}")
+            return {}
+    
+    def extract_entities(self, text: str, schema: Dict[str, Any], schema_id: Optional[str] = None) -> Dict[str, Any]:
+        """Extract structured entities from text using LLM"""
+        messages = self.build_entity_messages(text, schema, schema_id)
         
         try:
             response = self.generate(messages, temperature=0.0)
-            
-            # Parse JSON response
-            try:
-                # Find JSON in response
-                start = response.content.find('{')
-                end = response.content.rfind('}') + 1
-                if start != -1 and end != 0:
-                    json_str = response.content[start:end]
-                    return json.loads(json_str)
-                else:
-                    raise ValueError("No JSON found in response")
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from LLM response: {e}")
-                return {}
+            return self.parse_entities(response.content)
+        except Exception as e:
+            logger.error(f"Entity extraction failed: {e}")
+            return {}
+    
+    async def extract_entities_async(self, text: str, schema: Dict[str, Any], schema_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of extract_entities
+        
+        Prompt building reuses the cached schema head and parsing is one
+        precompiled regex, so both run inline; only the LLM call is awaited.
+        """
+        try:
+            messages = self.build_entity_messages(text, schema, schema_id)
+            response = await self.generate_async(messages, temperature=0.0)
+            return self.parse_entities(response.content)
         except Exception as e:
             logger.error(f"Entity extraction failed: {e}")
             return {}
@@ -985,17 +2160,54 @@ class LLMService:
         """Set the default provider"""
         if provider in self._providers:
             self._default_provider = provider
+            self._default_provider_instance = self._providers[provider]
         else:
             raise ValueError(f"Provider {provider} not available")
     
     def clear_cache(self) -> None:
         """Clear the response cache"""
         self._cache.clear()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
     
     def add_to_memory(self, session_id: str, message: Message) -> None:
         """Add message to conversation memory"""
         self._memory.add_message(session_id, message)
     
+    def add_to_memory_async(self, session_id: str, message: Message) -> None:
+        """Queue a memory write for the drain task on the running loop
+        
+        Writes land shortly after this returns; await flush_memory() before
+        reading a session back. When the queue is full the write is applied
+        inline rather than dropped.
+        """
+        queue = self._memory_queue
+        if queue is None or self._memory_drain is None or self._memory_drain.get_loop() is not asyncio.get_running_loop():
+            queue = self._memory_queue = asyncio.Queue(maxsize=self.MEMORY_QUEUE_SIZE)
+            self._memory_drain = asyncio.ensure_future(self._drain_memory(queue))
+        try:
+            queue.put_nowait((session_id, message))
+        except asyncio.QueueFull:
+            self._memory.add_message(session_id, message)
+    
+    async def flush_memory(self) -> None:
+        """Wait until every queued memory write has been applied"""
+        if self._memory_queue is not None:
+            await self._memory_queue.join()
+    
+    async def _drain_memory(self, queue: "asyncio.Queue[Tuple[str, Message]]") -> None:
+        """Apply queued memory writes, up to MEMORY_BATCH_SIZE per wakeup"""
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.MEMORY_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            for session_id, message in batch:
+                try:
+                    self._memory.add_message(session_id, message)
+                except Exception as e:
+                    logger.error(f"Failed to add message to memory for {session_id}: {e}")
+                queue.task_done()
+    
     def get_conversation_context(self, session_id: str) -> Optional[ConversationContext]:
         """Get conversation context for a session"""
         return self._memory.get_session(session_id)
@@ -1006,13 +2218,38 @@ class LLMService:
 
 # Global LLM service instance
 _llm_service: Optional[LLMService] = None
+_llm_service_lock = threading.Lock()
+
+@lru_cache(maxsize=256)
+def _system_msg(content: str) -> Message:
+    """Shared system message; Message is frozen, so instances are reusable"""
+    return Message(role=MessageRole.SYSTEM, content=content)
 
 def get_llm_service() -> LLMService:
     """Get the global LLM service instance"""
     global _llm_service
-    if _llm_service is None:
-        _llm_service = LLMService()
-    return _llm_service
+    service = _llm_service
+    if service is None:
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
+            service = _llm_service
+    return service
+
+def _reset_after_fork() -> None:
+    """Drop state inherited from the parent in a forked worker
+    
+    The parent's pooled sockets are shared with the child, so the child
+    starts fresh.
+    """
+    global _llm_service, _llm_service_lock, _http_clients_lock
+    _llm_service = None
+    _llm_service_lock = threading.Lock()
+    _http_clients_lock = threading.Lock()
+    _http_clients.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 # Convenience functions for backward compatibility
 def call_llm(
@@ -1026,10 +2263,8 @@ def call_llm(
     **kwargs
 ) -> str:
     """Synchronous LLM call with new service"""
-    messages = []
-    if system_prompt:
-        messages.append(Message(role=MessageRole.SYSTEM, content=system_prompt))
-    messages.append(Message(role=MessageRole.USER, content=prompt))
+    user_msg = Message(role=MessageRole.USER, content=prompt)
+    messages = [_system_msg(system_prompt), user_msg] if system_prompt else [user_msg]
     
     service = get_llm_service()
     response = service.generate(
@@ -1053,10 +2288,8 @@ async def async_call_llm(
     **kwargs
 ) -> str:
     """Async LLM call with new service"""
-    messages = []
-    if system_prompt:
-        messages.append(Message(role=MessageRole.SYSTEM, content=system_prompt))
-    messages.append(Message(role=MessageRole.USER, content=prompt))
+    user_msg = Message(role=MessageRole.USER, content=prompt)
+    messages = [_system_msg(system_prompt), user_msg] if system_prompt else [user_msg]
     
     service = get_llm_service()
     response = await service.generate_async(
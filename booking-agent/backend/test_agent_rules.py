@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the rule-based fast path of the booking agent
+"""
+
+import os
+import sys
+import json
+from itertools import product
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.models.schemas import ConversationState
+from app.services.agent_service import (
+    BookingAgent,
+    _FIELD_BITS,
+    _MISSING_PROMPTS,
+    _booking_mask,
+    _extract_rule_entities,
+    _rule_leftover,
+)
+from app.services.llm_service import LLMResponse
+
+
+class RecordingClient:
+    """Stands in for the batching client and records every prompt"""
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.calls = []
+
+    def generate(self, messages, **kwargs):
+        self.calls.append(messages)
+        content = json.dumps({"message": "ok", "entities": self.entities, "next_stage": None})
+        return LLMResponse(content=content, model="test")
+
+
+def _collecting_state():
+    state = ConversationState(session_id="test-session")
+    state.stage = "collecting_info"
+    return state
+
+
+def test_relative_date_goes_to_llm_and_keeps_rule_entities():
+    agent = BookingAgent()
+    agent.llm_client = RecordingClient({"date": "2026-10-17"})
+    state = _collecting_state()
+
+    result = agent.process_message(state, "Tomorrow at 2 PM for 30 minutes")
+
+    assert len(agent.llm_client.calls) == 1
+    assert state.current_booking_data == {"date": "2026-10-17", "time": "14:00", "duration": 30}
+    assert result["stage"] == "confirming"
+
+
+def test_fully_parsed_message_skips_llm():
+    agent = BookingAgent()
+    agent.llm_client = RecordingClient({})
+    state = _collecting_state()
+
+    result = agent.process_message(state, "2026-10-17 at 14:00 for 30 minutes")
+
+    assert agent.llm_client.calls == []
+    assert state.current_booking_data == {"date": "2026-10-17", "time": "14:00", "duration": 30}
+    assert result["stage"] == "confirming"
+
+
+def test_purpose_in_message_goes_to_llm():
+    agent = BookingAgent()
+    agent.llm_client = RecordingClient({"purpose": "team sync"})
+    state = _collecting_state()
+
+    agent.process_message(state, "2026-10-17 at 14:00 for 30 minutes, team sync")
+
+    assert len(agent.llm_client.calls) == 1
+    assert state.current_booking_data["purpose"] == "team sync"
+
+
+def test_extract_rule_entities():
+    assert _extract_rule_entities("Tomorrow at 2 PM for 30 minutes") == {"time": "14:00", "duration": 30}
+    assert _extract_rule_entities("2026-1-5 9:05 for 2 hours") == {"date": "2026-1-5", "time": "09:05", "duration": 120}
+    assert _extract_rule_entities("12am") == {"time": "00:00"}
+    assert _extract_rule_entities("at 25:00") == {}
+    assert _extract_rule_entities("hello") == {}
+
+
+def test_rule_leftover():
+    assert _rule_leftover("2026-10-17 at 14:00 for 30 minutes") == []
+    assert _rule_leftover("Tomorrow at 2 PM for 30 minutes") == ["tomorrow"]
+
+
+def _reference_missing_prompt(booking_data):
+    """Missing-info prompt as built field by field before the bitmask lookup"""
+    prompts = {
+        "date": "What date would you like to schedule the meeting for?",
+        "time": "What time would you prefer for the meeting?",
+        "duration": "How long should the meeting be?",
+    }
+    missing_fields = [field for field in prompts if not booking_data.get(field)]
+    if not missing_fields:
+        return "Great! I have all the information I need."
+    if len(missing_fields) == 1:
+        return prompts[missing_fields[0]]
+    field_list = ", ".join(missing_fields[:-1]) + f" and {missing_fields[-1]}"
+    return f"Could you please provide the {field_list} for the meeting?"
+
+
+def test_booking_mask_prompts_match_reference():
+    agent = BookingAgent()
+    samples = {"date": ("2026-10-17", ""), "time": ("14:00", ""), "duration": (30, 0), "purpose": ("sync", "")}
+    required = ("date", "time", "duration")
+
+    for values in product(*(present + (None,) for present in samples.values())):
+        booking_data = {field: value for field, value in zip(samples, values) if value is not None}
+
+        mask = _booking_mask(booking_data)
+        assert mask == sum(bit for field, bit in _FIELD_BITS.items() if booking_data.get(field))
+        assert agent._get_missing_info_prompt(mask) == _reference_missing_prompt(booking_data)
+        assert agent._has_complete_booking_info(mask) == all(booking_data.get(field) for field in required)
+
+    assert _booking_mask(None) == 0
+    assert len(_MISSING_PROMPTS) == 16
+
+
+@pytest.mark.parametrize("message", ["Confirmed", "booked", "perfectly", "okay, booked it", "Yes", "alright", "sounds good"])
+def test_confirmation_positive(message):
+    assert BookingAgent()._is_confirmation_positive(message)
+
+
+@pytest.mark.parametrize("message", ["no", "not right", "wrong time", "cancel it, yes", "notebook", "yesterday", "hello"])
+def test_confirmation_not_positive(message):
+    assert not BookingAgent()._is_confirmation_positive(message)
+
+
+def test_confirmed_reply_completes_booking():
+    agent = BookingAgent()
+    agent.llm_client = RecordingClient({})
+    state = ConversationState(session_id="test-session")
+    state.stage = "confirming"
+    state.current_booking_data = {"date": "2026-10-17", "time": "14:00", "duration": 30}
+
+    result = agent.process_message(state, "Confirmed")
+
+    assert result["stage"] == "completed"
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for BatchingLLMClient, driven from worker threads against a loop
+running in the background
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.agent_service import BatchingLLMClient
+from app.services.llm_service import LLMResponse, Message, MessageRole
+
+
+class FakeService:
+    """generate_batch answers every prompt, or hangs when told to"""
+
+    def __init__(self, hang=False):
+        self.hang = hang
+        self.batches = []
+
+    async def generate_batch(self, batch, concurrency=8, return_exceptions=True, **kwargs):
+        self.batches.append(len(batch))
+        if self.hang:
+            await asyncio.Event().wait()
+        return [LLMResponse(content=messages[0].content, model="test") for messages in batch]
+
+
+async def _cancel_tasks():
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    asyncio.run_coroutine_threadsafe(_cancel_tasks(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def _started_client(loop, service):
+    client = BatchingLLMClient(service, window_ms=20)
+
+    async def start():
+        client.start()
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    return client
+
+
+def _messages(text):
+    return [Message(role=MessageRole.USER, content=text)]
+
+
+def test_concurrent_generates_share_a_batch(loop):
+    service = FakeService()
+    client = _started_client(loop, service)
+    results = [None] * 4
+
+    def turn(n):
+        results[n] = client.generate(_messages(f"prompt {n}")).content
+
+    threads = [threading.Thread(target=turn, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [f"prompt {n}" for n in range(4)]
+    assert sum(service.batches) == 4
+    assert len(service.batches) < 4
+
+
+def test_stalled_batch_times_out_and_cancels(loop):
+    client = _started_client(loop, FakeService(hang=True))
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.generate(_messages("prompt"), timeout=0.1, retries=2)
+
+    assert time.monotonic() - started < 2
+    # The waiting coroutine was cancelled rather than left on the loop
+    pending = asyncio.run_coroutine_threadsafe(_pending_waits(), loop).result()
+    assert pending == []
+
+
+async def _pending_waits():
+    await asyncio.sleep(0.05)
+    current = asyncio.current_task()
+    return [
+        task for task in asyncio.all_tasks()
+        if task is not current and task.get_coro().__qualname__ == "BatchingLLMClient.generate_async"
+    ]
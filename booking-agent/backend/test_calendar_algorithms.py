@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the busy-interval and slot-search helpers of the calendar service,
+checked against brute-force oracles on random input
+"""
+
+import os
+import sys
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.calendar_service import (
+    NUMPY_AVAILABLE,
+    SLOT_STEP_SECONDS,
+    _BusyIndex,
+    _mask_slot_starts,
+    _merge_busy,
+    _sweep_slot_starts,
+)
+
+BASE_TS = 1_790_000_100  # deliberately not aligned to the slot grid
+MINUTE = 60
+
+
+def _random_intervals(rng, count, span_minutes=24 * 60):
+    intervals = []
+    for _ in range(count):
+        start = BASE_TS + rng.randrange(-120, span_minutes + 120) * MINUTE
+        intervals.append((start, start + rng.randrange(1, 240) * MINUTE))
+    return intervals
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _oracle_merge(intervals):
+    """Union of half-open intervals, minute by minute, with touching ones joined"""
+    minutes = sorted({m for start, end in intervals for m in range(start, end, MINUTE)})
+    merged = []
+    for minute in minutes:
+        if merged and merged[-1][1] == minute:
+            merged[-1] = (merged[-1][0], minute + MINUTE)
+        else:
+            merged.append((minute, minute + MINUTE))
+    return merged
+
+
+def _oracle_slot_starts(start_ts, end_ts, duration, intervals):
+    return [
+        slot
+        for slot in range(start_ts, end_ts - duration + 1, SLOT_STEP_SECONDS)
+        if not any(busy_start < slot + duration and slot < busy_end for busy_start, busy_end in intervals)
+    ]
+
+
+def _oracle_overlapping(intervals, start_ts, end_ts):
+    return [(s, e) for s, e in intervals if s < end_ts and start_ts < e]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_merge_busy_matches_oracle(seed):
+    rng = random.Random(seed)
+    intervals = _random_intervals(rng, rng.randrange(0, 20))
+    busy = [{"start": _iso(s), "end": _iso(e)} for s, e in intervals]
+
+    assert _merge_busy(busy) == _oracle_merge(intervals)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_slot_searches_match_oracle(seed):
+    rng = random.Random(seed)
+    intervals = _random_intervals(rng, rng.randrange(0, 12))
+    merged = _oracle_merge(intervals)
+    start_ts = BASE_TS + rng.randrange(0, 60) * MINUTE
+    end_ts = start_ts + rng.randrange(0, 24 * 60) * MINUTE
+    duration = rng.choice((15, 30, 45, 60, 90, 120)) * MINUTE
+
+    expected = _oracle_slot_starts(start_ts, end_ts, duration, intervals)
+
+    assert list(_sweep_slot_starts(start_ts, end_ts, duration, merged)) == expected
+    if NUMPY_AVAILABLE:
+        assert _mask_slot_starts(start_ts, end_ts, duration, merged) == expected
+
+
+def test_slot_may_end_where_busy_interval_starts():
+    start_ts = BASE_TS
+    merged = [(start_ts + 30 * MINUTE, start_ts + 60 * MINUTE)]
+
+    slots = list(_sweep_slot_starts(start_ts, start_ts + 90 * MINUTE, 30 * MINUTE, merged))
+
+    assert slots == [start_ts, start_ts + 60 * MINUTE]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_busy_index_matches_oracle(seed):
+    rng = random.Random(seed)
+    intervals = _random_intervals(rng, rng.randrange(0, 12))
+    index = _BusyIndex(_oracle_merge(intervals))
+
+    for _ in range(10):
+        start = BASE_TS + rng.randrange(-120, 26 * 60) * MINUTE
+        end = start + rng.randrange(1, 240) * MINUTE
+        assert index.overlapping(start, end) == _oracle_overlapping(index.intervals(), start, end)
+
+        before = index.intervals()
+        updated = index.with_interval(start, end)
+        intervals.append((start, end))
+        assert updated.intervals() == _oracle_merge(intervals)
+        # Cached indexes are shared, so the original must stay untouched
+        assert index.intervals() == before
+        index = updated
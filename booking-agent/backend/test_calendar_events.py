@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for CalendarService event creation and input parsing, with the Google
+API client and Redis replaced by in-memory fakes
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import calendar_service
+from app.services.calendar_service import CalendarService, _parse_checked
+
+
+class FakeRedis:
+    """Records the calls _invalidate_shared makes"""
+
+    def __init__(self, keys=()):
+        self.keys = list(keys)
+        self.scans = 0
+        self.deleted = []
+        self.published = []
+
+    def scan_iter(self, match=None, count=None):
+        self.scans += 1
+        return iter(self.keys)
+
+    def delete(self, *keys):
+        self.deleted.extend(keys)
+
+    def publish(self, channel, message):
+        self.published.append(message)
+
+
+class FakeRequest:
+    def __init__(self, body):
+        self.body = body
+
+    def execute(self):
+        return {"id": self.body["summary"]}
+
+
+class FakeBatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class FakeEvents:
+    def insert(self, calendarId, body, fields=None):
+        return FakeRequest(body)
+
+
+class FakeCalendarApi:
+    def events(self):
+        return FakeEvents()
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback)
+
+
+@pytest.fixture
+def service():
+    instance = CalendarService.__new__(CalendarService)
+    instance.logger = logging.getLogger(__name__)
+    instance.service = FakeCalendarApi()
+    return instance
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(calendar_service, "redis_client", fake)
+    monkeypatch.setattr(calendar_service, "_redis_available", True)
+    monkeypatch.setattr(calendar_service, "_redis_down_until", 0.0)
+    return fake
+
+
+def _event(n):
+    return {
+        "title": f"event {n}",
+        "start_time": f"2026-10-{17 + n % 3:02d}T{9 + n % 8:02d}:00:00Z",
+        "end_time": f"2026-10-{17 + n % 3:02d}T{9 + n % 8:02d}:30:00Z",
+    }
+
+
+def test_batch_invalidates_shared_cache_once(service, fake_redis):
+    events = [_event(n) for n in range(60)]
+    fake_redis.keys = [
+        b"fb:primary:1792227600:1792231200",  # 2026-10-17 morning, inside the batch
+        b"fb:primary:1792832400:1792836000",  # a week later, outside it
+    ]
+
+    created = service.create_events(events)
+
+    assert all(created)
+    assert fake_redis.scans == 1
+    assert len(fake_redis.published) == 1
+    assert fake_redis.deleted == [b"fb:primary:1792227600:1792231200"]
+    _, span = fake_redis.published[0].split("|")
+    built = [service._build_event(e["title"], e["start_time"], e["end_time"])[1] for e in events]
+    assert span == f"{min(s for s, _ in built)}:{max(e for _, e in built)}"
+
+
+def test_failed_batch_skips_invalidation(service, fake_redis):
+    service.service.new_batch_http_request = lambda callback: FakeBatch(
+        lambda request_id, response, exception: callback(request_id, None, RuntimeError("boom"))
+    )
+
+    assert service.create_events([_event(0), _event(1)]) == [None, None]
+    assert fake_redis.scans == 0
+    assert fake_redis.published == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-01-15", datetime(2025, 1, 15)),
+    ("2025-01-15T10:00", datetime(2025, 1, 15, 10)),
+    ("2025-01-15 10:00:30", datetime(2025, 1, 15, 10, 0, 30)),
+    ("2025-01-15T10:00:00.250Z", datetime(2025, 1, 15, 10, 0, 0, 250000, tzinfo=timezone.utc)),
+    ("2025-01-15T10:00+05:30", datetime(2025, 1, 15, 10, tzinfo=timezone(timedelta(hours=5, minutes=30)))),
+    ("2025-01-15T10:00-0800", datetime(2025, 1, 15, 10, tzinfo=timezone(timedelta(hours=-8)))),
+])
+def test_parse_checked_accepts(value, expected):
+    assert _parse_checked(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "tomorrow", "2025-1-15", "2025-13-01", "2025-01-15T", "2025-01-15Z", "2025-01-15T25:00"])
+def test_parse_checked_rejects(value):
+    assert _parse_checked(value) is None
+
+
+def test_date_only_event_is_valid(service):
+    event, (start_ts, end_ts) = service._build_event("all day", "2025-01-15", "2025-01-16")
+
+    assert end_ts - start_ts == 24 * 60 * 60
+    assert event["start"]["dateTime"].startswith("2025-01-15T00:00")
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent batch entry points of the LLM service, the
+provider wrapper that coalesces requests arriving together, and the
+sharing of identical in-flight requests
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_service import (
+    BatchingProvider,
+    LLMConfig,
+    LLMProvider,
+    LLMRequest,
+    LLMResponse,
+    LLMService,
+    Message,
+    MessageRole,
+)
+
+
+class GatedGenerate:
+    """Stands in for generate_async; each call waits until the test releases it"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.started = []
+        self.running = 0
+        self.peak = 0
+        self.gates = {}
+
+    async def __call__(self, messages, provider=None, **kwargs):
+        n = int(messages[0].content)
+        self.started.append(n)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.gates.setdefault(n, asyncio.Event()).wait()
+            if n in self.fail:
+                raise RuntimeError(f"request {n} failed")
+            return LLMResponse(content=f"reply {n}", model="test")
+        finally:
+            self.running -= 1
+
+    def release(self, n):
+        self.gates.setdefault(n, asyncio.Event()).set()
+
+
+def _batch(count):
+    return [[Message(role=MessageRole.USER, content=str(n))] for n in range(count)]
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    instance = LLMService()
+    monkeypatch.setattr(instance, "generate_async", GatedGenerate())
+    return instance
+
+
+def test_concurrency_cap_and_sliding_window(service):
+    fake = service.generate_async
+
+    async def run():
+        batch = asyncio.ensure_future(service.generate_batch(_batch(6), concurrency=2))
+        await _settle()
+        assert fake.started == [0, 1]
+
+        # A finished call frees its slot at once, without waiting for request 0
+        fake.release(1)
+        await _settle()
+        assert fake.started == [0, 1, 2]
+
+        for n in range(6):
+            fake.release(n)
+        return await batch
+
+    results = asyncio.run(run())
+
+    assert [r.content for r in results] == [f"reply {n}" for n in range(6)]
+    assert fake.peak == 2
+
+
+def test_default_concurrency_is_eight(service):
+    fake = service.generate_async
+
+    async def run():
+        batch = asyncio.ensure_future(service.generate_batch(_batch(12)))
+        await _settle()
+        started = list(fake.started)
+        for n in range(12):
+            fake.release(n)
+        await batch
+        return started
+
+    assert asyncio.run(run()) == list(range(8))
+
+
+@pytest.mark.parametrize("return_exceptions", [True, False])
+def test_return_exceptions(service, return_exceptions):
+    fake = service.generate_async
+    fake.fail = {1}
+
+    async def run():
+        for n in range(3):
+            fake.release(n)
+        return await service.generate_batch(_batch(3), return_exceptions=return_exceptions)
+
+    if not return_exceptions:
+        with pytest.raises(RuntimeError, match="request 1 failed"):
+            asyncio.run(run())
+        return
+    results = asyncio.run(run())
+    assert results[0].content == "reply 0"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2].content == "reply 2"
+
+
+def test_generate_many_runs_batch_without_a_loop(service, monkeypatch):
+    async def ungated(messages, provider=None, **kwargs):
+        return LLMResponse(content=f"reply {messages[0].content}", model="test")
+
+    monkeypatch.setattr(service, "generate_async", ungated)
+
+    results = service.generate_many(_batch(3), concurrency=2)
+
+    assert [r.content for r in results] == ["reply 0", "reply 1", "reply 2"]
+
+
+@pytest.mark.parametrize("limit, sizes", [(3, (4, 4)), (5, (2, 1)), (1, (3, 2, 2))])
+def test_batches_without_a_cap_share_the_service_limit(service, limit, sizes):
+    fake = service.generate_async
+    service._max_concurrent = limit
+    batches = []
+    first = 0
+    for size in sizes:
+        batches.append([[Message(role=MessageRole.USER, content=str(n))] for n in range(first, first + size)])
+        first += size
+
+    async def run():
+        pending = [asyncio.ensure_future(service.generate_batch(batch, concurrency=None)) for batch in batches]
+        await _settle()
+        running = len(fake.started)
+        for n in range(first):
+            fake.release(n)
+        results = await asyncio.gather(*pending)
+        return running, results
+
+    running, results = asyncio.run(run())
+
+    assert running == min(limit, first)
+    assert fake.peak == min(limit, first)
+    assert [[r.content for r in batch] for batch in results] == [
+        [f"reply {messages[0].content}" for messages in batch] for batch in batches
+    ]
+
+
+class RecordingProvider:
+    """Inner provider for BatchingProvider that numbers every completion"""
+
+    def __init__(self, fail_prompts=()):
+        self.config = LLMConfig(provider=LLMProvider.OPENAI)
+        self.fail_prompts = set(fail_prompts)
+        self.calls = []
+        self.served = 0
+
+    def _complete(self, request):
+        if request.messages[0].content in self.fail_prompts:
+            raise ConnectionError(request.messages[0].content)
+        self.served += 1
+        return LLMResponse(content=f"{request.messages[0].content}#{self.served}", model="test")
+
+    async def generate_async(self, request):
+        self.calls.append((request.messages[0].content, request.temperature, 1))
+        return self._complete(request)
+
+    async def generate_n_async(self, request, n):
+        self.calls.append((request.messages[0].content, request.temperature, n))
+        return [self._complete(request) for _ in range(n)]
+
+
+def _llm_request(prompt, temperature):
+    return LLMRequest(messages=[Message(role=MessageRole.USER, content=prompt)], temperature=temperature)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batching_provider_matches_reference(seed):
+    rng = random.Random(seed)
+    requests = [
+        _llm_request(rng.choice("abc"), rng.choice((0, 0.7)))
+        for _ in range(rng.randrange(1, 12))
+    ]
+    inner = RecordingProvider()
+    provider = BatchingProvider(inner, window_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(provider.generate_async(request) for request in requests))
+
+    results = asyncio.run(run())
+
+    # One inner call per distinct request; sampled duplicates ask for n completions
+    groups = {}
+    for index, request in enumerate(requests):
+        groups.setdefault((request.messages[0].content, request.temperature), []).append(index)
+    expected_calls = sorted(
+        (prompt, temperature, 1 if temperature == 0 else len(indexes))
+        for (prompt, temperature), indexes in groups.items()
+    )
+    assert sorted(inner.calls) == expected_calls
+    for (prompt, temperature), indexes in groups.items():
+        contents = [results[i].content for i in indexes]
+        assert all(content.startswith(f"{prompt}#") for content in contents)
+        if temperature == 0:
+            assert len(set(contents)) == 1
+        else:
+            assert len(set(contents)) == len(indexes)
+
+
+def test_batching_provider_windows_and_errors():
+    inner = RecordingProvider(fail_prompts={"bad"})
+    provider = BatchingProvider(inner, window_ms=5)
+
+    async def run():
+        first = await asyncio.gather(
+            provider.generate_async(_llm_request("ok", 0)),
+            provider.generate_async(_llm_request("bad", 0.7)),
+            provider.generate_async(_llm_request("bad", 0.7)),
+            return_exceptions=True,
+        )
+        # A later window is a new batch, even for the same request
+        second = await provider.generate_async(_llm_request("ok", 0))
+        return first, second
+
+    (ok, bad1, bad2), second = asyncio.run(run())
+
+    assert ok.content == "ok#1"
+    assert isinstance(bad1, ConnectionError) and isinstance(bad2, ConnectionError)
+    assert second.content == "ok#2"
+    assert sorted(inner.calls) == [("bad", 0.7, 2), ("ok", 0, 1), ("ok", 0, 1)]
+
+
+class HeldProvider:
+    """Provider whose calls block until the test releases them"""
+
+    def __init__(self, fail_prompts=()):
+        self.fail_prompts = set(fail_prompts)
+        self.calls = []
+        self.release = threading.Event()
+        self.async_release = None
+
+    def _complete(self, request):
+        prompt = request.messages[0].content
+        if prompt in self.fail_prompts:
+            raise ValueError(f"{prompt} rejected")
+        return LLMResponse(content=f"{prompt}#{len(self.calls)}", model="test", latency=0.0)
+
+    def generate(self, request):
+        self.calls.append(request.messages[0].content)
+        assert self.release.wait(5)
+        return self._complete(request)
+
+    async def generate_async(self, request):
+        self.calls.append(request.messages[0].content)
+        await self.async_release.wait()
+        return self._complete(request)
+
+
+@pytest.fixture
+def held(monkeypatch):
+    service = LLMService()
+    provider = HeldProvider(fail_prompts={"bad"})
+    monkeypatch.setattr(service, "_default_provider_instance", provider)
+    # Local cache only, so no Redis round trip sits between the callers
+    monkeypatch.setattr(service._cache, "_l2", None)
+    return service, provider
+
+
+def _prompt_messages(prompt):
+    return [Message(role=MessageRole.USER, content=prompt)]
+
+
+def _check_shared(prompts, results, calls):
+    """One provider call per distinct prompt, and every caller gets its reply"""
+    assert sorted(calls) == sorted(set(prompts))
+    by_prompt = {}
+    for prompt, result in zip(prompts, results):
+        if prompt == "bad":
+            assert isinstance(result, ValueError)
+        else:
+            assert result.content.startswith(f"{prompt}#")
+        assert by_prompt.setdefault(prompt, result) is result
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_identical_sync_requests_share_one_call(held, seed):
+    service, provider = held
+    rng = random.Random(seed)
+    prompts = [rng.choice(("a", "b", "c", "bad")) for _ in range(12)]
+    results = [None] * len(prompts)
+
+    def caller(i):
+        try:
+            results[i] = service.generate(_prompt_messages(prompts[i]), retries=1)
+        except ValueError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while len(provider.calls) < len(set(prompts)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Let the other callers reach the shared future before the leaders finish
+    time.sleep(0.1)
+    provider.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    _check_shared(prompts, results, provider.calls)
+    assert service._inflight == {}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_identical_async_requests_share_one_call(held, seed):
+    service, provider = held
+    rng = random.Random(seed)
+    prompts = [rng.choice(("a", "b", "c", "bad")) for _ in range(12)]
+
+    async def run():
+        provider.async_release = asyncio.Event()
+        callers = asyncio.gather(
+            *(service.generate_async(_prompt_messages(prompt), retries=1) for prompt in prompts),
+            return_exceptions=True,
+        )
+        await _settle()
+        provider.async_release.set()
+        return await callers
+
+    results = asyncio.run(run())
+
+    _check_shared(prompts, results, provider.calls)
+    assert service._inflight_async == {}
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call(held):
+    service, provider = held
+
+    async def run():
+        provider.async_release = asyncio.Event()
+        first = asyncio.ensure_future(service.generate_async(_prompt_messages("a")))
+        second = asyncio.ensure_future(service.generate_async(_prompt_messages("a")))
+        await _settle()
+        first.cancel()
+        await _settle()
+        provider.async_release.set()
+        return first, await second
+
+    first, second = asyncio.run(run())
+
+    assert first.cancelled()
+    assert second.content == "a#1"
+    assert provider.calls == ["a"]
+
+
+def test_uncached_requests_are_not_shared(held):
+    service, provider = held
+
+    async def run():
+        provider.async_release = asyncio.Event()
+        provider.async_release.set()
+        return await asyncio.gather(
+            *(service.generate_async(_prompt_messages("a"), cache=False) for _ in range(3))
+        )
+
+    results = asyncio.run(run())
+
+    assert provider.calls == ["a", "a", "a"]
+    assert len({result.content for result in results}) == 3
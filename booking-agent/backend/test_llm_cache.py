@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Tests for the LRU + expiry-heap LLM response cache, checked against a
+straightforward reference model on random operations
+"""
+
+import os
+import sys
+import random
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import llm_service
+from app.services.llm_service import (
+    FinishReason,
+    LLMCache,
+    LLMRequest,
+    LLMResponse,
+    Message,
+    MessageRole,
+    RedisCacheTier,
+    SemanticLLMCache,
+)
+
+SECOND = 1_000_000_000
+# Cosine error allowed for int8-quantized index rows
+MARGIN = 0.02
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000 * SECOND
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_service.time, "monotonic_ns", fake)
+    return fake
+
+
+def _request(n):
+    return LLMRequest(messages=[Message(role=MessageRole.USER, content=f"prompt {n}")])
+
+
+def _response(n):
+    return LLMResponse(content=f"reply {n}", model="test")
+
+
+class ReferenceCache:
+    """Same contract as LLMCache, with linear scans instead of a heap"""
+
+    def __init__(self, ttl, max_size):
+        self.ttl_ns = ttl * SECOND
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if now < entry[1]:
+            self.entries.move_to_end(key)
+            return entry[0]
+        del self.entries[key]
+        return None
+
+    def set(self, key, value, now):
+        self.entries[key] = (value, now + self.ttl_ns)
+        self.entries.move_to_end(key)
+        for expired in [k for k, (_, deadline) in self.entries.items() if deadline <= now]:
+            del self.entries[expired]
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+def test_hit_miss_and_expiry(clock):
+    cache = LLMCache(ttl=10, max_size=4)
+    cache.set(_request(1), _response(1))
+
+    assert cache.get(_request(1)).content == "reply 1"
+    assert cache.get(_request(2)) is None
+
+    clock.now += 10 * SECOND
+    assert cache.get(_request(1)) is None
+
+
+def test_hit_refreshes_lru_position(clock):
+    cache = LLMCache(ttl=60, max_size=2)
+    cache.set(_request(1), _response(1))
+    cache.set(_request(2), _response(2))
+
+    cache.get(_request(1))
+    cache.set(_request(3), _response(3))
+
+    assert cache.get(_request(1)) is not None
+    assert cache.get(_request(2)) is None
+
+
+def test_overwrite_keeps_new_deadline(clock):
+    cache = LLMCache(ttl=10, max_size=4)
+    cache.set(_request(1), _response(1))
+    clock.now += 8 * SECOND
+    cache.set(_request(1), _response(11))
+
+    # The first deadline has passed, but its heap item is stale
+    clock.now += 5 * SECOND
+    cache.set(_request(2), _response(2))
+
+    assert cache.get(_request(1)).content == "reply 11"
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_reference_model(clock, seed):
+    rng = random.Random(seed)
+    ttl, max_size = rng.randrange(1, 20), rng.randrange(1, 8)
+    cache = LLMCache(ttl=ttl, max_size=max_size)
+    reference = ReferenceCache(ttl, max_size)
+    keys = {n: cache.make_key(_request(n)) for n in range(12)}
+
+    for step in range(300):
+        clock.now += rng.randrange(0, 3) * SECOND
+        n = rng.randrange(12)
+        if rng.random() < 0.5:
+            cache.set(_request(n), _response(step))
+            reference.set(keys[n], f"reply {step}", clock.now)
+        else:
+            hit = cache.get(_request(n))
+            assert (hit.content if hit else None) == reference.get(keys[n], clock.now)
+
+        assert list(cache._cache) == list(reference.entries)
+        # Stale heap items are compacted away before they outgrow the cache
+        assert len(cache._expiry) <= 2 * max_size
+
+
+class FakeEmbedder:
+    """Maps each text to a fixed unit vector: a base direction plus a little noise"""
+
+    DIM = 32
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.bases = self.rng.standard_normal((6, self.DIM))
+        self.vectors = {}
+
+    def get_sentence_embedding_dimension(self):
+        return self.DIM
+
+    def vector(self, text):
+        if text not in self.vectors:
+            base, noise = text.split("/")
+            vector = self.bases[int(base)] + float(noise) * self.rng.standard_normal(self.DIM)
+            self.vectors[text] = vector / np.linalg.norm(vector)
+        return self.vectors[text]
+
+    def encode(self, texts, normalize_embeddings=True):
+        return np.stack([self.vector(text) for text in texts])
+
+
+def _chat(text, history=(), temperature=0.7):
+    messages = [Message(role=MessageRole.ASSISTANT, content=h) for h in history]
+    messages.append(Message(role=MessageRole.USER, content=text))
+    return LLMRequest(messages=messages, temperature=temperature)
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+@pytest.mark.parametrize("seed", range(20))
+def test_flat_index_matches_exact_cosine(seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((int(rng.integers(1, 200)), 24)).astype(np.float32)
+    index = llm_service._FlatIndex(24)
+    for start in range(0, len(vectors), 50):
+        chunk = vectors[start:start + 50]
+        index.add_items(chunk, list(range(start, start + len(chunk))))
+
+    for query in rng.standard_normal((10, 24)).astype(np.float32):
+        exact = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        labels, distances = index.knn_query(query[None, :], k=1)
+        # int8 codes cost a little precision, never more than a near-tie
+        assert exact[labels[0][0]] >= exact.max() - MARGIN
+        assert abs((1.0 - distances[0][0]) - exact[labels[0][0]]) < MARGIN
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+@pytest.mark.parametrize("seed", range(20))
+def test_semantic_cache_matches_reference(clock, seed):
+    rng = random.Random(seed)
+    embedder = FakeEmbedder(seed)
+    threshold = 0.9
+    cache = SemanticLLMCache(embedder, threshold=threshold, ttl=60, max_size=1000)
+    stored = {}  # scope -> [(vector, response)]
+
+    for step in range(80):
+        text = f"{rng.randrange(6)}/{rng.choice((0.0, 0.05, 0.1, 0.6))}"
+        history = rng.choice(((), ("earlier turn",)))
+        request = _chat(text, history)
+        query = embedder.vector(text)
+
+        scores = sorted(((float(vector @ query), response) for vector, response in stored.get(history, [])), key=lambda item: item[0])
+        hit = cache.get(request)
+        # int8 codes blur scores slightly, so near-threshold and near-tie cases are skipped
+        best = scores[-1][0] if scores else None
+        runner_up = scores[-2][0] if len(scores) > 1 else -1.0
+        if best is None or best < threshold - MARGIN:
+            assert hit is None
+        elif best >= threshold + MARGIN and best - runner_up > MARGIN:
+            assert hit is scores[-1][1]
+
+        if hit is None:
+            response = _response(step)
+            cache.set(request, response)
+            stored.setdefault(history, []).append((query, response))
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+def test_semantic_cache_scopes_and_expiry(clock):
+    cache = SemanticLLMCache(FakeEmbedder(), threshold=0.9, ttl=10)
+    cache.set(_chat("0/0.0"), _response(1))
+
+    assert cache.get(_chat("0/0.05")).content == "reply 1"
+    # Different preceding messages or options are a different conversation
+    assert cache.get(_chat("0/0.0", history=("earlier turn",))) is None
+    assert cache.get(_chat("0/0.0", temperature=0.0)) is None
+    assert cache.get(_chat("1/0.0")) is None
+
+    clock.now += 10 * SECOND
+    assert cache.get(_chat("0/0.0")) is None
+
+
+class FakeAsyncRedis:
+    """Shared store for RedisCacheTier, recording every MGET"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.mgets = []
+        self.fail = False
+
+    async def mget(self, keys):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.mgets.append(list(keys))
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+        self.ttls[key] = ex
+
+
+async def _settle_writes(*caches):
+    await asyncio.sleep(0)
+    for cache in caches:
+        await asyncio.gather(*list(cache._l2._tasks))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_two_workers_share_the_redis_tier(seed):
+    rng = random.Random(seed)
+    redis = FakeAsyncRedis()
+    workers = [LLMCache(ttl=60, max_size=100, l2=RedisCacheTier(redis, ttl=60)) for _ in range(2)]
+    shared, local = {}, [{}, {}]
+
+    async def run():
+        for step in range(100):
+            worker = rng.randrange(2)
+            n = rng.randrange(8)
+            if rng.random() < 0.3:
+                workers[worker].set(_request(n), _response(step))
+                await _settle_writes(*workers)
+                local[worker][n] = shared[n] = f"reply {step}"
+            else:
+                hit = await workers[worker].get_async(_request(n))
+                expected = local[worker].get(n, shared.get(n))
+                assert (hit.content if hit else None) == expected
+                if expected is not None:
+                    # Redis hits are promoted into the local tier
+                    local[worker][n] = expected
+
+    asyncio.run(run())
+    assert all(ttl == 60 for ttl in redis.ttls.values())
+
+
+def test_lookups_in_one_tick_share_an_mget():
+    redis = FakeAsyncRedis()
+    tier = RedisCacheTier(redis)
+
+    async def run():
+        tier.set("a", _response(1))
+        await asyncio.gather(*list(tier._tasks))
+        return await asyncio.gather(tier.get("a"), tier.get("b"), tier.get("a"))
+
+    a1, b, a2 = asyncio.run(run())
+
+    assert a1.content == a2.content == "reply 1"
+    assert b is None
+    assert len(redis.mgets) == 1
+    assert sorted(redis.mgets[0]) == sorted(tier._prefix + key for key in ("a", "b"))
+
+
+def test_tier_backs_off_after_an_error():
+    redis = FakeAsyncRedis()
+    tier = RedisCacheTier(redis)
+
+    async def run():
+        redis.fail = True
+        assert await tier.get("a") is None
+        redis.fail = False
+        # Skipped entirely during the back-off window
+        assert await tier.get("a") is None
+        tier.set("a", _response(1))
+        skipped = (list(redis.mgets), dict(redis.data))
+        tier._down_until = 0.0
+        tier.set("a", _response(1))
+        await asyncio.gather(*list(tier._tasks))
+        return skipped, await tier.get("a")
+
+    (mgets, data), hit = asyncio.run(run())
+
+    assert mgets == [] and data == {}
+    assert hit.content == "reply 1"
+
+
+@pytest.mark.parametrize("msgpack", [True, False])
+def test_encoded_response_round_trips(monkeypatch, msgpack):
+    if msgpack and not llm_service.MSGSPEC_AVAILABLE:
+        pytest.skip("msgspec not installed")
+    monkeypatch.setattr(llm_service, "MSGSPEC_AVAILABLE", msgpack)
+    response = LLMResponse(
+        content="hi", model="test", usage={"total_tokens": 3}, finish_reason=FinishReason.STOP, latency=0.25
+    )
+
+    assert llm_service._decode_response(llm_service._encode_response(response)) == response
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for conversation memory: the sharded session store, checked against
+a reference model, and the queued async write path
+"""
+
+import os
+import sys
+import random
+import asyncio
+import threading
+from collections import OrderedDict, deque
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_service import ConversationMemory, LLMService, Message, MessageRole
+
+
+class ReferenceMemory:
+    """Per-shard LRU of sessions, each keeping its last 50 messages"""
+
+    def __init__(self, memory, max_sessions, shards):
+        self.shard = memory._shard
+        self.capacity = -(-max_sessions // shards)
+        self.shards = [OrderedDict() for _ in range(shards)]
+
+    def add(self, session_id, content):
+        sessions = self.shards[self.shard(session_id)]
+        if session_id not in sessions:
+            if len(sessions) >= self.capacity:
+                sessions.popitem(last=False)
+            sessions[session_id] = deque(maxlen=50)
+        sessions.move_to_end(session_id)
+        sessions[session_id].append(content)
+
+    def clear(self, session_id):
+        self.shards[self.shard(session_id)].pop(session_id, None)
+
+    def snapshot(self):
+        return {sid: list(messages) for shard in self.shards for sid, messages in shard.items()}
+
+
+def _snapshot(memory):
+    return {sid: [m.content for m in session.messages] for sid, session in memory.sessions.items()}
+
+
+def _message(content):
+    return Message(role=MessageRole.USER, content=content)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sharded_memory_matches_reference(seed):
+    rng = random.Random(seed)
+    max_sessions, shards = rng.choice(((8, 4), (5, 2), (16, 16), (3, 1)))
+    memory = ConversationMemory(max_sessions=max_sessions, shards=shards)
+    reference = ReferenceMemory(memory, max_sessions, shards)
+
+    for step in range(400):
+        session_id = f"session-{rng.randrange(20)}"
+        if rng.random() < 0.1:
+            memory.clear_session(session_id)
+            reference.clear(session_id)
+        else:
+            memory.add_message(session_id, _message(str(step)))
+            reference.add(session_id, str(step))
+        expected = reference.snapshot().get(session_id)
+        session = memory.get_session(session_id)
+        assert (None if session is None else [m.content for m in session.messages]) == expected
+
+    assert _snapshot(memory) == reference.snapshot()
+    assert len(memory.sessions) <= shards * reference.capacity
+
+
+def test_concurrent_writers_lose_nothing():
+    memory = ConversationMemory(max_sessions=64, shards=4)
+
+    def write(thread):
+        for n in range(40):
+            memory.add_message(f"session-{thread}", _message(str(n)))
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _snapshot(memory) == {f"session-{t}": [str(n) for n in range(40)] for t in range(8)}
+
+
+def test_shard_count_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        ConversationMemory(shards=6)
+
+
+@pytest.fixture
+def service():
+    return LLMService()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_queued_writes_match_direct_writes(service, seed):
+    rng = random.Random(seed)
+    writes = [(f"session-{rng.randrange(5)}", str(n)) for n in range(300)]
+    reference = ConversationMemory()
+    for session_id, content in writes:
+        reference.add_message(session_id, _message(content))
+
+    async def run():
+        for session_id, content in writes:
+            service.add_to_memory_async(session_id, _message(content))
+            if rng.random() < 0.1:
+                await asyncio.sleep(0)
+        await service.flush_memory()
+
+    asyncio.run(run())
+
+    assert _snapshot(service._memory) == _snapshot(reference)
+
+
+def test_writes_are_deferred_to_the_drain_in_order(service, monkeypatch):
+    applied = []
+    add_message = service._memory.add_message
+
+    def record(session_id, message):
+        applied.append(message.content)
+        add_message(session_id, message)
+
+    monkeypatch.setattr(service._memory, "add_message", record)
+
+    async def run():
+        for n in range(150):
+            service.add_to_memory_async("session", _message(str(n)))
+        # Nothing is applied until the drain task gets the loop
+        before_yield = list(applied)
+        await service.flush_memory()
+        return before_yield
+
+    assert asyncio.run(run()) == []
+    assert applied == [str(n) for n in range(150)]
+
+
+def test_full_queue_writes_inline(service, monkeypatch):
+    monkeypatch.setattr(LLMService, "MEMORY_QUEUE_SIZE", 2)
+
+    async def run():
+        for n in range(5):
+            service.add_to_memory_async("session", _message(str(n)))
+        # Overflowing writes are applied at once instead of being dropped
+        inline = [m.content for m in service.get_conversation_context("session").messages]
+        await service.flush_memory()
+        return inline
+
+    inline = asyncio.run(run())
+
+    assert inline == ["2", "3", "4"]
+    assert sorted(m.content for m in service.get_conversation_context("session").messages) == list("01234")
+
+
+def test_each_loop_gets_its_own_drain(service):
+    async def write(content):
+        service.add_to_memory_async("session", _message(content))
+        await service.flush_memory()
+
+    asyncio.run(write("first"))
+    asyncio.run(write("second"))
+
+    assert [m.content for m in service.get_conversation_context("session").messages] == ["first", "second"]
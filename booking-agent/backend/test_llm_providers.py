@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Tests for provider-side helpers of the LLM service: the rate limiter, the
+generated chat completion parameter builders and the retry backoff
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import llm_service
+from app.services.llm_service import (
+    FunctionDefinition,
+    LLMConfig,
+    LLMProvider,
+    LLMRequest,
+    LLMResponse,
+    LLMService,
+    Message,
+    MessageRole,
+    OpenAIProvider,
+    RateLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ReferenceBucket:
+    """Token bucket in exact fractions"""
+
+    def __init__(self, max_requests, time_window):
+        self.capacity = Fraction(max_requests)
+        self.rate = Fraction(max_requests, time_window)
+        self.tokens = self.capacity
+
+    def advance(self, seconds):
+        self.tokens = min(self.capacity, self.tokens + Fraction(seconds) * self.rate)
+
+    def take(self):
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self):
+        return max(Fraction(0), (1 - self.tokens) / self.rate)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_rate_limiter_matches_reference(monkeypatch, seed):
+    rng = random.Random(seed)
+    clock = FakeClock()
+    monkeypatch.setattr(llm_service.time, "monotonic", clock)
+    max_requests, time_window = rng.choice(((4, 8), (10, 5), (1, 2), (3, 3)))
+    limiter = RateLimiter(max_requests=max_requests, time_window=time_window)
+    reference = ReferenceBucket(max_requests, time_window)
+    accepted = []
+
+    for _ in range(300):
+        # Quarter-second steps keep the float bucket exact
+        step = rng.choice((0, 0, 0.25, 0.5, 1.0, 4.0))
+        clock.now += step
+        reference.advance(step)
+        if rng.random() < 0.2:
+            assert limiter.retry_after() == pytest.approx(float(reference.retry_after()))
+        allowed = limiter.can_proceed()
+        assert allowed == reference.take()
+        if allowed:
+            accepted.append(clock.now)
+
+    # No window ever admits more than a full bucket plus its refill
+    for i, start in enumerate(accepted):
+        for end in accepted[i:]:
+            count = bisect_right(accepted, end) - bisect_left(accepted, start)
+            assert count <= max_requests + (end - start) * max_requests / time_window + 1e-9
+
+
+def test_acquire_wakes_waiters_in_order_when_tokens_are_due():
+    limiter = RateLimiter(max_requests=2, time_window=0.2)
+    order = []
+
+    async def caller(n):
+        await limiter.acquire()
+        order.append((n, time.monotonic()))
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(caller(n) for n in range(6)))
+        return started
+
+    started = asyncio.run(run())
+
+    assert [n for n, _ in order] == list(range(6))
+    # Two from the full bucket, then one per 0.1 s refill
+    for n, at in order:
+        assert at - started >= max(0, n - 1) * 0.1 - 0.01
+    assert order[-1][1] - started < 1.0
+
+
+# Values for each optional request field when a case sets it
+OPTION_VALUES = {
+    "function_call": "auto",
+    "tools": [{"type": "function", "function": {"name": "book"}}],
+    "tool_choice": "none",
+    "response_format": {"type": "json_object"},
+    "seed": 0,
+    "user": "user-1",
+    "stop_sequences": ["\n\n"],
+    "logit_bias": {"50256": -100.0},
+}
+
+
+def reference_params(request, default_model):
+    """The parameters every call used to pass, minus the ones left unset"""
+    functions = None
+    if request.functions:
+        functions = []
+        for func in request.functions:
+            func_dict = {"name": func.name, "description": func.description, "parameters": func.parameters}
+            if func.required:
+                func_dict["required"] = func.required
+            functions.append(func_dict)
+    params = dict(
+        model=request.model or default_model,
+        messages=[{"role": msg.role.value, "content": msg.content} for msg in request.messages],
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        top_p=request.top_p,
+        frequency_penalty=request.frequency_penalty,
+        presence_penalty=request.presence_penalty,
+        timeout=request.timeout,
+        functions=functions,
+        function_call=request.function_call,
+        tools=request.tools,
+        tool_choice=request.tool_choice,
+        response_format=request.response_format,
+        seed=request.seed,
+        user=request.user,
+        stop=request.stop_sequences,
+        logit_bias=request.logit_bias,
+    )
+    always = {"model", "messages", "max_tokens", "temperature", "top_p",
+              "frequency_penalty", "presence_penalty", "timeout"}
+    return {k: v for k, v in params.items() if k in always or v is not None}
+
+
+def _random_request(rng):
+    kwargs = {
+        name: value for name, value in OPTION_VALUES.items() if rng.random() < 0.5
+    }
+    if rng.random() < 0.5:
+        kwargs["functions"] = [
+            FunctionDefinition(
+                name=f"fn{i}", description="d", parameters={"type": "object"},
+                required=["date"] if rng.random() < 0.5 else None,
+            )
+            for i in range(rng.randint(0, 2))
+        ]
+    if rng.random() < 0.5:
+        kwargs["model"] = "gpt-4o-mini"
+    return LLMRequest(
+        messages=[Message(role=MessageRole.USER, content=str(rng.random()))],
+        temperature=rng.choice((0.0, 0.7)),
+        max_tokens=rng.randint(1, 4000),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_payload_builders_match_reference(seed):
+    rng = random.Random(seed)
+    provider = OpenAIProvider(LLMConfig(provider=LLMProvider.OPENAI))
+
+    for _ in range(50):
+        request = _random_request(rng)
+        params = provider._build_params(request)
+        expected = reference_params(request, provider.config.default_model)
+        assert params == expected
+        # Key order is part of the payload the SDK serialises
+        assert list(params) == list(expected)
+
+
+def test_payload_builder_is_shared_per_shape():
+    first = LLMRequest(messages=[], seed=1, temperature=0.0)
+    second = LLMRequest(messages=[], seed=99, temperature=0.7, model="other")
+    assert llm_service._payload_builder(first) is llm_service._payload_builder(second)
+    assert llm_service._payload_builder(first) is not llm_service._payload_builder(LLMRequest(messages=[]))
+
+    # Falsy but set options are sent; an empty function list is not
+    build = llm_service._payload_builder(LLMRequest(messages=[], seed=0, functions=[]))
+    params = build(LLMRequest(messages=[], seed=0, functions=[]), "m", [], [])
+    assert params["seed"] == 0
+    assert "functions" not in params
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedProvider:
+    """Fails with each scripted error in turn, then succeeds"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return LLMResponse(content="ok", model="test", latency=0.0)
+
+    def generate(self, request):
+        return self._next()
+
+    async def generate_async(self, request):
+        return self._next()
+
+
+def reference_retries(errors, jitter, retries, base, cap):
+    """Expected (provider calls, sleeps, raised error) for a scripted run"""
+    sleeps = []
+    for attempt in range(retries):
+        if attempt == len(errors):
+            return attempt + 1, sleeps, None
+        error = errors[attempt]
+        status = getattr(error, "status_code", None)
+        client_error = isinstance(status, int) and 400 <= status < 500 and status not in (408, 409, 429)
+        if attempt == retries - 1 or client_error:
+            return attempt + 1, sleeps, error
+        backoff = min(cap, base * 2 ** attempt)
+        sleeps.append(backoff / 2 + jitter[attempt] * backoff / 2)
+    raise AssertionError("unreachable")
+
+
+def _random_errors(rng):
+    return [
+        StatusError(rng.choice((400, 401, 404, 408, 409, 422, 429, 500, 502, 503)))
+        if rng.random() < 0.8 else ConnectionError("reset")
+        for _ in range(rng.randint(0, 6))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_retry_backoff_matches_reference(monkeypatch, seed):
+    rng = random.Random(seed)
+    errors = _random_errors(rng)
+    jitter = [rng.random() for _ in range(8)]
+    retries = rng.randint(1, 6)
+    base, cap = rng.choice(((1.0, 30.0), (0.5, 2.0), (0.1, 0.4)))
+    expected_calls, expected_sleeps, expected_error = reference_retries(errors, jitter, retries, base, cap)
+
+    request = LLMRequest(messages=[], retries=retries, retry_backoff_base=base,
+                         retry_backoff_cap=cap, cache=False)
+    sleeps = []
+    draws = iter(jitter)
+    monkeypatch.setattr(llm_service.random, "random", lambda: next(draws))
+    monkeypatch.setattr(llm_service.time, "sleep", sleeps.append)
+    service = LLMService()
+    provider = ScriptedProvider(errors)
+
+    if expected_error is None:
+        assert service._generate_with_retries(LLMProvider.OPENAI, provider, request).content == "ok"
+    else:
+        with pytest.raises(type(expected_error)) as raised:
+            service._generate_with_retries(LLMProvider.OPENAI, provider, request)
+        assert raised.value is expected_error
+    assert provider.calls == expected_calls
+    assert sleeps == pytest.approx(expected_sleeps)
+    for attempt, delay in enumerate(sleeps):
+        backoff = min(cap, base * 2 ** attempt)
+        assert backoff / 2 <= delay <= backoff
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_async_retry_backoff_matches_reference(monkeypatch, seed):
+    rng = random.Random(seed)
+    errors = _random_errors(rng)
+    jitter = [rng.random() for _ in range(8)]
+    expected_calls, expected_sleeps, expected_error = reference_retries(errors, jitter, 4, 1.0, 30.0)
+
+    request = LLMRequest(messages=[], retries=4, cache=False)
+    sleeps = []
+    draws = iter(jitter)
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(llm_service.random, "random", lambda: next(draws))
+    monkeypatch.setattr(llm_service.asyncio, "sleep", fake_sleep)
+    service = LLMService()
+    provider = ScriptedProvider(errors)
+
+    async def run():
+        return await service._generate_with_retries_async(LLMProvider.OPENAI, provider, request)
+
+    if expected_error is None:
+        assert asyncio.run(run()).content == "ok"
+    else:
+        with pytest.raises(type(expected_error)):
+            asyncio.run(run())
+    assert provider.calls == expected_calls
+    assert sleeps == pytest.approx(expected_sleeps)
+
+
+def test_backoff_jitter_spreads_over_upper_half():
+    request = LLMRequest(messages=[], retry_backoff_base=1.0, retry_backoff_cap=30.0)
+    random.seed(0)
+    delays = [llm_service._backoff_delay(request, 3) for _ in range(2000)]
+    assert min(delays) >= 4.0 and max(delays) <= 8.0
+    # Roughly uniform, so concurrent retries don't land together
+    for low in (4.0, 5.0, 6.0, 7.0):
+        share = sum(low <= d < low + 1.0 for d in delays) / len(delays)
+        assert 0.2 < share < 0.3
+    # Capped attempts jitter below the cap
+    assert all(15.0 <= llm_service._backoff_delay(request, 10) <= 30.0 for _ in range(100))
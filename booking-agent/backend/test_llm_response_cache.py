@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis-backed get_llm_response: hit counting, and the
+single-flight lock that lets one caller compute a missing response
+"""
+
+import os
+import sys
+import asyncio
+import hashlib
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import agent_service
+from app.services.agent_service import LLM_CACHE_TTL, _RELEASE_LOCK_LUA, get_llm_response
+from app.services.llm_service import LLMResponse
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio commands get_llm_response uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _eval(self, script, numkeys, *args):
+        # The only script in use is the compare-and-delete lock release
+        assert script == _RELEASE_LOCK_LUA
+        key, token = args
+        if self.data.get(key) == token.encode("utf-8"):
+            del self.data[key]
+            return 1
+        return 0
+
+    def _incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode("utf-8")
+        return int(self.data[key])
+
+    def _expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, *args, **kwargs):
+        self.commands.append(("set", args, kwargs))
+
+    def setex(self, key, seconds, value):
+        self.commands.append(("set", (key, value), {"ex": seconds}))
+
+    def incr(self, key):
+        self.commands.append(("_incr", (key,), {}))
+
+    def expire(self, key, seconds):
+        self.commands.append(("_expire", (key, seconds), {}))
+
+    def eval(self, *args):
+        self.commands.append(("_eval", args, {}))
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.commands:
+            result = getattr(self.redis, name)(*args, **kwargs)
+            results.append(await result if asyncio.iscoroutine(result) else result)
+        return results
+
+
+class FakeLLMService:
+    """Answers every prompt after an optional hook runs mid-call"""
+
+    def __init__(self, during_call=None):
+        self.calls = 0
+        self.during_call = during_call
+
+    async def generate_async(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        if self.during_call is not None:
+            self.during_call()
+        return LLMResponse(content=f"answer to {messages[0].content}", model="test")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(agent_service, "redis_client", fake)
+    monkeypatch.setattr(agent_service, "_redis_available", True)
+    monkeypatch.setattr(agent_service, "LLM_LOCK_POLL", 0.01)
+    monkeypatch.setattr(agent_service, "_llm_semaphore", asyncio.Semaphore(agent_service.MAX_INFLIGHT_LLM))
+    return fake
+
+
+def _use_llm(monkeypatch, service):
+    monkeypatch.setattr(agent_service, "get_llm_service", lambda: service)
+    return service
+
+
+def _keys(prompt):
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+    return f"llm:{digest}", f"llm:{digest}:lock", f"llm:{digest}:hits"
+
+
+def test_cache_hit_counts_and_expires(redis, monkeypatch):
+    llm = _use_llm(monkeypatch, FakeLLMService())
+    cache_key, _, hits_key = _keys("hello")
+    redis.data[cache_key] = b"cached answer"
+
+    async def run():
+        results = [await get_llm_response("hello") for _ in range(2)]
+        # The counter is written in the background
+        await asyncio.gather(*agent_service._hit_count_tasks)
+        return results
+
+    assert asyncio.run(run()) == ["cached answer", "cached answer"]
+    assert llm.calls == 0
+    assert redis.data[hits_key] == b"2"
+    assert redis.ttls[hits_key] == LLM_CACHE_TTL
+
+
+def test_waiter_reads_owner_result(redis, monkeypatch):
+    llm = _use_llm(monkeypatch, FakeLLMService())
+    cache_key, lock_key, _ = _keys("hello")
+
+    async def run():
+        return await asyncio.gather(*(get_llm_response("hello") for _ in range(3)))
+
+    assert asyncio.run(run()) == ["answer to hello"] * 3
+    assert llm.calls == 1
+    assert redis.data[cache_key] == b"answer to hello"
+    assert redis.ttls[cache_key] == LLM_CACHE_TTL
+    assert lock_key not in redis.data
+
+
+def test_expired_holder_keeps_new_owner_lock(redis, monkeypatch):
+    _, lock_key, _ = _keys("hello")
+
+    def lock_expires_and_is_retaken():
+        assert lock_key in redis.data
+        redis.data[lock_key] = b"other-worker-token"
+
+    _use_llm(monkeypatch, FakeLLMService(during_call=lock_expires_and_is_retaken))
+
+    assert asyncio.run(get_llm_response("hello")) == "answer to hello"
+    assert redis.data[lock_key] == b"other-worker-token"
+
+
+def test_failed_holder_releases_its_lock(redis, monkeypatch):
+    _, lock_key, _ = _keys("hello")
+
+    class FailingLLMService:
+        async def generate_async(self, messages, **kwargs):
+            raise ConnectionError("upstream down")
+
+    _use_llm(monkeypatch, FailingLLMService())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(get_llm_response("hello"))
+    assert lock_key not in redis.data
@@ -6,12 +6,19 @@ st.title("AI Booking Agent")
 if 'messages' not in st.session_state:
     st.session_state['messages'] = []
 
+# One keep-alive session per browser session, reused across reruns
+if 'http' not in st.session_state:
+    session = requests.Session()
+    session.headers['Connection'] = 'keep-alive'
+    st.session_state['http'] = session
+
 user_input = st.text_input("You:")
 if st.button("Send") and user_input:
     st.session_state['messages'].append(("user", user_input))
-    response = requests.post(
+    response = st.session_state['http'].post(
         "http://localhost:8000/chat",
-        json={"message": user_input}
+        json={"message": user_input},
+        timeout=(2, 30)
     )
     agent_reply = response.json().get("response", "[No response]")
     st.session_state['messages'].append(("agent", agent_reply))
@@ -4,48 +4,51 @@ Quick status check for the Booking Agent project
 """
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-def check_backend():
-    """Check if backend is running"""
+BACKEND_URL = "http://localhost:8001/"
+FRONTEND_URL = "http://localhost:8502/"
+
+def _probe(name, url):
+    """Request a service root and describe the outcome as (ok, message)"""
     try:
-        response = requests.get("http://localhost:8001/", timeout=5)
+        response = requests.get(url, timeout=5)
         if response.status_code == 200:
-            print("✅ Backend is running on http://localhost:8001/")
-            return True
+            return True, f"✅ {name} is running on {url}"
         else:
-            print(f"❌ Backend returned status {response.status_code}")
-            return False
+            return False, f"❌ {name} returned status {response.status_code}"
     except requests.exceptions.ConnectionError:
-        print("❌ Backend is not running on http://localhost:8001/")
-        return False
+        return False, f"❌ {name} is not running on {url}"
     except Exception as e:
-        print(f"❌ Backend check failed: {e}")
-        return False
+        return False, f"❌ {name} check failed: {e}"
+
+def check_backend():
+    """Check if backend is running"""
+    ok, message = _probe("Backend", BACKEND_URL)
+    print(message)
+    return ok
 
 def check_frontend():
     """Check if frontend is running"""
-    try:
-        response = requests.get("http://localhost:8502/", timeout=5)
-        if response.status_code == 200:
-            print("✅ Frontend is running on http://localhost:8502/")
-            return True
-        else:
-            print(f"❌ Frontend returned status {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Frontend is not running on http://localhost:8502/")
-        return False
-    except Exception as e:
-        print(f"❌ Frontend check failed: {e}")
-        return False
+    ok, message = _probe("Frontend", FRONTEND_URL)
+    print(message)
+    return ok
 
 def main():
     """Check both services"""
     print("🔍 Checking Booking Agent Services...")
     print("-" * 50)
     
-    backend_ok = check_backend()
-    frontend_ok = check_frontend()
+    # Probe both at once so a down service costs one timeout, not two;
+    # results are printed afterwards so the output order stays fixed
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        backend_future = executor.submit(_probe, "Backend", BACKEND_URL)
+        frontend_future = executor.submit(_probe, "Frontend", FRONTEND_URL)
+        (backend_ok, backend_message), (frontend_ok, frontend_message) = (
+            backend_future.result(), frontend_future.result()
+        )
+    print(backend_message)
+    print(frontend_message)
     
     print("-" * 50)
     if backend_ok and frontend_ok:
@@ -6,29 +6,79 @@ Modern, robust, and extensible Streamlit frontend for Booking Agent.
 """
 
 import streamlit as st
-import requests
 import json
+import html
+import string
+import textwrap
 import logging
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, TYPE_CHECKING
 from dataclasses import dataclass, field
 from enum import Enum
 import os
+from pathlib import Path
 from contextlib import contextmanager
 import time
 import uuid
+from functools import lru_cache
+
+if TYPE_CHECKING:
+    import requests
 
-# Configure logging with better formatting
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _init_logging() -> None:
+    """Configure logging with better formatting, once per process"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+_requests_module = None
+
+def _requests():
+    """Import requests on first network use; it pulls in urllib3 and friends"""
+    global _requests_module
+    if _requests_module is None:
+        import requests
+        _requests_module = requests
+    return _requests_module
+
+# Prefer orjson for request/response bodies, fall back to the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _json_dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def _json_loads(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def post_json(sess: "requests.Session", url: str, obj: Any, **kwargs) -> "requests.Response":
+    """POST obj as a preserialized JSON body"""
+    return sess.post(url, data=_json_dumps(obj), headers=JSON_HEADERS, **kwargs)
+
 # Configuration with environment variable support and validation
 API_BASE_URL = os.getenv("BOOKING_AGENT_API_URL", "http://localhost:8000")
 API_TIMEOUT = int(os.getenv("BOOKING_AGENT_API_TIMEOUT", "30"))
 
+# Endpoint URLs, resolved once; the templates take a session id via %
+HEALTH_URL = f"{API_BASE_URL}/health"
+START_URL = f"{API_BASE_URL}/conversation/start"
+SESSIONS_URL = f"{API_BASE_URL}/admin/sessions"
+MSG_URL_TMPL = f"{API_BASE_URL}/conversation/%s/message"
+
 # Page configuration with responsive settings
 st.set_page_config(
     page_title="AI Booking Agent",
@@ -42,268 +92,13 @@ st.set_page_config(
     }
 )
 
+@st.cache_data(show_spinner=False)
+def _css() -> str:
+    """Stylesheet, read from disk once per process"""
+    return (Path(__file__).with_name("static") / "app.css").read_text(encoding="utf-8")
+
 # Comprehensive responsive CSS for all devices
-st.markdown("""
-<style>
-    /* Global responsive settings */
-    @media (max-width: 768px) {
-        .main-header {
-            padding: 1rem !important;
-            margin-bottom: 1rem !important;
-        }
-        .main-header h1 {
-            font-size: 1.5rem !important;
-        }
-        .main-header p {
-            font-size: 0.9rem !important;
-        }
-        .welcome-gradient {
-            padding: 1rem !important;
-            margin-bottom: 1rem !important;
-        }
-        .welcome-gradient h3 {
-            font-size: 1.2rem !important;
-        }
-        .welcome-gradient p {
-            font-size: 0.85rem !important;
-        }
-        .service-card {
-            padding: 0.75rem !important;
-            margin: 0.25rem 0 !important;
-        }
-        .feature-box {
-            padding: 1rem !important;
-            margin: 0.5rem 0 !important;
-        }
-        .chat-message {
-            padding: 0.75rem !important;
-            margin: 0.25rem 0 !important;
-            font-size: 0.9rem !important;
-        }
-        .stButton > button {
-            width: 100% !important;
-            margin: 0.25rem 0 !important;
-        }
-        .stTextInput > div > div > input {
-            font-size: 16px !important; /* Prevents zoom on iOS */
-        }
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 0.5rem !important;
-        }
-        .stTabs [data-baseweb="tab"] {
-            padding: 0.5rem 0.75rem !important;
-            font-size: 0.9rem !important;
-        }
-    }
-    
-    @media (max-width: 480px) {
-        .main-header {
-            padding: 0.75rem !important;
-        }
-        .main-header h1 {
-            font-size: 1.3rem !important;
-        }
-        .welcome-gradient {
-            padding: 0.75rem !important;
-        }
-        .welcome-gradient h3 {
-            font-size: 1.1rem !important;
-        }
-        .stSidebar .sidebar-content {
-            padding: 0.5rem !important;
-        }
-        .stTabs [data-baseweb="tab"] {
-            padding: 0.4rem 0.6rem !important;
-            font-size: 0.8rem !important;
-        }
-    }
-    
-    @media (min-width: 769px) and (max-width: 1024px) {
-        .main-header {
-            padding: 1.5rem !important;
-        }
-        .welcome-gradient {
-            padding: 1.5rem !important;
-        }
-    }
-    
-    /* Touch-friendly improvements */
-    @media (hover: none) and (pointer: coarse) {
-        .stButton > button {
-            min-height: 44px !important; /* iOS touch target minimum */
-            padding: 0.75rem 1rem !important;
-        }
-        .stTextInput > div > div > input {
-            min-height: 44px !important;
-            padding: 0.75rem !important;
-        }
-        .stSelectbox > div > div {
-            min-height: 44px !important;
-        }
-    }
-    
-    /* High DPI displays */
-    @media (-webkit-min-device-pixel-ratio: 2), (min-resolution: 192dpi) {
-        .main-header {
-            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-size: cover;
-            background-size: cover;
-        }
-    }
-    
-    /* Dark mode support */
-    @media (prefers-color-scheme: dark) {
-        .service-card {
-            background: #2d3748 !important;
-            color: #e2e8f0 !important;
-        }
-        .chat-message {
-            background: #2d3748 !important;
-            color: #e2e8f0 !important;
-        }
-    }
-    
-    /* Accessibility improvements */
-    .stButton > button:focus {
-        outline: 2px solid #667eea !important;
-        outline-offset: 2px !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        outline: 2px solid #667eea !important;
-        outline-offset: 2px !important;
-    }
-    
-    /* Custom responsive components */
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 20px rgba(102, 126, 234, 0.3);
-    }
-    
-    .welcome-gradient {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-        padding: 2rem 1.5rem;
-        border-radius: 20px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 8px 32px rgba(102, 126, 234, 0.4);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .service-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 8px;
-        border-left: 4px solid #667eea;
-        margin: 0.5rem 0;
-        transition: transform 0.2s ease, box-shadow 0.2s ease;
-    }
-    
-    .service-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.2);
-    }
-    
-    .feature-box {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3);
-    }
-    
-    .developer-credit {
-        background: #2c3e50;
-        color: white;
-        padding: 1rem;
-        border-radius: 8px;
-        text-align: center;
-        margin-top: 2rem;
-        font-size: 0.9rem;
-    }
-    
-    .chat-message {
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        word-wrap: break-word;
-        overflow-wrap: break-word;
-    }
-    
-    .user-message {
-        background: #e3f2fd;
-        border-left: 4px solid #2196f3;
-        margin-left: 2rem;
-    }
-    
-    .assistant-message {
-        background: #f3e5f5;
-        border-left: 4px solid #9c27b0;
-        margin-right: 2rem;
-    }
-    
-    .error-message {
-        background: #ffebee;
-        border-left: 4px solid #f44336;
-        color: #c62828;
-    }
-    
-    .success-message {
-        background: #e8f5e8;
-        border-left: 4px solid #4caf50;
-        color: #2e7d32;
-    }
-    
-    .info-message {
-        background: #e1f5fe;
-        border-left: 4px solid #03a9f4;
-        color: #0277bd;
-    }
-    
-    /* Responsive grid system */
-    .responsive-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 1rem;
-        margin: 1rem 0;
-    }
-    
-    /* Loading animations */
-    .loading-pulse {
-        animation: pulse 1.5s ease-in-out infinite;
-    }
-    
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.5; }
-    }
-    
-    /* Smooth transitions */
-    * {
-        transition: all 0.2s ease;
-    }
-    
-    /* Print styles */
-    @media print {
-        .stSidebar, .stButton, .stTextInput {
-            display: none !important;
-        }
-        .main-header, .chat-message {
-            box-shadow: none !important;
-            border: 1px solid #ccc !important;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{_css()}</style>", unsafe_allow_html=True)
 
 class MessageRole(Enum):
     """Enum for message roles to prevent typos and ensure consistency"""
@@ -318,25 +113,31 @@ class APIStatus(Enum):
     DISCONNECTED = "disconnected"
     ERROR = "error"
 
-@dataclass
+@dataclass(slots=True)
 class Message:
-    """Type-safe message structure with validation"""
+    """Type-safe message structure; build from API payloads with from_api"""
     role: str
     content: str
     booking_data: Optional[Dict[str, Any]] = None
     suggested_slots: Optional[List[Dict[str, str]]] = None
-    timestamp: Optional[datetime] = field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: Optional[float] = field(default_factory=time.time)  # epoch seconds
     
-    def __post_init__(self):
-        """Validate message data after initialization"""
-        if not isinstance(self.role, str) or not self.role.strip():
+    @classmethod
+    def from_api(cls, payload: Dict[str, Any]) -> "Message":
+        """Validate an API payload once, at ingress, and build the message"""
+        role = payload.get("role")
+        content = payload.get("content")
+        booking_data = payload.get("booking_data")
+        suggested_slots = payload.get("suggested_slots")
+        if not isinstance(role, str) or not role.strip():
             raise ValueError("Role must be a non-empty string")
-        if not isinstance(self.content, str) or not self.content.strip():
+        if not isinstance(content, str) or not content.strip():
             raise ValueError("Content must be a non-empty string")
-        if self.booking_data is not None and not isinstance(self.booking_data, dict):
+        if booking_data is not None and not isinstance(booking_data, dict):
             raise ValueError("Booking data must be a dictionary or None")
-        if self.suggested_slots is not None and not isinstance(self.suggested_slots, list):
+        if suggested_slots is not None and not isinstance(suggested_slots, list):
             raise ValueError("Suggested slots must be a list or None")
+        return cls(role, content, booking_data, suggested_slots)
 
 @dataclass
 class APIConfig:
@@ -362,7 +163,6 @@ class SessionManager:
         'session_id': None,
         'messages': [],
         'conversation_started': False,
-        'last_api_check': None,
         'api_status': APIStatus.UNKNOWN.value,
         'error_count': 0,
         'last_error': None
@@ -410,22 +210,77 @@ class SessionManager:
             st.session_state.messages = []
         st.session_state.messages.append(message)
 
+@st.cache_resource
+def get_http_session(max_retries: int = 3, backoff_factor: float = 0.5) -> "requests.Session":
+    """Process-wide pooled session, so reruns reuse open connections
+    
+    Retries happen in urllib3, with exponential backoff. Every method is
+    retried when the connection could not be made. Read timeouts and
+    overload responses are retried for GET only, since the server may
+    already have acted on a POST; the same goes for a 500 on any method.
+    The final response is returned rather than raised, so callers still
+    see its status code.
+    """
+    requests = _requests()
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'User-Agent': 'BookingAgent-Streamlit/2.0',
+        'Accept': 'application/json'
+    })
+    return session
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _health_report(health_url: str) -> Dict[str, Any]:
+    """Health check shared by every rerun and session for 30 seconds"""
+    requests = _requests()
+    try:
+        response = get_http_session().get(health_url, timeout=5)
+        if response.status_code == 200:
+            return {"status": "online", "data": _json_loads(response.content)}
+        else:
+            return {"status": "warning", "data": {"error": f"API returned status {response.status_code}"}}
+    except requests.exceptions.ConnectionError:
+        return {"status": "offline", "data": {"error": "Cannot connect to backend"}}
+    except requests.exceptions.Timeout:
+        return {"status": "warning", "data": {"error": "API request timed out"}}
+    except Exception as e:
+        logger.debug(f"API health check failed: {e}")
+        return {"status": "offline", "data": {"error": str(e)}}
+
+def _cached_health(health_url: str) -> bool:
+    """True when the cached health report says the API is online"""
+    return _health_report(health_url)["status"] == "online"
+
 class APIClient:
     """Handles all API communication with proper error handling and retries"""
     
     def __init__(self, config: APIConfig):
         self.config = config
         self.base_url = config.base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'BookingAgent-Streamlit/2.0',
-            'Accept': 'application/json'
-        })
+        self._health_url = f"{self.base_url}/health"
+        self.session = get_http_session(config.max_retries, config.retry_delay)
 
     @contextmanager
     def _error_handler(self, operation: str):
         """Context manager for consistent error handling"""
+        requests = _requests()
         try:
             yield
         except requests.exceptions.Timeout:
@@ -444,69 +299,42 @@ class APIClient:
             logger.error(f"Unexpected error during {operation}: {e}")
             st.error("An unexpected error occurred.")
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """Make HTTP request with comprehensive error handling and retries"""
+    def _make_request(self, method: str, endpoint: str, json_body: Any = None, **kwargs) -> Optional[Dict[str, Any]]:
+        """Make HTTP request with comprehensive error handling; retries happen in the session"""
         url = f"{self.base_url}{endpoint}"
+        if json_body is not None:
+            kwargs["data"] = _json_dumps(json_body)
+            kwargs["headers"] = JSON_HEADERS
+        response = self.session.request(
+            method=method,
+            url=url,
+            timeout=self.config.timeout,
+            **kwargs
+        )
         
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = self.session.request(
-                    method=method,
-                    url=url,
-                    timeout=self.config.timeout,
-                    **kwargs
-                )
-                
-                # Handle different status codes appropriately
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 404:
-                    logger.error(f"Endpoint not found: {url}")
-                    st.error("API endpoint not found. Please check configuration.")
-                    return None
-                elif response.status_code == 500:
-                    logger.error(f"Server error: {response.text}")
-                    st.error("Server error occurred. Please try again later.")
-                    return None
-                elif response.status_code == 429:
-                    logger.warning(f"Rate limited: {response.text}")
-                    st.warning("Too many requests. Please wait a moment.")
-                    return None
-                else:
-                    logger.error(f"API error {response.status_code}: {response.text}")
-                    st.error(f"API error: {response.status_code}")
-                    return None
-                    
-            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
-                if attempt < self.config.max_retries:
-                    logger.info(f"Retry attempt {attempt + 1} for {url}")
-                    time.sleep(self.config.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    raise
-            except Exception as e:
-                logger.error(f"Request failed: {e}")
-                raise
-        
-        return None
+        # Handle different status codes appropriately
+        if response.status_code == 200:
+            return _json_loads(response.content)
+        elif response.status_code == 404:
+            logger.error(f"Endpoint not found: {url}")
+            st.error("API endpoint not found. Please check configuration.")
+            return None
+        elif response.status_code == 500:
+            logger.error(f"Server error: {response.text}")
+            st.error("Server error occurred. Please try again later.")
+            return None
+        elif response.status_code == 429:
+            logger.warning(f"Rate limited: {response.text}")
+            st.warning("Too many requests. Please wait a moment.")
+            return None
+        else:
+            logger.error(f"API error {response.status_code}: {response.text}")
+            st.error(f"API error: {response.status_code}")
+            return None
 
     def check_api_health(self) -> bool:
         """Check if API is healthy and responsive"""
-        try:
-            response = self.session.get(f"{self.base_url}/health", timeout=5)
-            return response.status_code == 200
-        except Exception as e:
-            logger.error(f"API health check failed: {e}")
-            return False
-
-    def check_api_status(self) -> bool:
-        """Check if API is reachable and healthy with timeout"""
-        try:
-            response = self.session.get(f"{self.base_url}/health", timeout=5)
-            return response.status_code == 200
-        except Exception as e:
-            logger.debug(f"API status check failed: {e}")
-            return False
+        return _cached_health(self._health_url)
 
     def start_conversation(self) -> Optional[str]:
         """Start a new conversation session with validation"""
@@ -532,7 +360,7 @@ class APIClient:
             return None
             
         payload = {"message": message.strip()}
-        response = self._make_request("POST", f"/conversation/{session_id}/message", json=payload)
+        response = self._make_request("POST", f"/conversation/{session_id}/message", json_body=payload)
         
         # If session not found, try to start a new conversation
         if response is None:
@@ -540,7 +368,7 @@ class APIClient:
             new_session_id = self.start_conversation()
             if new_session_id:
                 # Retry with new session
-                response = self._make_request("POST", f"/conversation/{new_session_id}/message", json=payload)
+                response = self._make_request("POST", f"/conversation/{new_session_id}/message", json_body=payload)
                 if response:
                     # Update session state
                     st.session_state.session_id = new_session_id
@@ -548,49 +376,67 @@ class APIClient:
         
         return response
 
+@lru_cache(maxsize=1024)
+def _fmt_ts(epoch: int) -> str:
+    """Format whole epoch seconds; messages sent together share an entry"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
 class MessageDisplay:
     """Handles message display with proper formatting and validation"""
     
     @staticmethod
-    def format_datetime(dt: datetime) -> str:
-        """Format datetime for display"""
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+    def format_datetime(dt: Union[float, datetime]) -> str:
+        """Format an epoch timestamp or datetime for display"""
+        if isinstance(dt, datetime):
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            dt = dt.timestamp()
+        return _fmt_ts(int(dt))
     
     @staticmethod
     def display_messages(messages: List[Message]) -> None:
         """Display conversation messages with proper validation"""
         for message in messages:
-            # Check if it's a Message instance or dict
-            if isinstance(message, Message):
-                # Use the Message object directly
-                with st.chat_message(message.role):
-                    # Display main content
-                    st.write(message.content)
-                    
-                    # Display timestamp if available
-                    if message.timestamp:
-                        st.caption(f"Sent at {MessageDisplay.format_datetime(message.timestamp)}")
-                    
-                    # Display booking data if available
-                    if message.booking_data and isinstance(message.booking_data, dict):
-                        with st.expander("📅 Booking Details"):
-                            st.json(message.booking_data)
-                    
-                    # Display suggested slots if available
-                    if message.suggested_slots and isinstance(message.suggested_slots, list):
-                        st.write("**🕐 Suggested Time Slots:**")
-                        for i, slot in enumerate(message.suggested_slots, 1):
-                            if isinstance(slot, dict) and 'start_time' in slot and 'end_time' in slot:
-                                st.write(f"{i}. {slot['start_time']} to {slot['end_time']}")
-            elif isinstance(message, dict):
-                # Handle dict format for backward compatibility
-                with st.chat_message(message.get('role', 'user')):
-                    st.write(message.get('content', ''))
-            else:
-                logger.warning(f"Invalid message format: {type(message)}")
-                continue
+            MESSAGE_RENDERERS.get(type(message), MessageDisplay._render_unknown)(message)
+    
+    @staticmethod
+    def _render_message(message: Message) -> None:
+        """Render a Message as one markdown block, plus the booking expander"""
+        # Content, timestamp and slot list go out as a single element
+        parts = [message.content]
+        if message.timestamp:
+            parts.append(f"*Sent at {MessageDisplay.format_datetime(message.timestamp)}*")
+        if message.suggested_slots and isinstance(message.suggested_slots, list):
+            slots = [
+                f"{i}. {slot['start_time']} to {slot['end_time']}"
+                for i, slot in enumerate(message.suggested_slots, 1)
+                if isinstance(slot, dict) and 'start_time' in slot and 'end_time' in slot
+            ]
+            parts.append("**🕐 Suggested Time Slots:**\n" + "\n".join(slots))
+        
+        with st.chat_message(message.role):
+            st.markdown("\n\n".join(parts))
+            
+            # Display booking data if available
+            if message.booking_data and isinstance(message.booking_data, dict):
+                with st.expander("📅 Booking Details"):
+                    st.json(message.booking_data)
+    
+    @staticmethod
+    def _render_dict(message: Dict[str, Any]) -> None:
+        """Handle dict format for backward compatibility"""
+        with st.chat_message(message.get('role', 'user')):
+            st.write(message.get('content', ''))
+    
+    @staticmethod
+    def _render_unknown(message: Any) -> None:
+        logger.warning(f"Invalid message format: {type(message)}")
+
+# Renderer per message type, looked up by exact type
+MESSAGE_RENDERERS = {
+    Message: MessageDisplay._render_message,
+    dict: MessageDisplay._render_dict,
+}
 
 class SidebarManager:
     """Manages sidebar controls and status display"""
@@ -640,13 +486,8 @@ class SidebarManager:
         """Display API connection status"""
         st.subheader("🔗 API Status")
         
-        # Check API status (with caching to avoid too many requests)
-        current_time = datetime.now()
-        if (st.session_state.last_api_check is None or 
-            (current_time - st.session_state.last_api_check).seconds > 30):
-            
-            st.session_state.api_status = "connected" if self.api_client.check_api_status() else "disconnected"
-            st.session_state.last_api_check = current_time
+        # The health check is cached for 30 seconds across reruns
+        st.session_state.api_status = "connected" if self.api_client.check_api_health() else "disconnected"
         
         # Display status with appropriate styling
         if st.session_state.api_status == "connected":
@@ -656,38 +497,26 @@ class SidebarManager:
         else:
             st.warning("⚠️ API Status Unknown")
         
-        # Show last check time
-        if st.session_state.last_api_check:
-            st.caption(f"Last checked: {st.session_state.last_api_check.strftime('%H:%M:%S')}")
+        st.caption("Checked at most every 30 seconds")
 
 def check_api_health() -> Dict[str, Any]:
     """Check if the backend API is healthy"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        if response.status_code == 200:
-            return {"status": "online", "data": response.json()}
-        else:
-            return {"status": "warning", "data": {"error": f"API returned status {response.status_code}"}}
-    except requests.exceptions.ConnectionError:
-        return {"status": "offline", "data": {"error": "Cannot connect to backend"}}
-    except requests.exceptions.Timeout:
-        return {"status": "warning", "data": {"error": "API request timed out"}}
-    except Exception as e:
-        return {"status": "offline", "data": {"error": str(e)}}
+    return _health_report(HEALTH_URL)
 
 def get_or_create_session() -> Optional[str]:
     """Get or create a conversation session"""
     try:
-        response = requests.get(f"{API_BASE_URL}/admin/sessions", timeout=API_TIMEOUT)
+        session = get_http_session()
+        response = session.get(SESSIONS_URL, timeout=API_TIMEOUT)
         if response.status_code == 200:
-            sessions = response.json()
+            sessions = _json_loads(response.content)
             if sessions:
                 return sessions[0]  # Return first session if exists
         
         # Create new session
-        response = requests.post(f"{API_BASE_URL}/conversation/start", timeout=API_TIMEOUT)
+        response = session.post(START_URL, timeout=API_TIMEOUT)
         if response.status_code == 200:
-            return response.json()["session_id"]
+            return _json_loads(response.content)["session_id"]
         else:
             st.error(f"Failed to create session: {response.text}")
             return None
@@ -698,13 +527,14 @@ def get_or_create_session() -> Optional[str]:
 def send_message(session_id: str, message: str) -> Optional[Dict[str, Any]]:
     """Send a message to the backend"""
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/conversation/{session_id}/message",
-            json={"message": message},
+        response = post_json(
+            get_http_session(),
+            MSG_URL_TMPL % session_id,
+            {"message": message},
             timeout=API_TIMEOUT
         )
         if response.status_code == 200:
-            response_data = response.json()
+            response_data = _json_loads(response.content)
             # Convert backend response format to frontend format
             return {
                 "message": response_data.get("response", ""),
@@ -718,47 +548,42 @@ def send_message(session_id: str, message: str) -> Optional[Dict[str, Any]]:
     except Exception as e:
         return {"error": f"Request failed: {str(e)}"}
 
-def get_conversation_history(session_id: str) -> List[Dict[str, Any]]:
-    """Get conversation history for a session"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/conversation/{session_id}", timeout=API_TIMEOUT)
-        if response.status_code == 200:
-            return response.json().get("messages", [])
-        else:
-            return []
-    except Exception:
-        return []
+def _format_duration(duration: int) -> str:
+    if duration >= 60:
+        hours, minutes = divmod(duration, 60)
+        return f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
+    return f"{duration} minutes"
 
+# (key, emoji, label, formatter) for each line of the booking summary
+BOOKING_SUMMARY_FIELDS = (
+    ("date", "📅", "Date", str),
+    ("time", "🕐", "Time", str),
+    ("duration", "⏱️", "Duration", _format_duration),
+    ("purpose", "📝", "Purpose", str),
+)
+
+@st.cache_data(show_spinner=False, max_entries=256)
 def format_booking_summary(booking_data: Dict[str, Any]) -> str:
     """Format booking data for display"""
     if not booking_data:
         return ""
     
-    summary_parts = []
-    if booking_data.get("date"):
-        summary_parts.append(f"📅 **Date:** {booking_data['date']}")
-    if booking_data.get("time"):
-        summary_parts.append(f"🕐 **Time:** {booking_data['time']}")
-    if booking_data.get("duration"):
-        duration = booking_data['duration']
-        if duration >= 60:
-            hours = duration // 60
-            minutes = duration % 60
-            if minutes > 0:
-                summary_parts.append(f"⏱️ **Duration:** {hours}h {minutes}m")
-            else:
-                summary_parts.append(f"⏱️ **Duration:** {hours}h")
-        else:
-            summary_parts.append(f"⏱️ **Duration:** {duration} minutes")
-    if booking_data.get("purpose"):
-        summary_parts.append(f"📝 **Purpose:** {booking_data['purpose']}")
+    return "\n".join(
+        f"{emoji} **{label}:** {formatter(booking_data[key])}"
+        for key, emoji, label, formatter in BOOKING_SUMMARY_FIELDS
+        if booking_data.get(key)
+    )
+
+def _html_template(text: str) -> string.Template:
+    """Template for an HTML fragment, flush left so fragments can share one markdown body
     
-    return "\n".join(summary_parts)
+    Markdown reads a line indented four spaces after a blank line as code,
+    so fragments with different indents must not be joined as written.
+    """
+    return string.Template(textwrap.dedent(text).strip())
 
-def render_message(message_data, is_user=False):
-    """Render a single message with enhanced styling"""
-    if is_user:
-        st.markdown(f"""
+# Message bubbles, built once; content is HTML-escaped before substitution
+USER_TMPL = _html_template("""
         <div style="
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
@@ -769,16 +594,11 @@ def render_message(message_data, is_user=False):
             margin-left: auto;
             box-shadow: 0 2px 8px rgba(0,0,0,0.1);
         ">
-            <strong>You:</strong> {message_data['content']}
+            <strong>You:</strong> $content
         </div>
-        """, unsafe_allow_html=True)
-    else:
-        # Check if this is a booking confirmation message
-        is_confirmation = "confirmed" in message_data['content'].lower() and "✅" in message_data['content']
-        is_email_sent = "email sent" in message_data['content'].lower()
-        
-        if is_confirmation:
-            st.markdown(f"""
+        """)
+
+CONFIRM_TMPL = _html_template("""
             <div style="
                 background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
                 color: white;
@@ -793,14 +613,11 @@ def render_message(message_data, is_user=False):
                     <span style="font-size: 20px; margin-right: 8px;">✅</span>
                     <strong style="font-size: 16px;">Booking Confirmed!</strong>
                 </div>
-                {message_data['content']}
+                $content
             </div>
-            """, unsafe_allow_html=True)
-            
-            # Show booking summary card
-            if 'booking_data' in message_data:
-                booking_data = message_data['booking_data']
-                st.markdown(f"""
+            """)
+
+BOOKING_CARD_TMPL = _html_template("""
                 <div style="
                     background: white;
                     border: 2px solid #4CAF50;
@@ -811,26 +628,26 @@ def render_message(message_data, is_user=False):
                 ">
                     <h4 style="color: #2E7D32; margin-bottom: 16px;">📋 Booking Summary</h4>
                     <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 12px; margin-bottom: 16px;">
-                        <div><strong>Service:</strong> {booking_data.get('service_type', 'Meeting')}</div>
-                        <div><strong>Date:</strong> {booking_data.get('date', 'Tomorrow')}</div>
-                        <div><strong>Time:</strong> {booking_data.get('time', '10:00 AM')}</div>
-                        <div><strong>Duration:</strong> {booking_data.get('duration_minutes', 60)} min</div>
-                        <div><strong>Location:</strong> {booking_data.get('location', 'Main Office')}</div>
-                        <div><strong>Confirmation #:</strong> {booking_data.get('confirmation_number', 'N/A')}</div>
+                        <div><strong>Service:</strong> $service_type</div>
+                        <div><strong>Date:</strong> $date</div>
+                        <div><strong>Time:</strong> $time</div>
+                        <div><strong>Duration:</strong> $duration_minutes min</div>
+                        <div><strong>Location:</strong> $location</div>
+                        <div><strong>Confirmation #:</strong> $confirmation_number</div>
                     </div>
                     <div style="margin-top: 16px; padding: 12px; background: #E8F5E8; border-radius: 8px; font-size: 14px;">
                         <div style="display: flex; align-items: center; margin-bottom: 8px;">
                             <span style="font-size: 16px; margin-right: 8px;">📧</span>
-                            <strong>Confirmation email sent to {booking_data.get('user_email', 'your registered email')}</strong>
+                            <strong>Confirmation email sent to $user_email</strong>
                         </div>
                         <div style="font-size: 13px; color: #555;">
                             Check your email for detailed booking information and instructions.
                         </div>
                     </div>
                 </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
+                """)
+
+ASSIST_TMPL = _html_template("""
             <div style="
                 background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
                 color: #333;
@@ -841,9 +658,59 @@ def render_message(message_data, is_user=False):
                 box-shadow: 0 2px 8px rgba(0,0,0,0.1);
                 border-left: 4px solid #007bff;
             ">
-                <strong>AI Assistant:</strong> {message_data['content']}
+                <strong>AI Assistant:</strong> $content
             </div>
-            """, unsafe_allow_html=True)
+            """)
+
+# Booking card fields and the value shown when the backend omits one
+BOOKING_CARD_DEFAULTS = {
+    'service_type': 'Meeting',
+    'date': 'Tomorrow',
+    'time': '10:00 AM',
+    'duration_minutes': 60,
+    'location': 'Main Office',
+    'confirmation_number': 'N/A',
+    'user_email': 'your registered email',
+}
+
+def message_markup(message_data, is_user=False) -> str:
+    """HTML for a single message with enhanced styling"""
+    content = message_data['content']
+    escaped = html.escape(content)
+    if is_user:
+        return USER_TMPL.substitute(content=escaped)
+    
+    # Check if this is a booking confirmation message
+    if "confirmed" in content.lower() and "✅" in content:
+        markup = CONFIRM_TMPL.substitute(content=escaped)
+        # Show booking summary card
+        if 'booking_data' in message_data:
+            booking_data = message_data['booking_data']
+            markup += "\n" + BOOKING_CARD_TMPL.substitute({
+                key: html.escape(str(booking_data.get(key, default)))
+                for key, default in BOOKING_CARD_DEFAULTS.items()
+            })
+        return markup
+    return ASSIST_TMPL.substitute(content=escaped)
+
+def render_message(message_data, is_user=False):
+    """Render a single message with enhanced styling"""
+    st.markdown(message_markup(message_data, is_user), unsafe_allow_html=True)
+
+def history_markup(messages: List[Dict[str, Any]]) -> str:
+    """HTML for the whole chat history, formatting only messages new since the last rerun
+    
+    The markup of each message is kept in session state next to the list
+    it came from; replacing st.session_state.messages starts over.
+    """
+    cached = st.session_state.get('history_markup')
+    if cached is None or cached[0] is not messages or len(cached[1]) > len(messages):
+        cached = (messages, [])
+        st.session_state.history_markup = cached
+    parts = cached[1]
+    for message in messages[len(parts):]:
+        parts.append(message_markup(message, message["role"] == "user"))
+    return "\n".join(parts)
 
 def render_slots(suggested_slots):
     if not suggested_slots:
@@ -980,6 +847,8 @@ def render_developer_credit():
     """, unsafe_allow_html=True)
 
 def main():
+    _init_logging()
+    
     # Header
     st.markdown("""
     <div class="main-header">
@@ -1113,10 +982,11 @@ def main():
                 st.session_state.last_processed_input = None
         
         # Chat messages display with responsive container
+        # The history goes out as one element rather than one per message
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.messages:
-                render_message(message, message["role"] == "user")
+            if st.session_state.messages:
+                st.markdown(history_markup(st.session_state.messages), unsafe_allow_html=True)
         
         # Responsive input area
         st.markdown("---")
@@ -1159,6 +1029,7 @@ def main():
         
         # Process message only if it's new and not already being processed
         if send_clicked and user_input and user_input != st.session_state.last_processed_input:
+            requests = _requests()
             st.session_state.loading = True
             st.session_state.last_processed_input = user_input
             
@@ -1169,9 +1040,9 @@ def main():
             if not st.session_state.session_id:
                 try:
                     with st.spinner("Starting conversation..."):
-                        response = requests.post("http://localhost:8000/conversation/start", timeout=10)
+                        response = get_http_session().post(START_URL, timeout=10)
                     if response.status_code == 200:
-                        session_data = response.json()
+                        session_data = _json_loads(response.content)
                         st.session_state.session_id = session_data["session_id"]
                     else:
                         st.error("Failed to start conversation. Please try again.")
@@ -1184,7 +1055,7 @@ def main():
                     st.session_state.last_processed_input = None
                     return
                 except requests.exceptions.ConnectionError:
-                    st.error("Cannot connect to backend. Please ensure the server is running on http://localhost:8000")
+                    st.error(f"Cannot connect to backend. Please ensure the server is running on {API_BASE_URL}")
                     st.session_state.loading = False
                     st.session_state.last_processed_input = None
                     return
@@ -1202,16 +1073,23 @@ def main():
                     for percent in range(0, 100, 10):
                         time.sleep(0.05)
                         progress.progress(percent + 10)
-                    response = requests.post(
-                        f"http://localhost:8000/conversation/{st.session_state.session_id}/message",
-                        json={"message": user_input},
+                    response = post_json(
+                        get_http_session(),
+                        MSG_URL_TMPL % st.session_state.session_id,
+                        {"message": user_input},
                         timeout=15
                     )
                     progress.empty()
                 
                 if response.status_code == 200:
-                    response_data = response.json()
-                    assistant_message = response_data.get("response", "I apologize, but I'm having trouble processing your request. Please try again.")
+                    response_data = _json_loads(response.content)
+                    try:
+                        # Validate the backend's reply once, as it enters the chat
+                        reply = Message.from_api({"role": MessageRole.ASSISTANT.value, "content": response_data.get("response")})
+                        assistant_message = reply.content
+                    except ValueError as e:
+                        logger.warning(f"Invalid assistant reply from API: {e}")
+                        assistant_message = "I apologize, but I'm having trouble processing your request. Please try again."
                     
                     # Add assistant message to chat
                     st.session_state.messages.append({
@@ -1243,7 +1121,7 @@ def main():
                 else:
                     error_msg = f"Server error ({response.status_code})"
                     try:
-                        error_data = response.json()
+                        error_data = _json_loads(response.content)
                         error_msg = error_data.get('detail', error_msg)
                     except:
                         pass
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat history markup of the Streamlit frontend
+"""
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+# Add the frontend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+import streamlit_app
+from streamlit_app import history_markup, message_markup
+
+
+class SessionState(dict):
+    """Stands in for st.session_state outside a Streamlit run"""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture(autouse=True)
+def session_state(monkeypatch):
+    state = SessionState()
+    monkeypatch.setattr(streamlit_app.st, "session_state", state)
+    return state
+
+
+def _markdown_body(markup):
+    """The body as st.markdown passes it to the markdown renderer"""
+    return textwrap.dedent(markup).strip()
+
+
+def _assert_single_html_block(markup):
+    # A block opened by <div runs until the first blank line, so with no
+    # blank lines every line stays raw HTML and none becomes a code block
+    body = _markdown_body(markup)
+    assert body.startswith("<div")
+    assert all(line.strip() for line in body.splitlines())
+
+
+def test_user_and_assistant_history_is_one_html_block():
+    messages = [
+        {"role": "user", "content": "Book a meeting tomorrow"},
+        {"role": "assistant", "content": "What time would you prefer?"},
+        {"role": "user", "content": "2 PM for 30 minutes"},
+        {"role": "assistant", "content": "✅ Booking confirmed", "booking_data": {"date": "2026-10-17"}},
+    ]
+
+    markup = history_markup(messages)
+
+    _assert_single_html_block(markup)
+    assert markup.count("<strong>You:</strong>") == 2
+    assert "<strong>AI Assistant:</strong> What time would you prefer?" in markup
+    assert "Booking Summary" in markup
+
+
+def test_history_formats_only_new_messages(session_state):
+    messages = [{"role": "user", "content": "hi"}]
+    history_markup(messages)
+    parts = session_state["history_markup"][1]
+
+    messages.append({"role": "assistant", "content": "hello <there>"})
+    markup = history_markup(messages)
+
+    assert session_state["history_markup"][1] is parts
+    assert markup == "\n".join(message_markup(m, m["role"] == "user") for m in messages)
+    assert "hello &lt;there&gt;" in markup
+
+
+def test_replaced_history_starts_over():
+    history_markup([{"role": "user", "content": "old"}])
+
+    markup = history_markup([{"role": "assistant", "content": "new"}])
+
+    assert "old" not in markup
+    _assert_single_html_block(markup)